@@ -0,0 +1,56 @@
+"""
+Бенчмарк фонового автосохранения: сколько времени занимает GUI-поток при сохранении карты
+на 1 000, 10 000 и 100 000 строк.
+
+Прежнее автосохранение выполняло весь saveToRsk в GUI-потоке. BackgroundSaver снимает в нём только снимок
+карты (rskSnapshot), сериализация, сжатие и атомарная запись идут в рабочем потоке. Время снимка
+измеряется для списка Record и для столбцовой таблицы ColumnarRiskMap и сравнивается с кадром 60 Гц.
+
+Запуск: python -m benchmarks.autosave [строк ...]
+"""
+import os, sys, tempfile, time, timeit
+from src.backend.autosave import BackgroundSaver
+from src.backend.columnar import ColumnarRiskMap, ColumnStore
+from tests.fixtures import syntheticMap
+
+FRAME = 1 / 60
+
+
+# Сохранение с записью файла: повторное сохранение неизменённой карты saveToRsk пропускает
+def rewrite(riskMap, path: str) -> None:
+    riskMap._writtenState = None
+    riskMap.saveToRsk(path)
+
+
+def main(sizes: tuple[int, ...] = (1000, 10_000, 100_000)) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            listMap = syntheticMap(rows)
+            columnarMap = ColumnarRiskMap()
+            columnarMap.table = ColumnStore(listMap.table)
+            path = os.path.join(tmp, "map.rsk")
+            listMap.saveToRsk(path)
+            columnarMap._savePath = path
+
+            saveTime = min(timeit.repeat(lambda: rewrite(listMap, path), number=1, repeat=3))
+            listSnapshot = min(timeit.repeat(listMap.rskSnapshot, number=1, repeat=3))
+            columnarSnapshot = min(timeit.repeat(columnarMap.rskSnapshot, number=1, repeat=3))
+
+            saver = BackgroundSaver()
+            listMap.mapNo = "1"
+            start = time.perf_counter()
+            saver.submit(listMap)
+            submitTime = time.perf_counter() - start
+            saver.wait()
+            backgroundTime = time.perf_counter() - start
+            saver.shutdown()
+
+            print(f"Строк: {rows}")
+            print(f"  saveToRsk в GUI-потоке:           {saveTime * 1e3:8.2f} мс")
+            print(f"  Снимок, список Record:            {listSnapshot * 1e3:8.2f} мс ({listSnapshot / FRAME:.2f} кадра)")
+            print(f"  Снимок, столбцы:                  {columnarSnapshot * 1e3:8.2f} мс ({columnarSnapshot / FRAME:.2f} кадра)")
+            print(f"  BackgroundSaver.submit:           {submitTime * 1e3:8.2f} мс, запись завершена через {backgroundTime * 1e3:.2f} мс")
+
+
+if __name__ == '__main__':
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (1000, 10_000, 100_000))
@@ -0,0 +1,35 @@
+"""
+Бенчмарк пакетного расчёта карт: Table.calculate по одной карте против batchCalc.calculateMany.
+
+Синтетические карты строятся одинаково для обоих способов, после расчёта сравниваются
+веса, риски и рейтинги строк, weightSum, profRisk, result, resultStr и методики каждой карты.
+Бенчмарк завершается ошибкой, если результаты расходятся или пакетный расчёт не быстрее поштучного.
+
+Запуск: python -m benchmarks.batchCalc
+"""
+import time
+from src.backend.batchCalc import calculateMany
+from tests.fixtures import makeMaps, snapshot
+
+
+def main(count: int = 10000) -> None:
+    single, batch = makeMaps(count), makeMaps(count)
+    start = time.perf_counter()
+    for riskMap in single:
+        riskMap.calculate()
+    singleTime = time.perf_counter() - start
+    start = time.perf_counter()
+    calculateMany(batch)
+    batchTime = time.perf_counter() - start
+    mismatches = sum(snapshot(a) != snapshot(b) for a, b in zip(single, batch))
+    rows = sum(len(riskMap.table) for riskMap in single)
+    print(f"Карт: {count}, строк: {rows}, расхождений: {mismatches}")
+    print(f"Table.calculate:  {singleTime:8.3f} с ({count / singleTime:8.0f} карт/с)")
+    print(f"calculateMany:    {batchTime:8.3f} с ({count / batchTime:8.0f} карт/с)")
+    print(f"Ускорение:        {singleTime / batchTime:8.1f}x")
+    assert not mismatches, "calculateMany разошёлся с Table.calculate"
+    assert batchTime < singleTime, "calculateMany медленнее Table.calculate"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Бенчмарк открытия многих карт: последовательный loadFromRsk в одном потоке против BulkOpener
+с разным числом процессов разбора на наборе из 200 карт по 500 строк (сжатый формат v2).
+Ускорение ограничено построением карт в одном потоке - его доля выводится отдельно, для документа
+со строками (readRskDocument) и со столбцами, которые готовят процессы разбора (readRskColumns).
+
+Запуск: python -m benchmarks.bulkOpen [карт [строк]]
+"""
+import os, sys, tempfile, time
+from src.backend.bulkOpen import openMany
+from src.backend.riskMap import RiskMap
+from src.backend.rskStream import readRskColumns, readRskDocument
+from tests.fixtures import syntheticMap
+
+
+def main(count: int = 200, rows: int = 500) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(count):
+            path = os.path.join(tmp, f"map{i}.rsk")
+            syntheticMap(rows, seed=i).saveToRsk(path)
+            paths.append(path)
+
+        start = time.perf_counter()
+        for path in paths:
+            RiskMap.loadFromRsk(path)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        documents = [readRskDocument(path) for path in paths]
+        parseTime = time.perf_counter() - start
+        start = time.perf_counter()
+        for path, data in zip(paths, documents):
+            RiskMap.fromRskDocument(path, data)
+        buildTime = time.perf_counter() - start
+        start = time.perf_counter()
+        documents = [readRskColumns(path) for path in paths]
+        columnsParseTime = time.perf_counter() - start
+        start = time.perf_counter()
+        for path, data in zip(paths, documents):
+            RiskMap.fromRskDocument(path, data)
+        columnsBuildTime = time.perf_counter() - start
+
+        print(f"Карт: {count}, строк в карте: {rows}, ядер: {os.cpu_count()}")
+        print(f"  loadFromRsk по очереди:        {sequential:8.2f} с")
+        print(f"  Разбор файлов (readRskDocument): {parseTime:6.2f} с")
+        print(f"  Построение карт:               {buildTime:8.2f} с")
+        print(f"  Разбор в столбцы (readRskColumns): {columnsParseTime:4.2f} с")
+        print(f"  Построение карт по столбцам:   {columnsBuildTime:8.2f} с")
+        workerCounts = sorted({1, 2, 4, os.cpu_count() or 1})
+        for workers in workerCounts:
+            start = time.perf_counter()
+            maps = openMany(paths, workers=workers)
+            elapsed = time.perf_counter() - start
+            failed = sum(riskMap is None for riskMap in maps)
+            print(f"  BulkOpener, процессов {workers:3}:     {elapsed:8.2f} с  (x{sequential / elapsed:.2f}"
+                  f"{f', ошибок: {failed}' if failed else ''})")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
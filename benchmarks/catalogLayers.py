@@ -0,0 +1,57 @@
+"""
+Бенчмарк слоёв справочника: оверлей организации поверх db.json и оверлей площадки поверх него.
+
+Сравнивает полную пересборку CatalogIndex по итоговому справочнику с инкрементальным
+обновлением при подключении и перечитывании одного слоя, а также стоимость точечных запросов
+без оверлеев и с двумя подключёнными слоями.
+
+Запуск: python -m benchmarks.catalogLayers
+"""
+import timeit
+from src.backend.database import CatalogIndex, DatabaseManager
+
+
+def makeOverlays(manager: DatabaseManager, size: int) -> tuple[dict, dict]:
+    keys = manager.getDangers()
+    org, site = {}, {}
+    for i in range(size):
+        key = keys[i % len(keys)]
+        event = manager.getEvents(key)[0]
+        org[key] = {"events": {event: [f"Мера организации {i}"], f"Событие организации {i}": [f"Мера {i}"]}}
+        site[f"{1000 + i}. Опасность площадки {i}"] = {"events": {f"Событие площадки {i}": [f"Мера площадки {i}"]}}
+    return org, site
+
+
+def lookupTime(manager: DatabaseManager, number: int = 20000) -> float:
+    pairs = [(danger, event) for danger in manager.getDangers()[:20] for event in manager.getEvents(danger)[:1]]
+
+    def body():
+        for danger, event in pairs:
+            manager.hasEvent(danger, event)
+            manager.getMeasures(danger, event)
+    return min(timeit.repeat(body, repeat=5, number=number // len(pairs))) / (number // len(pairs) * len(pairs)) * 1e6
+
+
+def main(size: int = 40) -> None:
+    manager = DatabaseManager()
+    plain = lookupTime(manager)
+    org, site = makeOverlays(manager, size)
+    mount = min(timeit.repeat(lambda: (manager.mountLayer("org", data=org), manager.unmountLayer("org")), repeat=5, number=10)) / 20
+    manager.mountLayer("org", data=org)
+    manager.mountLayer("site", data=site)
+    changed = dict(site)
+    changed.pop(next(iter(changed)))
+    reload = min(timeit.repeat(lambda: (manager.mountLayer("site", data=changed), manager.mountLayer("site", data=site)),
+                               repeat=5, number=10)) / 20
+    full = min(timeit.repeat(lambda: CatalogIndex(manager.database), repeat=5, number=5)) / 5
+    layered = lookupTime(manager)
+    print(f"Опасностей: {len(manager.getDangers())}, записей в оверлеях: {len(org)} + {len(site)}")
+    print(f"Полная пересборка индекса:        {full * 1e3:8.3f} мс")
+    print(f"Подключение/отключение оверлея:   {mount * 1e3:8.3f} мс")
+    print(f"Изменение одной записи слоя:      {reload * 1e3:8.3f} мс")
+    print(f"Запрос без оверлеев:              {plain:8.3f} мкс")
+    print(f"Запрос с двумя оверлеями:         {layered:8.3f} мкс")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Микробенчмарк поиска по справочнику опасностей на реальном db.json.
+
+Сравнивает стоимость одного редактирования ячейки (опасность -> событие -> меры)
+при линейном поиске по list(database.keys()) и при поиске через CatalogIndex.
+
+Запуск: python -m benchmarks.catalogLookup
+"""
+import timeit
+from src.backend.database import database as db
+
+
+def legacyEdit(danger: str, event: str) -> None:
+    # Повтор старых проверок из Record, RiskDataTable и Table.fillMethods
+    database = db.database
+    if danger in list(database.keys()):
+        n, desc = database[danger]["No"], database[danger]["desc"]
+        if danger in list(database.keys()) and event in list(database[danger]["events"].keys()):
+            if event in list(database[f'{n}. {desc}']["events"].keys()):
+                database[f'{n}. {desc}']["events"][event]
+
+
+def indexedEdit(danger: str, event: str) -> None:
+    entry = db.index.byKey.get(danger)
+    if entry is not None:
+        key = db.index.keyOf(entry["No"], entry["desc"])
+        if db.hasEvent(danger, event):
+            if db.hasEvent(key, event):
+                db.getMeasures(key, event)
+
+
+def main(repeat: int = 5, number: int = 20000) -> None:
+    pairs = [(danger, event) for danger in db.getDangers() for event in db.getEvents(danger)]
+    # Худший случай для линейного поиска - последние опасности справочника
+    samples = pairs[-10:] + pairs[:10]
+
+    def run(fn):
+        def body():
+            for danger, event in samples:
+                fn(danger, event)
+        best = min(timeit.repeat(body, repeat=repeat, number=number // len(samples)))
+        return best / (number // len(samples) * len(samples)) * 1e6
+
+    legacy = run(legacyEdit)
+    indexed = run(indexedEdit)
+    print(f"Опасностей: {len(db.index.keys)}, пар опасность-событие: {len(pairs)}")
+    print(f"Линейный поиск:  {legacy:8.3f} мкс на редактирование")
+    print(f"CatalogIndex:    {indexed:8.3f} мкс на редактирование")
+    print(f"Ускорение:       {legacy / indexed:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
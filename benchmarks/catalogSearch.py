@@ -0,0 +1,44 @@
+"""
+Бенчмарк полнотекстового поиска по справочнику.
+
+Сравнивает ранжированный поиск CatalogSearchIndex с построчной проверкой вхождения подстроки,
+аналогичной Qt.MatchFlag.MatchContains в прежнем комплитере.
+
+Запуск: python -m benchmarks.catalogSearch
+"""
+import timeit
+from src.backend.database import database as db
+
+QUERIES = ["пожар", "падение с высоты", "электрич", "шум", "ожог", "травм", "поражение током", "вибрац"]
+
+
+def containsScan(query: str, texts: list[str]) -> list[str]:
+    query = query.lower()
+    return [text for text in texts if query in text.lower()]
+
+
+def main(number: int = 200) -> None:
+    dangers = db.getDangers()
+    events = [event for danger in dangers for event in db.getEvents(danger)]
+
+    def indexed():
+        for query in QUERIES:
+            db.search(query, "danger")
+            db.search(query, "event")
+
+    def scan():
+        for query in QUERIES:
+            containsScan(query, dangers)
+            containsScan(query, events)
+
+    perQuery = number * len(QUERIES) * 2
+    indexedUs = min(timeit.repeat(indexed, repeat=5, number=number)) / perQuery * 1e6
+    scanUs = min(timeit.repeat(scan, repeat=5, number=number)) / perQuery * 1e6
+    print(f"CatalogSearchIndex: {indexedUs:8.2f} мкс на запрос (с ранжированием и стеммингом)")
+    print(f"Поиск подстроки:    {scanUs:8.2f} мкс на запрос (без ранжирования)")
+    for query in QUERIES[:3]:
+        print(f"  {query!r}: {[text[:50] for text in db.search(query, 'event', limit=3)]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Бенчмарк бэкендов справочника на синтетическом справочнике из 50 000 событий.
+
+Сравнивает CatalogIndex в памяти (db.json) и SqliteCatalogBackend (SQLite + FTS5)
+по времени построения, памяти, точечным запросам и полнотекстовому поиску.
+
+Запуск: python -m benchmarks.catalogSqlite
+"""
+import gc, json, os, random, re, tempfile, time, timeit, tracemalloc
+from src.backend.database import CatalogIndex, DB_JSON_PATH
+from src.backend.catalogSqlite import SqliteCatalogBackend, buildSqliteCatalog
+
+
+def syntheticCatalog(dangers: int = 2500, eventsPerDanger: int = 20, measures: int = 5000, seed: int = 1) -> dict:
+    rnd = random.Random(seed)
+    with open(DB_JSON_PATH, mode="r", encoding="utf-8") as f:
+        words = sorted(set(re.findall(r"\w{4,}", f.read())))
+    sentence = lambda count: " ".join(rnd.choice(words) for _ in range(count)).capitalize()
+    measurePool = [f"{sentence(12)} ({i})" for i in range(measures)]
+    catalog = {}
+    for i in range(dangers):
+        desc = f"{sentence(8)} ({i})"
+        catalog[f"{i + 1}. {desc}"] = {
+            "No": str(i + 1),
+            "desc": desc,
+            "events": {f"{sentence(10)} ({i}.{j})": rnd.sample(measurePool, 2) for j in range(eventsPerDanger)},
+        }
+    return catalog
+
+
+def perCall(fn, calls: list, number: int = 3) -> float:
+    def body():
+        for args in calls:
+            fn(*args)
+    return min(timeit.repeat(body, repeat=3, number=number)) / (number * len(calls)) * 1e6
+
+
+def main() -> None:
+    catalog = syntheticCatalog()
+    rnd = random.Random(2)
+    keys = list(catalog)
+    pairs = [(key, rnd.choice(list(catalog[key]["events"]))) for key in rnd.sample(keys, 500)]
+    queries = [tuple(re.findall(r"\w+", event)[:2]) for _, event in pairs[:50]]
+    print(f"Опасностей: {len(catalog)}, событий: {sum(len(v['events']) for v in catalog.values())}")
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = CatalogIndex(catalog)
+    build = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"CatalogIndex: построение {build:.2f} с, память {memory / 2 ** 20:.1f} МБ")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.sqlite")
+        start = time.perf_counter()
+        buildSqliteCatalog(catalog, path)
+        print(f"SQLite: конвертирование {time.perf_counter() - start:.2f} с, файл {os.path.getsize(path) / 2 ** 20:.1f} МБ")
+        gc.collect()
+        tracemalloc.start()
+        backend = SqliteCatalogBackend(path)
+        print(f"SQLite: открытие, память {tracemalloc.get_traced_memory()[0] / 2 ** 20:.2f} МБ")
+        tracemalloc.stop()
+
+        hasEventIndex = lambda key, event: event in index.events.get(key, ())
+        print(f"hasEvent:   память {perCall(hasEventIndex, pairs):8.2f} мкс, SQLite {perCall(backend.hasEvent, pairs):8.2f} мкс")
+        print(f"getEvents:  память {perCall(lambda key, _: list(index.eventLists[key]), pairs):8.2f} мкс, "
+              f"SQLite {perCall(lambda key, _: backend.getEvents(key), pairs):8.2f} мкс")
+        print(f"getMeasures: память {perCall(lambda key, event: index.measures[(key, event)], pairs):7.2f} мкс, "
+              f"SQLite {perCall(backend.getMeasures, pairs):8.2f} мкс")
+        searchQueries = [(" ".join(words),) for words in queries]
+        print(f"Поиск:      память {perCall(lambda q: index.search.search(q, 'event'), searchQueries, 1):8.1f} мкс, "
+              f"SQLite FTS5 {perCall(lambda q: backend.search(q, 'event'), searchQueries, 1):8.1f} мкс")
+        backend.close()
+
+
+if __name__ == '__main__':
+    main()
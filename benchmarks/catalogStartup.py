@@ -0,0 +1,34 @@
+"""
+Бенчмарк запуска: разбор db.json с построением CatalogIndex против чтения бинарного кэша db.cache.
+
+Запуск: python -m benchmarks.catalogStartup
+"""
+import json, os, timeit
+from src.backend.database import DatabaseManager, CatalogIndex, DB_JSON_PATH, DB_CACHE_PATH
+
+
+def coldJson() -> None:
+    with open(DB_JSON_PATH, mode="r", encoding="utf-8") as f:
+        database = json.load(f)
+    CatalogIndex(database)
+
+
+def cacheHit() -> None:
+    DatabaseManager._readCatalogCache(os.stat(DB_JSON_PATH))
+
+
+def main(repeat: int = 5, number: int = 50) -> None:
+    DatabaseManager.load_catalog()
+    if DatabaseManager._readCatalogCache(os.stat(DB_JSON_PATH)) is None:
+        print(f"Кэш {DB_CACHE_PATH} недоступен для записи, сравнение невозможно")
+        return
+    cold = min(timeit.repeat(coldJson, repeat=repeat, number=number)) / number * 1e3
+    hit = min(timeit.repeat(cacheHit, repeat=repeat, number=number)) / number * 1e3
+    print(f"db.json: {os.path.getsize(DB_JSON_PATH) / 1024:.0f} КБ, db.cache: {os.path.getsize(DB_CACHE_PATH) / 1024:.0f} КБ")
+    print(f"json.load + CatalogIndex: {cold:7.2f} мс")
+    print(f"Чтение db.cache:          {hit:7.2f} мс")
+    print(f"Ускорение:                {cold / hit:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
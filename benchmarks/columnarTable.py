@@ -0,0 +1,44 @@
+"""
+Бенчмарк столбцовой таблицы ColumnarRiskMap против списка объектов Record на 100, 10 000 и 100 000 строк.
+
+Для каждого размера измеряются память, удерживаемая строками таблицы (tracemalloc), и время calculate().
+Строки получают собственные опасности вне справочника, поэтому calculate() не схлопывает их как повторы.
+Результаты обеих таблиц сверяются: profRisk, result, веса, риски и рейтинги строк должны совпасть.
+
+Запуск: python -m benchmarks.columnarTable [строк ...]
+"""
+import sys
+import timeit
+from benchmarks.recordMemory import retained
+from benchmarks.sensitivity import makeMap
+from src.backend.columnar import ColumnarRiskMap, ColumnStore
+
+
+def rowValues(riskMap) -> list[tuple]:
+    return [(r.dangerId, r.weight, r.identifiedDangersRisks, r.rating) for r in riskMap.table]
+
+
+def main(sizes: tuple[int, ...] = (100, 10_000, 100_000)) -> None:
+    for rows in sizes:
+        listMap = makeMap(rows)
+        columnarMap = ColumnarRiskMap()
+        columnarMap.table = ColumnStore(listMap.table)
+        listMemory = retained(lambda: makeMap(rows).table)
+        columnarMemory = retained(lambda: ColumnStore(listMap.table))
+
+        number = max(1, 100_000 // rows)
+        listTime = min(timeit.repeat(listMap.calculate, number=number, repeat=3)) / number
+        columnarTime = min(timeit.repeat(columnarMap.calculate, number=number, repeat=3)) / number
+        same = (listMap.profRisk, listMap.result, listMap.methods) == (columnarMap.profRisk, columnarMap.result, columnarMap.methods)\
+            and rowValues(listMap) == rowValues(columnarMap)
+
+        print(f"Строк: {rows}")
+        print(f"  Память, список Record:    {listMemory / 1024:9.0f} КБ ({listMemory / rows:5.0f} Б на строку)")
+        print(f"  Память, столбцы:          {columnarMemory / 1024:9.0f} КБ ({columnarMemory / rows:5.0f} Б на строку)")
+        print(f"  calculate(), список:      {listTime * 1e3:9.2f} мс")
+        print(f"  calculate(), столбцы:     {columnarTime * 1e3:9.2f} мс (x{listTime / columnarTime:.1f})")
+        print(f"  Результаты совпадают:     {'да' if same else 'НЕТ'}")
+
+
+if __name__ == '__main__':
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (100, 10_000, 100_000))
@@ -0,0 +1,52 @@
+"""
+Бенчмарк отпечатка содержимого карты: полный расчёт отпечатка (после загрузки или пересчёта), обновление
+после правки одной строки и пропуск повторного сохранения неизменённой карты по сравнению с записью файла,
+для таблицы из Record и столбцовой таблицы на картах из 1 000, 10 000 и 100 000 строк.
+
+Запуск: python -m benchmarks.contentFingerprint [строк ...]
+"""
+import os, sys, tempfile, time
+from src.backend.columnar import ColumnarRiskMap
+from src.backend.database import SUSCEPTIBILITY
+from src.backend.riskMap import RiskMap
+from tests.fixtures import syntheticMap
+
+EDITS = 200
+
+
+def main(sizes: tuple[int, ...] = (1000, 10_000, 100_000)) -> None:
+    values = list(SUSCEPTIBILITY)
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            path = os.path.join(tmp, "map.rsk")
+            syntheticMap(rows).saveToRsk(path)
+            print(f"Строк: {rows}")
+            for cls in (RiskMap, ColumnarRiskMap):
+                riskMap = cls.loadFromRsk(path)
+                riskMap._fingerprint = riskMap._rowDigests = None
+                start = time.perf_counter()
+                riskMap.fingerprint
+                fullTime = time.perf_counter() - start
+
+                start = time.perf_counter()
+                for i in range(EDITS):
+                    riskMap.table[i * 7919 % rows].susceptibility = values[i % len(values)]
+                    riskMap.isModified
+                editTime = (time.perf_counter() - start) / EDITS
+
+                start = time.perf_counter()
+                riskMap.saveToRsk(path)
+                writeTime = time.perf_counter() - start
+                start = time.perf_counter()
+                riskMap.saveToRsk(path)
+                skipTime = time.perf_counter() - start
+
+                print(f"  {cls.__name__}")
+                print(f"    Полный отпечаток:              {fullTime * 1e3:9.2f} мс")
+                print(f"    Правка строки и isModified:    {editTime * 1e6:9.1f} мкс")
+                print(f"    saveToRsk с записью:           {writeTime * 1e3:9.2f} мс")
+                print(f"    saveToRsk без изменений:       {skipTime * 1e3:9.2f} мс")
+
+
+if __name__ == '__main__':
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (1000, 10_000, 100_000))
@@ -0,0 +1,48 @@
+"""
+Бенчмарк журнала изменений: стоимость сохранения одной правки строки в журнал (EditJournal)
+и полной перезаписи файла saveToRsk на картах из 1 000, 10 000 и 100 000 строк, а также время восстановления
+карты по журналу из 1 000 правок.
+
+Запуск: python -m benchmarks.editJournal [строк ...]
+"""
+import os, sys, tempfile, time
+from src.backend.database import SUSCEPTIBILITY
+from src.backend.journal import EditJournal, recoverJournal
+from src.backend.riskMap import RiskMap
+from tests.fixtures import syntheticMap
+
+EDITS = 1000
+
+
+def main(sizes: tuple[int, ...] = (1000, 10_000, 100_000)) -> None:
+    values = list(SUSCEPTIBILITY)
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            path = os.path.join(tmp, "map.rsk")
+            riskMap = syntheticMap(rows)
+            start = time.perf_counter()
+            riskMap.saveToRsk(path)
+            saveTime = time.perf_counter() - start
+
+            riskMap = RiskMap.loadFromRsk(path)
+            journal = EditJournal(riskMap, compactSize=1 << 30)
+            start = time.perf_counter()
+            for i in range(EDITS):
+                riskMap.table[i * 7919 % rows].susceptibility = values[i % len(values)]
+            editTime = (time.perf_counter() - start) / EDITS
+            journal.close()
+
+            recovered = RiskMap.loadFromRsk(path)
+            start = time.perf_counter()
+            recoverJournal(recovered)
+            recoverTime = time.perf_counter() - start
+            same = [r.susceptibilityPts for r in recovered.table] == [r.susceptibilityPts for r in riskMap.table]
+
+            print(f"Строк: {rows}")
+            print(f"  saveToRsk:                     {saveTime * 1e3:9.2f} мс")
+            print(f"  Правка строки в журнал:        {editTime * 1e6:9.1f} мкс")
+            print(f"  Восстановление {EDITS} правок:    {recoverTime * 1e3:9.2f} мс ({'совпадает' if same else 'НЕ СОВПАДАЕТ'})")
+
+
+if __name__ == '__main__':
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (1000, 10_000, 100_000))
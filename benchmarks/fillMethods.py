@@ -0,0 +1,52 @@
+"""
+Бенчмарк формирования списка методик Table.fillMethods на картах из 1000 и более строк.
+
+Сравнивает прежнюю схему (конкатенация списков мер, set и сортировка строк)
+с объединением битовых масок мер по идентификаторам опасности и события.
+Рейтинги строк задаются напрямую, так как calculate() удаляет повторяющиеся пары опасность-событие.
+
+Запуск: python -m benchmarks.fillMethods
+"""
+import random
+import timeit
+from src.backend.database import database as db
+from src.backend.riskMap import Record, RiskMap
+
+
+def legacyFillMethods(riskMap: RiskMap) -> list[str]:
+    methods: list[str] = []
+    for record in riskMap.table:
+        if (record.rating is not None) and (record.rating == "Умеренный" or record.rating == "Высокий"):
+            methods += db.getMeasures(record.dangerKey, record.event)
+    methods = list(set(methods))
+    methods.sort()
+    return methods
+
+
+def makeMap(rows: int, seed: int = 1) -> RiskMap:
+    rng = random.Random(seed)
+    pairs = [(danger, event) for danger in db.getDangers() for event in db.getEvents(danger)]
+    riskMap = RiskMap()
+    for _ in range(rows):
+        danger, event = rng.choice(pairs)
+        record = Record()
+        record.danger, record.event = danger, event
+        record.rating = rng.choice(("Низкий", "Умеренный", "Высокий"))
+        riskMap.table.append(record)
+    return riskMap
+
+
+def main(repeat: int = 5) -> None:
+    for rows in (1000, 10000, 50000):
+        riskMap = makeMap(rows)
+        riskMap.fillMethods()
+        assert riskMap.methods == legacyFillMethods(riskMap)
+        number = max(1, 20000 // rows)
+        legacy = min(timeit.repeat(lambda: legacyFillMethods(riskMap), repeat=repeat, number=number)) / number
+        bitset = min(timeit.repeat(riskMap.fillMethods, repeat=repeat, number=number)) / number
+        print(f"{rows:6d} строк, {len(riskMap.methods)} мер: списки {legacy * 1e3:8.3f} мс, "
+              f"битовые маски {bitset * 1e3:8.3f} мс, ускорение {legacy / bitset:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Бенчмарк времени импорта src.backend.riskMap в отдельном процессе.
+
+Сравнивает рабочее дерево с прежней ревизией репозитория (по умолчанию - первой, где справочник загружался
+при импорте), извлечённой через git archive во временную папку. Для рабочего дерева отдельно выводится время
+с немедленной загрузкой справочника через preload(). Перед замерами оба дерева компилируются в .pyc,
+чтобы не сравнивать время компиляции исходников.
+
+Запуск: python -m benchmarks.importTime [ревизия [повторов]]
+"""
+import compileall, io, statistics, subprocess, sys, tarfile, tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+SNIPPET = """
+import time
+t = time.perf_counter()
+import src.backend.riskMap
+{extra}
+print(time.perf_counter() - t)
+"""
+
+
+def measure(root: Path, extra: str, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", SNIPPET.format(extra=extra)], cwd=root,
+                             capture_output=True, text=True, check=True).stdout
+        times.append(float(out) * 1e3)
+    return statistics.median(times)
+
+
+def exportRevision(revision: str, directory: Path) -> None:
+    archive = subprocess.run(["git", "archive", revision, "src"], cwd=ROOT, capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+
+
+def main(revision: str = "", runs: int = 15) -> None:
+    revision = revision or subprocess.run(["git", "rev-list", "--max-parents=0", "HEAD"], cwd=ROOT,
+                                          capture_output=True, text=True, check=True).stdout.split()[0]
+    loaded = subprocess.run([sys.executable, "-c", "import src.backend.riskMap\n"
+                             "from src.backend.database import database\nprint(database.isLoaded)"],
+                            cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    with tempfile.TemporaryDirectory() as tmp:
+        exportRevision(revision, Path(tmp))
+        for root in (Path(tmp), ROOT):
+            compileall.compile_dir(root / "src", quiet=1)
+        before = measure(Path(tmp), "", runs)
+        lazy = measure(ROOT, "", runs)
+        eager = measure(ROOT, "from src.backend.database import database\ndatabase.preload()", runs)
+    print(f"Ревизия {revision[:10]}:                 {before:7.2f} мс")
+    print(f"Рабочее дерево:                   {lazy:7.2f} мс (справочник загружен при импорте: {loaded})")
+    print(f"Рабочее дерево и preload():       {eager:7.2f} мс")
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2], *(int(arg) for arg in sys.argv[2:3]))
@@ -0,0 +1,62 @@
+"""
+Бенчмарк памяти на 10 000 записей таблицы и размера файла .rsk.
+
+Прежний Record хранил в __dict__ двенадцать полей с отдельными копиями строк из JSON для каждой строки,
+новый хранит в __slots__ идентификаторы опасности и события и баллы.
+
+Запуск: python -m benchmarks.recordMemory
+"""
+import gc, json, os, tempfile, tracemalloc
+from src.backend.riskMap import RiskMap
+from src.backend.database import database as db
+from tests.fixtures import syntheticMap
+
+
+class LegacyRecord:
+    def __init__(self, data: dict):
+        self._n = data.get("n")
+        self._danger = data.get("danger")
+        self._event = data.get("event")
+        self._damage = data.get("damage")
+        self._damagePts = data.get("damagePts")
+        self._susceptibility = data.get("susceptibility")
+        self._susceptibilityPts = data.get("susceptibilityPts")
+        self._probability = data.get("probability")
+        self._probabilityPts = data.get("probabilityPts")
+        self._weight = data.get("weight")
+        self._identifiedDangersRisks = data.get("identifiedDangersRisks")
+        self._rating = data.get("rating")
+        self.onModifiedCallback = None
+
+
+def retained(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main(rows: int = 10000) -> None:
+    riskMap = syntheticMap(rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        textPath, idsPath = os.path.join(tmp, "text.rsk"), os.path.join(tmp, "ids.rsk")
+        riskMap.saveToRsk(textPath, storeIds=False)
+        riskMap.saveToRsk(idsPath)
+        textJson = json.dumps([RiskMap._recordToText(record) for record in riskMap.table], ensure_ascii=False)
+        db.preload()
+
+        legacy = retained(lambda: [LegacyRecord(data) for data in json.loads(textJson)])
+        compact = retained(lambda: RiskMap.loadFromRsk(idsPath).table)
+        print(f"Записей: {rows}")
+        print(f"Память, прежний Record:  {legacy / 1024:9.0f} КБ ({legacy / rows:6.0f} Б на запись)")
+        print(f"Память, Record с ID:     {compact / 1024:9.0f} КБ ({compact / rows:6.0f} Б на запись)")
+        print(f"Файл .rsk с текстами:    {os.path.getsize(textPath) / 1024:9.0f} КБ")
+        print(f"Файл .rsk с ID:          {os.path.getsize(idsPath) / 1024:9.0f} КБ")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Проверка и бенчмарк таблиц рисков scoring.
+
+1. Полный перебор: для всех произведений баллов 0..125 и weightSum 1..maxWeightSum целочисленные
+   hundredths и ratingIndex сравниваются с прежним расчётом round(product / weightSum, 2) и порогами 0.9 / 1.8.
+2. Карты: calculate() сравнивается с прежней формулой по строкам на синтетических картах.
+3. Время расчёта рисков и рейтингов строк прежним способом и по таблицам.
+
+Запуск: python -m benchmarks.riskTables [maxWeightSum]
+"""
+import sys
+import timeit
+from src.backend.scoring import PRODUCTS, RATINGS, hundredths, hundredthsRow, ratingIndex
+from tests.fixtures import legacyRow, makeMaps
+
+
+def tableRow(d: int, s: int, p: int, weightSum: int) -> tuple[float, float, str]:
+    risks = hundredthsRow(weightSum)
+    product = PRODUCTS[d][s][p]
+    return risks[p] / 100, risks[product] / 100, RATINGS[ratingIndex(product, weightSum)]
+
+
+def exhaustive(maxWeightSum: int) -> int:
+    mismatches = 0
+    for weightSum in range(1, maxWeightSum + 1):
+        for product in range(126):
+            risk = round(product / weightSum, 2)
+            expected = 0 if risk <= 0.9 else (1 if risk <= 1.8 else 2)
+            mismatches += hundredths(product, weightSum) / 100 != risk or ratingIndex(product, weightSum) != expected
+    return mismatches
+
+
+def mapsMismatches(count: int = 2000) -> int:
+    mismatches = 0
+    for riskMap in makeMaps(count, seed=5):
+        riskMap.calculate(updateMethods=False)
+        for record in riskMap.table:
+            legacy = legacyRow(record.damagePts, record.susceptibilityPts, record.probabilityPts, riskMap.weightSum)
+            mismatches += legacy != (record.weight, record.identifiedDangersRisks, record.rating)
+    return mismatches
+
+
+def main(maxWeightSum: int = 10000) -> None:
+    print(f"Перебор 126 x {maxWeightSum} пар (произведение, weightSum): расхождений {exhaustive(maxWeightSum)}")
+    print(f"Строк карт с расхождением calculate() и прежней формулы: {mapsMismatches()}")
+    rows = [(d, s, p) for d in range(1, 6) for s in range(1, 6) for p in range(1, 6)]
+    for name, fn in (("прежний расчёт", legacyRow), ("таблицы scoring", tableRow)):
+        best = min(timeit.repeat(lambda: [fn(d, s, p, 300) for d, s, p in rows], repeat=5, number=200))
+        print(f"{name:16s}: {best / (200 * len(rows)) * 1e9:8.1f} нс на строку")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,62 @@
+"""
+Бенчмарк кодеков сжатия .rsk: размер файла, время saveToRsk и loadFromRsk для каждого кодека
+(gzip с уровнями 1, 6 и 9, lzma, zlib и без сжатия) на синтетических картах из 1 000 и 10 000 строк
+и на настоящих картах, если указать их файлы или папки. Время записи и чтения зависит от диска: чтобы выбрать
+кодек для сетевой папки, укажите её в --dir, тогда файлы пишутся и читаются там.
+
+Запуск: python -m benchmarks.rskCodecs [--dir ПАПКА] [--repeat N] [карта.rsk | папка ...]
+"""
+import argparse, os, tempfile, timeit
+from src.backend.batch import findRskFiles
+from src.backend.riskMap import RiskMap
+from src.backend.rskStream import DEFAULT_CODEC
+from tests.fixtures import syntheticMap
+
+CODECS = ("none", "gzip:1", "gzip:6", "gzip:9", "lzma:0", "lzma:6", "zlib:1", "zlib:6")
+
+
+def rowValues(riskMap: RiskMap) -> list[tuple]:
+    return [(r.dangerKey, r.event, r.damagePts, r.susceptibilityPts, r.probabilityPts, r.weight, r.rating) for r in riskMap.table]
+
+
+# Сохранение с записью файла: повторное сохранение неизменённой карты saveToRsk пропускает
+def rewrite(riskMap: RiskMap, path: str, codec: str) -> None:
+    riskMap._writtenState = None
+    riskMap.saveToRsk(path, codec=codec)
+
+
+def measure(title: str, riskMap: RiskMap, directory: str, repeat: int) -> None:
+    expected = rowValues(riskMap)
+    path = os.path.join(directory, "codec.rsk")
+    print(f"{title}, строк: {len(riskMap.table)}")
+    baseSize = None
+    for codec in CODECS:
+        saveTime = min(timeit.repeat(lambda: rewrite(riskMap, path, codec), number=1, repeat=repeat))
+        loadTime = min(timeit.repeat(lambda: RiskMap.loadFromRsk(path), number=1, repeat=repeat))
+        size = os.path.getsize(path)
+        baseSize = baseSize or size
+        same = rowValues(RiskMap.loadFromRsk(path)) == expected
+        print(f"  {codec:<8}{' *' if codec == DEFAULT_CODEC else '  '} {size / 1024:9.1f} КБ ({size / baseSize:6.1%}), "
+              f"запись {saveTime * 1e3:8.2f} мс, чтение {loadTime * 1e3:8.2f} мс{'' if same else ', ДАННЫЕ НЕ СОВПАДАЮТ'}")
+    os.remove(path)
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.rskCodecs", description="Сравнение кодеков сжатия .rsk")
+    parser.add_argument("maps", nargs="*", help="файлы .rsk или папки с настоящими картами")
+    parser.add_argument("--dir", default=None, help="папка для записи файлов (например, сетевая), по умолчанию временная")
+    parser.add_argument("--repeat", type=int, default=5, help="число повторов, берётся лучшее время")
+    args = parser.parse_args(argv)
+    print(f"* - кодек по умолчанию ({DEFAULT_CODEC})")
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        for rows in (1000, 10_000):
+            measure("Синтетическая карта", syntheticMap(rows), tmp, args.repeat)
+        for root in args.maps:
+            for path in findRskFiles(root):
+                riskMap = RiskMap.loadFromRsk(str(path))
+                if riskMap is not None:
+                    measure(str(path), riskMap, tmp, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
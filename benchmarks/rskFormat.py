@@ -0,0 +1,49 @@
+"""
+Бенчмарк формата .rsk v2 против v1 на картах из 1000 строк: размер файла, время saveToRsk и loadFromRsk.
+
+v1 с текстами - исходный формат с полными текстами опасностей и событий в каждой строке,
+v1 с ID - строки-объекты с идентификаторами справочника, v2 - компактный документ со строками-массивами.
+Каждый вариант сохраняется со сжатием gzip и без него; загруженная карта сверяется с исходной.
+
+Запуск: python -m benchmarks.rskFormat [строк]
+"""
+import os, sys, tempfile, timeit
+from src.backend.riskMap import RiskMap
+from src.backend.rskStream import orjsonModule
+from tests.fixtures import syntheticMap
+
+VARIANTS = (
+    ("v1 с текстами", {"storeIds": False, "version": 1}),
+    ("v1 с ID", {"version": 1}),
+    ("v2", {"version": 2}),
+)
+
+
+def rowValues(riskMap: RiskMap) -> list[tuple]:
+    return [(r.dangerKey, r.event, r.damagePts, r.susceptibilityPts, r.probabilityPts, r.weight, r.rating) for r in riskMap.table]
+
+
+# Сохранение с записью файла: повторное сохранение неизменённой карты saveToRsk пропускает
+def rewrite(riskMap: RiskMap, path: str, **options) -> None:
+    riskMap._writtenState = None
+    riskMap.saveToRsk(path, **options)
+
+
+def main(rows: int = 1000, repeat: int = 5) -> None:
+    riskMap = syntheticMap(rows)
+    expected = rowValues(riskMap)
+    print(f"Строк: {rows}, JSON при записи v2: {'orjson' if orjsonModule() else 'json'}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for compressed in (True, False):
+            print("Со сжатием gzip:" if compressed else "Без сжатия:")
+            for title, options in VARIANTS:
+                path = os.path.join(tmp, "map.rsk")
+                saveTime = min(timeit.repeat(lambda: rewrite(riskMap, path, compressed=compressed, **options), number=1, repeat=repeat))
+                loadTime = min(timeit.repeat(lambda: RiskMap.loadFromRsk(path), number=1, repeat=repeat))
+                same = rowValues(RiskMap.loadFromRsk(path)) == expected
+                print(f"  {title:<14} {os.path.getsize(path) / 1024:8.1f} КБ, запись {saveTime * 1e3:7.2f} мс, "
+                      f"чтение {loadTime * 1e3:7.2f} мс{'' if same else ', ДАННЫЕ НЕ СОВПАДАЮТ'}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
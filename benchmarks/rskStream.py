@@ -0,0 +1,62 @@
+"""
+Бенчмарк потоковой загрузки .rsk (RiskMapLoader) против чтения всего документа json.load на 10 000 и 100 000 строк.
+
+Измеряются пиковая память разбора файла (tracemalloc) - целиком и пачками по chunkSize строк без сохранения
+строк, - время до появления полей карты (RiskMapLoader.open) и полное время загрузки.
+Строки берут опасности из справочника: словарь текстов "strings" в заголовке файла растёт с числом
+различных опасностей и событий, а не строк, поэтому пик потокового чтения от размера файла не зависит.
+
+Запуск: python -m benchmarks.rskStream [строк ...]
+"""
+import gc, json, os, sys, tempfile, time, tracemalloc
+from src.backend.riskMap import RiskMap, RiskMapLoader
+from src.backend.rskStream import RskReader, openRskText
+from tests.fixtures import syntheticMap
+
+
+def peak(action) -> int:
+    gc.collect()
+    tracemalloc.start()
+    action()
+    size = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size
+
+
+def readAll(path: str) -> None:
+    f, _ = openRskText(path)
+    with f:
+        json.load(f)
+
+
+def readChunks(path: str, chunkSize: int) -> None:
+    with RskReader(path) as reader:
+        while reader.hasRows:
+            reader.readRows(chunkSize)
+
+
+def elapsed(action) -> float:
+    start = time.perf_counter()
+    action()
+    return time.perf_counter() - start
+
+
+def main(sizes: tuple[int, ...] = (10_000, 100_000), chunkSize: int = RiskMapLoader.DEFAULT_CHUNK_SIZE) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            path = os.path.join(tmp, f"map{rows}.rsk")
+            syntheticMap(rows).saveToRsk(path)
+            fullPeak = peak(lambda: readAll(path))
+            streamPeak = peak(lambda: readChunks(path, chunkSize))
+            headerTime = elapsed(lambda: RiskMapLoader.open(path, chunkSize=chunkSize).close())
+            fullTime = elapsed(lambda: RiskMap.loadFromRsk(path))
+
+            print(f"Строк: {rows}, файл {os.path.getsize(path) / 1024:.0f} КБ")
+            print(f"  Пик памяти, json.load:       {fullPeak / 1024:9.0f} КБ")
+            print(f"  Пик памяти, пачки по {chunkSize:<5}: {streamPeak / 1024:9.0f} КБ")
+            print(f"  Поля карты доступны через:   {headerTime * 1e3:9.2f} мс")
+            print(f"  Полная загрузка:             {fullTime * 1e3:9.2f} мс")
+
+
+if __name__ == '__main__':
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (10_000, 100_000))
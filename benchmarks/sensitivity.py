@@ -0,0 +1,55 @@
+"""
+Бенчмарк анализа чувствительности analyzeSensitivity на карте из 1000 уникальных строк.
+
+Строки получают собственные опасности вне справочника, поэтому calculate() не схлопывает их
+как повторы. Для проверки несколько лучших вариантов применяются к копии карты и пересчитываются calculate().
+
+Запуск: python -m benchmarks.sensitivity
+"""
+import copy
+import random
+import timeit
+from src.backend.database import database as db
+from src.backend.riskMap import Record, RiskMap
+from src.backend.sensitivity import analyzeSensitivity
+
+
+def makeMap(rows: int, seed: int = 1) -> RiskMap:
+    rng = random.Random(seed)
+    riskMap = RiskMap()
+    event = db.internEvent("Событие")
+    for i in range(rows):
+        record = Record()
+        record._dangerId = db.internDanger(str(i + 1), f"Опасность {i + 1}")
+        record._eventId = event
+        record._damagePts, record._susceptibilityPts, record._probabilityPts = (rng.randint(1, 5) for _ in range(3))
+        riskMap.table.append(record)
+    return riskMap
+
+
+def verify(riskMap: RiskMap, report: list[dict]) -> int:
+    mismatches = 0
+    for entry in report:
+        other = copy.deepcopy(riskMap)
+        record = other.table[entry["row"]]
+        record._damagePts = entry["damagePts"][1]
+        record._susceptibilityPts = entry["susceptibilityPts"][1]
+        record._probabilityPts = entry["probabilityPts"][1]
+        other.calculate(updateMethods=False)
+        mismatches += (other.profRisk, other.result, other.resultStr) != (entry["profRisk"], entry["result"], entry["resultStr"])
+    return mismatches
+
+
+def main(rows: int = 1000, repeat: int = 5) -> None:
+    riskMap = makeMap(rows)
+    report = analyzeSensitivity(riskMap, limit=5)
+    best = min(timeit.repeat(lambda: analyzeSensitivity(riskMap, limit=20), repeat=repeat, number=1))
+    full = min(timeit.repeat(lambda: analyzeSensitivity(riskMap, limit=None, bestPerRow=False), repeat=repeat, number=1))
+    print(f"Строк: {rows}, сочетаний: {rows * 125}")
+    print(f"Лучшие 20 вариантов:     {best * 1e3:8.1f} мс")
+    print(f"Все снижающие варианты:  {full * 1e3:8.1f} мс")
+    print(f"Расхождений с calculate() у 5 лучших: {verify(riskMap, report)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+"""
+Бенчмарк моделирования Монте-Карло simulateUncertainty: выборок в секунду на картах разного размера.
+
+Запуск: python -m benchmarks.uncertainty
+"""
+import time
+from benchmarks.sensitivity import makeMap
+from src.backend.uncertainty import simulateUncertainty
+
+
+def main(samples: int = 1_000_000, seed: int = 1) -> None:
+    for rows in (10, 30, 100):
+        riskMap = makeMap(rows, seed=seed)
+        start = time.perf_counter()
+        report = simulateUncertainty(riskMap, samples=samples, seed=seed)
+        elapsed = time.perf_counter() - start
+        probabilities = ", ".join(f"{name} {p:.3f}" for name, p in report["probabilities"].items())
+        low, high = report["result"]["interval"]
+        print(f"{rows:4d} строк: {samples / elapsed:12,.0f} выборок/с; {probabilities}; result 95%: {low}..{high}")
+
+
+if __name__ == '__main__':
+    main()
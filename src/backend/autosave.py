@@ -0,0 +1,78 @@
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Optional
+from .riskMap import RiskMap
+from .rskStream import DEFAULT_CODEC, FORMAT_VERSION, encodeRsk, writeFileAtomic
+
+
+def _writeSnapshot(path: str, snapshot: dict, codec: str) -> None:
+    writeFileAtomic(path, encodeRsk(snapshot, codec))
+
+
+class BackgroundSaver:
+#   Фоновое автосохранение карт. В вызывающем (GUI) потоке снимается только снимок карты (rskSnapshot),
+#   сериализация, сжатие и атомарная запись выполняются в рабочем потоке. Один рабочий поток сохраняет
+#   файлы в порядке постановки, поэтому более старый снимок не перезапишет более новый.
+#   Результаты применяются в вызывающем потоке методом collect: записанный отпечаток содержимого
+#   (RiskMap.fingerprint) становится сохранённым, если путь сохранения тот же, - признак изменения снимается,
+#   только если с момента снимка содержимое карты не изменилось
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autosave")
+        self._pending: list[tuple[RiskMap, str, int, str, Future], ...] = []
+
+    def submit(self, riskMap: RiskMap, compressed: bool = True, codec: str = None) -> bool:
+        """
+        Ставит в очередь сохранение изменённой карты с путём сохранения
+        :param riskMap: карта
+        :param compressed: сжать кодеком по умолчанию (rskStream.DEFAULT_CODEC)
+        :param codec: кодек сжатия, как в RiskMap.saveToRsk
+        :return: True, если сохранение поставлено в очередь
+        """
+        codec = codec or (DEFAULT_CODEC if compressed else "none")
+        if not riskMap.isModified or not riskMap.savePath:
+            return False
+        path: str = riskMap.savePath
+        fingerprint: int = riskMap.fingerprint
+        # Снимок того же содержимого карты уже сохраняется
+        if any(pending[0] is riskMap and pending[1] == path and pending[2] == fingerprint for pending in self._pending):
+            return False
+        snapshot: dict = riskMap.rskSnapshot()
+        future: Future = self._executor.submit(_writeSnapshot, path, snapshot, codec)
+        self._pending.append((riskMap, path, fingerprint, codec, future))
+        return True
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._pending)
+
+    def collect(self) -> list[tuple[RiskMap, str, Exception], ...]:
+        """
+        Применяет завершённые сохранения
+        :return: карты, путь и ошибка для сохранений, завершившихся ошибкой
+        """
+        errors: list[tuple[RiskMap, str, Exception], ...] = []
+        pending: list[tuple[RiskMap, str, int, str, Future], ...] = []
+        for riskMap, path, fingerprint, codec, future in self._pending:
+            if not future.done():
+                pending.append((riskMap, path, fingerprint, codec, future))
+                continue
+            error: Optional[BaseException] = future.exception()
+            if error is not None:
+                errors.append((riskMap, path, error))
+            elif riskMap.savePath == path:
+                riskMap.markWritten(path, fingerprint, (None, codec, True, FORMAT_VERSION))
+        self._pending = pending
+        return errors
+
+    def wait(self, riskMap: RiskMap = None) -> list[tuple[RiskMap, str, Exception], ...]:
+        """
+        Дожидается сохранений карты riskMap (всех карт, если не задана) - например, перед явным сохранением,
+        чтобы фоновая запись не заменила файл после него
+        :param riskMap: карта
+        :return: ошибки, как у collect
+        """
+        wait([future for pendingMap, _, _, _, future in self._pending if riskMap is None or pendingMap is riskMap])
+        return self.collect()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.collect()
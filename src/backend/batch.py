@@ -0,0 +1,173 @@
+import argparse, os, sys, time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Optional, Union
+from .riskMap import RiskMap
+
+# Поля карты, изменения которых попадают в отчёт пересчёта
+_SUMMARY_FIELDS = ("rows", "profRisk", "result", "resultStr")
+_CALC_ERRORS = {-1: "нет данных для расчета", 0: "не все обязательные поля заполнены"}
+
+
+def findRskFiles(root: Union[str, Path]) -> list[Path]:
+    root = Path(root)
+    if root.is_file():
+        return [root] if root.suffix.lower() == ".rsk" else []
+    files: list[Path] = []
+    for directory, _, names in os.walk(root):
+        files.extend(Path(directory) / name for name in names if name.lower().endswith(".rsk"))
+    return sorted(files)
+
+
+def _summarize(riskMap: RiskMap) -> dict:
+    return {
+        "rows": len(riskMap.table),
+        "profRisk": riskMap.profRisk,
+        "result": riskMap.result,
+        "resultStr": riskMap.resultStr,
+        "methods": list(riskMap.methods or ()),
+        # Значения строк по порядку: пересчёт может изменить вес, риск, рейтинг и порядок строк
+        "values": [(record._dangerId, record._eventId, record.weight, record.identifiedDangersRisks, record.rating)
+                   for record in riskMap.table],
+    }
+
+
+def recalcFile(path: Union[str, Path], dryRun: bool = False) -> dict:
+    """
+    Пересчёт одной карты: loadFromRsk -> calculate -> saveToRsk.
+
+    Изменилась ли карта, определяет отпечаток её содержимого (RiskMap.isModified): файл перезаписывается
+    при любом отличии, в том числе при устаревшем тексте методики той же длины списка.
+    Любая ошибка остаётся в результате этого файла и не прерывает обработку остальных
+    :param path: путь к файлу .rsk
+    :param dryRun: только сравнить результаты, файл не перезаписывается
+    :return: словарь с путём, статусом ("changed", "unchanged", "skipped", "error") и изменениями
+    """
+    path = str(path)
+    try:
+        riskMap = RiskMap.loadFromRsk(path)
+        if riskMap is None:
+            return {"path": path, "status": "error", "error": "файл не найден или не является картой .rsk"}
+        before = _summarize(riskMap)
+        code = riskMap.calculate()
+        if code != 1:
+            return {"path": path, "status": "skipped", "error": _CALC_ERRORS[code]}
+        after = _summarize(riskMap)
+        changes = {field: (before[field], after[field]) for field in _SUMMARY_FIELDS if before[field] != after[field]}
+        if before["methods"] != after["methods"]:
+            changes["methods"] = sum(method not in after["methods"] for method in before["methods"]) \
+                                 + sum(method not in before["methods"] for method in after["methods"])
+        if len(before["values"]) == len(after["values"]):
+            changedRows = sum(old != new for old, new in zip(before["values"], after["values"]))
+            if changedRows:
+                changes["values"] = changedRows
+        modified = riskMap.isModified
+        if modified and not changes:
+            changes["content"] = True
+        if modified and not dryRun:
+            riskMap.saveToRsk(path)
+        return {"path": path, "status": "changed" if modified else "unchanged", "changes": changes}
+    except Exception as e:
+        return {"path": path, "status": "error", "error": f"{type(e).__name__}: {e}"}
+
+
+def _recalcChunk(paths: list[str], dryRun: bool) -> list[dict]:
+    return [recalcFile(path, dryRun) for path in paths]
+
+
+def formatResult(result: dict) -> str:
+    if result["status"] in ("error", "skipped"):
+        return f"{result['path']}: {'ошибка' if result['status'] == 'error' else 'пропущен'} - {result['error']}"
+    if result["status"] == "unchanged":
+        return f"{result['path']}: без изменений"
+    parts = []
+    for field, change in result["changes"].items():
+        if field == "values":
+            parts.append(f"изменены значения или порядок строк: {change}")
+        elif field == "methods":
+            parts.append(f"изменён список методик (различающихся методик: {change})" if change
+                         else "изменён порядок методик")
+        elif field == "content":
+            parts.append("изменено содержимое карты")
+        else:
+            parts.append(f"{field}: {change[0]} -> {change[1]}")
+    return f"{result['path']}: " + "; ".join(parts)
+
+
+def recalcDirectory(root: Union[str, Path], dryRun: bool = False, workers: Optional[int] = None,
+                    chunkSize: Optional[int] = None, report: Optional[Callable[[dict], None]] = None) -> dict:
+    """
+    Пересчёт всех карт .rsk в папке (рекурсивно) в пуле процессов.
+
+    Файлы раздаются процессам пачками по chunkSize, чтобы накладные расходы на передачу задач
+    не превышали время пересчёта небольших карт. Падение процесса пула отмечается ошибкой
+    только для файлов его пачки
+    :param root: папка с картами или путь к одному файлу
+    :param dryRun: только отчёт о расхождениях, без записи файлов
+    :param workers: число процессов, по умолчанию - число ядер
+    :param chunkSize: размер пачки, по умолчанию подбирается по числу файлов и процессов
+    :param report: вызывается для результата каждого файла по мере готовности
+    :return: сводка: число файлов по статусам, время и скорость обработки
+    """
+    files = [str(path) for path in findRskFiles(root)]
+    workers = workers or os.cpu_count() or 1
+    if chunkSize is None:
+        chunkSize = max(1, min(64, len(files) // (workers * 4)))
+    chunks = [files[i:i + chunkSize] for i in range(0, len(files), chunkSize)]
+    counts = {"changed": 0, "unchanged": 0, "skipped": 0, "error": 0}
+    start = time.perf_counter()
+
+    def collect(results: list[dict]) -> None:
+        for result in results:
+            counts[result["status"]] += 1
+            if report is not None:
+                report(result)
+
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            collect(_recalcChunk(chunk, dryRun))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures: dict[Future, list[str]] = {pool.submit(_recalcChunk, chunk, dryRun): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                try:
+                    results = future.result()
+                except Exception as e:
+                    results = [{"path": path, "status": "error", "error": f"{type(e).__name__}: {e}"}
+                               for path in futures[future]]
+                collect(results)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "files": len(files),
+        **counts,
+        "seconds": elapsed,
+        "filesPerSecond": len(files) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.backend.batch", description="Пакетная обработка карт .rsk")
+    commands = parser.add_subparsers(dest="command", required=True)
+    recalc = commands.add_parser("recalc", help="пересчитать все карты в папке")
+    recalc.add_argument("dir", help="папка с картами .rsk (обходится рекурсивно)")
+    recalc.add_argument("--dry-run", action="store_true", help="только показать расхождения, не перезаписывать файлы")
+    recalc.add_argument("--workers", type=int, default=None, help="число процессов (по умолчанию - число ядер)")
+    recalc.add_argument("--chunk-size", type=int, default=None, help="число файлов в одной задаче процесса")
+    recalc.add_argument("--quiet", action="store_true", help="не выводить файлы без изменений")
+    args = parser.parse_args(argv)
+
+    def report(result: dict) -> None:
+        if not (args.quiet and result["status"] == "unchanged"):
+            print(formatResult(result))
+
+    summary = recalcDirectory(args.dir, dryRun=args.dry_run, workers=args.workers, chunkSize=args.chunk_size, report=report)
+    print(f"Файлов: {summary['files']}, изменено: {summary['changed']}, без изменений: {summary['unchanged']}, "
+          f"пропущено: {summary['skipped']}, ошибок: {summary['error']}"
+          f"{' (пробный запуск, файлы не изменены)' if args.dry_run else ''}")
+    print(f"Время: {summary['seconds']:.2f} с, {summary['filesPerSecond']:.1f} файлов/с")
+    return 1 if summary["error"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,178 @@
+import numpy as np
+from operator import attrgetter
+from typing import Iterable
+from .database import database as db
+from .riskMap import RunningTotals, Table
+from .scoring import RATINGS, hundredthsRow, resultName
+
+
+def _hundredthsTable(weightSums: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # Таблица сотых scoring.hundredthsRow для каждого встречающегося weightSum и номер её столбца для каждой карты
+    unique, inverse = np.unique(weightSums, return_inverse=True)
+    table = np.array([hundredthsRow(int(ws)) for ws in unique.tolist()], dtype=np.int64).T
+    return table, inverse
+
+
+_ROW_FIELDS = attrgetter("_dangerId", "_eventId", "_damagePts", "_susceptibilityPts", "_probabilityPts")
+
+
+def calculateMany(tables: Iterable[Table], updateMethods: bool = True) -> list[int]:
+    """
+    Пакетный расчёт многих карт: то же, что Table.calculate для каждой карты, но арифметика по строкам
+    выполняется над общими массивами NumPy со смещениями карт.
+
+    Баллы всех вычисляемых карт упаковываются в один массив, weightSum считается сегментной суммой
+    np.add.reduceat, веса, риски и рейтинги строк - векторно по таблицам сотых из scoring. profRisk - сегментная
+    сумма рисков в целых сотых: сумма округлённых до сотых рисков в calculate() после round(..., 2) даёт то же число.
+    Результаты записываются обратно в записи и карты и побитово совпадают с calculate()
+    :param tables: карты (Table или RiskMap)
+    :param updateMethods: формировать список методик, как calculate(updateMethods=True)
+    :return: коды calculate() для каждой карты: -1 - пустая, 0 - есть незаполненные строки, 1 - вычислена
+    """
+    tables = list(tables)
+    # Каждая карта сообщает подписчикам об изменениях одним событием после расчёта. Счётчик вложенности batch()
+    # увеличивается напрямую: контекстный менеджер на каждую карту стоил бы дороже самого расчёта
+    for table in tables:
+        table._batchDepth += 1
+    try:
+        return _calculateBatched(tables, updateMethods)
+    finally:
+        for table in tables:
+            table._batchDepth -= 1
+            if not table._batchDepth:
+                table._flushChanges()
+
+
+def _pack(tables: list[Table]) -> np.ndarray:
+    # Идентификаторы и баллы всех строк подряд по картам: столбцы dangerId, eventId, D, S, P; None -> NaN
+    rows = [_ROW_FIELDS(record) for table in tables for record in table.table]
+    return np.array(rows, dtype=np.float64).reshape(-1, 5)
+
+
+def _dangerRanks(dangerIds: np.ndarray) -> np.ndarray:
+    # Место каждой строки в порядке сортировки calculate() - по номеру и описанию опасности
+    unique, inverse = np.unique(dangerIds, return_inverse=True)
+    dangerParts = db.dangerParts
+    keys = [dangerParts(dangerId) for dangerId in unique.tolist()]
+    order = sorted(range(len(keys)), key=lambda i: (int(keys[i][0]), keys[i][1]))
+    ranks = np.empty(len(keys), dtype=np.int64)
+    ranks[order] = np.arange(len(keys))
+    return ranks[inverse]
+
+
+def _prepareBatched(tables: list[Table], statuses: list[int]) -> tuple[list[Table], np.ndarray, np.ndarray]:
+    """
+    Подготовка карт к расчёту, как Table._prepareCalculation, по упакованным массивам всех карт сразу:
+    пустые и незаполненные строки, повторы пар (опасность, событие) и порядок строк определяются векторно.
+    Карты с пустыми или незаполненными строками и таблицы с собственной подготовкой (столбцовые) подготавливаются
+    по одной через _prepareCalculation - в пакетах карт из файлов это исключения
+    :param statuses: коды calculate() карт, заполняются на месте
+    :return: готовые к расчёту карты, их строки (dangerId, eventId, D, S, P) подряд и число строк каждой карты
+    """
+    plainIndices: list[int, ...] = []
+    slow: list[int, ...] = []
+    for i, table in enumerate(tables):
+        (plainIndices if type(table)._prepareCalculation is Table._prepareCalculation else slow).append(i)
+    plain = [tables[i] for i in plainIndices]
+    lengths = np.fromiter((len(table.table) for table in plain), dtype=np.int64, count=len(plain))
+    packed = _pack(plain)
+    rowMaps = np.repeat(np.arange(len(plain)), lengths)
+    incomplete = np.zeros(len(plain), dtype=bool)
+    incomplete[rowMaps[np.isnan(packed).any(axis=1)]] = True
+    slow.extend(plainIndices[i] for i in np.flatnonzero(incomplete).tolist())
+    for i in slow:
+        statuses[i] = tables[i]._prepareCalculation()
+
+    # Остальные карты заполнены целиком. В каждой остаются первые строки пар (опасность, событие),
+    # затем строки устойчиво сортируются по опасности
+    fast = ~incomplete[rowMaps]
+    rows = packed[fast].astype(np.int64)
+    rowMaps = rowMaps[fast]
+    localRows = (np.arange(len(packed)) - np.repeat(np.cumsum(lengths) - lengths, lengths))[fast]
+    dangerSpan, eventSpan = int(rows[:, 0].max(initial=0)) + 1, int(rows[:, 1].max(initial=0)) + 1
+    _, first = np.unique((rowMaps * dangerSpan + rows[:, 0]) * eventSpan + rows[:, 1], return_index=True)
+    keep = np.zeros(len(rows), dtype=bool)
+    keep[first] = True
+    rows, rowMaps, localRows = rows[keep], rowMaps[keep], localRows[keep]
+    order = np.lexsort((localRows, _dangerRanks(rows[:, 0]), rowMaps))
+    rows, rowMaps, localRows = rows[order], rowMaps[order], localRows[order]
+
+    counts = np.bincount(rowMaps, minlength=len(plain))
+    starts = np.zeros(len(plain) + 1, dtype=np.int64)
+    np.cumsum(counts, out=starts[1:])
+    # Карты, в которых удалены повторы или изменился порядок строк
+    moved = counts != lengths
+    moved[rowMaps[localRows != np.arange(len(rows)) - starts[rowMaps]]] = True
+    ready: list[Table] = []
+    for i in np.flatnonzero(~incomplete).tolist():
+        table = plain[i]
+        table._markModified()
+        if not lengths[i]:
+            statuses[plainIndices[i]] = -1
+            continue
+        if moved[i]:
+            kept: list[int, ...] = localRows[starts[i]:starts[i + 1]].tolist()
+            records = table.table
+            table.table = [records[row] for row in kept]
+            table._rowsReordered(kept, len(records))
+            if table._totals is not None:
+                table._totals = RunningTotals(table.table)
+        statuses[plainIndices[i]] = 1
+        ready.append(table)
+
+    readyLengths: list[int, ...] = counts[counts > 0].tolist()
+    prepared = [tables[i] for i in slow if statuses[i] == 1]
+    if prepared:
+        ready.extend(prepared)
+        readyLengths.extend(len(table.table) for table in prepared)
+        rows = np.concatenate((rows, _pack(prepared).astype(np.int64)))
+    return ready, rows, np.array(readyLengths, dtype=np.int64)
+
+
+def _calculateBatched(tables: list[Table], updateMethods: bool) -> list[int]:
+    statuses = [0] * len(tables)
+    ready, rows, lengths = _prepareBatched(tables, statuses)
+    if not ready:
+        return statuses
+
+    offsets = np.zeros(len(ready) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    damage, susceptibility, probability = rows[:, 2], rows[:, 3], rows[:, 4]
+
+    weightSums = np.add.reduceat(probability, offsets[:-1])
+    riskTable, columns = _hundredthsTable(weightSums)
+    rowColumns = np.repeat(columns, lengths)
+    rowWeightSums = np.repeat(weightSums, lengths)
+    products = damage * susceptibility * probability
+    riskHundredths = riskTable[products, rowColumns]
+    weights = (riskTable[probability, rowColumns] / 100).tolist()
+    risks = (riskHundredths / 100).tolist()
+    # Целочисленные пороги рейтинга scoring.ratingIndex
+    ratingCodes = np.where(200 * products < 181 * rowWeightSums, 0, np.where(200 * products <= 361 * rowWeightSums, 1, 2))
+    ratings = ratingCodes.tolist()
+    profHundredths = np.add.reduceat(riskHundredths, offsets[:-1]).tolist()
+
+    # Маски мер методик: только строки с умеренным и высоким рейтингом, как в Table.fillMethods
+    methodBits = [0] * len(ready)
+    if updateMethods:
+        measureBits = db.measureBits
+        flagged = np.flatnonzero(ratingCodes > 0)
+        flaggedMaps = (np.searchsorted(offsets, flagged, side="right") - 1).tolist()
+        for i, dangerId, eventId in zip(flaggedMaps, rows[flagged, 0].tolist(), rows[flagged, 1].tolist()):
+            methodBits[i] |= measureBits(dangerId, eventId)
+
+    for i, riskMap in enumerate(ready):
+        start, end = int(offsets[i]), int(offsets[i + 1])
+        for record, weight, risk, rating in zip(riskMap.table, weights[start:end], risks[start:end], ratings[start:end]):
+            record._weight = weight
+            record._identifiedDangersRisks = risk
+            record._rating = RATINGS[rating]
+        riskMap._markAllRecordsModified("weight", "identifiedDangersRisks", "rating")
+        riskMap._weightSum = int(weightSums[i])
+        riskMap._profRisk = round(profHundredths[i] / 100, 2)
+        riskMap._result = round(riskMap._kFactor + riskMap._profRisk, 2)
+        riskMap._resultStr = resultName(riskMap._result)
+        if updateMethods:
+            riskMap._setMethods(db.measureTexts(methodBits[i]))
+        riskMap._markModified("weightSum", "profRisk", "result", "resultStr")
+    return statuses
@@ -0,0 +1,120 @@
+import multiprocessing, os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from threading import Event, Lock
+from typing import Optional
+from .riskMap import RiskMap
+from .rskStream import readRskColumns
+
+
+def _buildMap(mapClass: type, path: str, parsed: Future) -> RiskMap:
+    return mapClass.fromRskDocument(path, parsed.result())
+
+
+# Без пула процессов: документ целиком с перекладкой в столбцы быстрее потоковой загрузки loadFromRsk
+def _readMap(mapClass: type, path: str) -> RiskMap:
+    return mapClass.fromRskDocument(path, readRskColumns(path))
+
+
+class BulkOpener:
+#   Параллельное открытие многих файлов .rsk. Распаковка, разбор JSON и перекладка строк в столбцы (readRskColumns)
+#   не зависят от справочника и выполняются в пуле процессов, по файлу на задачу, поэтому масштабируются по числу ядер.
+#   Карты из разобранных документов строятся в одном фоновом потоке этого процесса: идентификаторы опасностей
+#   и событий - индексы пулов строк справочника процесса, и передать готовую карту из другого процесса нельзя.
+#   Поэтому построение сведено к разрешению каждого идентификатора один раз и заполнению записей по столбцам.
+#   Вызывающий (GUI) поток только забирает готовые карты методом collect в порядке готовности.
+#   Для одного файла или workers=1 пул процессов не создаётся, разбор идёт в том же фоновом потоке
+    def __init__(self, paths: list[str, ...], workers: Optional[int] = None, mapClass: type = RiskMap):
+        self.paths: list[str, ...] = list(paths)
+        self.total: int = len(self.paths)
+        self.finished: int = 0
+        workers = min(workers or os.cpu_count() or 1, self.total) or 1
+        # Процессы запускаются через spawn: fork копировал бы процесс с уже работающими потоками
+        # (загрузка справочника, автосохранение) вместе с захваченными ими блокировками
+        self._parser: Optional[Executor] = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")) if workers > 1 else None
+        self._builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bulkOpen")
+        self._lock = Lock()
+        self._ready: list[tuple[str, Optional[RiskMap], Optional[BaseException]], ...] = []
+        # Каждый файл сообщается в _built ровно один раз - картой, ошибкой или отменой
+        self._reported: int = 0
+        self._allReported = Event()
+        if not self.total:
+            self._allReported.set()
+        self._cancelled = False
+        for path in self.paths:
+            if self._parser is not None:
+                parsed: Future = self._parser.submit(readRskColumns, path)
+                parsed.add_done_callback(lambda parsed, path=path: self._parsed(mapClass, path, parsed))
+            else:
+                self._builder.submit(_readMap, mapClass, path).add_done_callback(
+                    lambda built, path=path: self._built(path, built))
+
+    # Вызывается в служебном потоке пула процессов
+    def _parsed(self, mapClass: type, path: str, parsed: Future) -> None:
+        if self._cancelled or parsed.cancelled():
+            self._built(path, None)
+            return
+        try:
+            self._builder.submit(_buildMap, mapClass, path, parsed).add_done_callback(
+                lambda built: self._built(path, built))
+        except RuntimeError:
+            # Поток построения уже остановлен cancel()
+            self._built(path, None)
+
+    def _built(self, path: str, built: Optional[Future]) -> None:
+        if built is None or built.cancelled():
+            result = (path, None, None)
+        elif built.exception() is not None:
+            result = (path, None, built.exception())
+        else:
+            result = (path, built.result(), None)
+        with self._lock:
+            self._ready.append(result)
+            self._reported += 1
+            if self._reported == self.total:
+                self._allReported.set()
+
+    def collect(self) -> list[tuple[str, Optional[RiskMap], Optional[BaseException]], ...]:
+        """
+        Забирает карты, готовые с прошлого вызова
+        :return: путь, карта и ошибка для каждого файла; карта None - файл не прочитан (ошибка) или открытие отменено
+        """
+        with self._lock:
+            ready, self._ready = self._ready, []
+        self.finished += len(ready)
+        return ready
+
+    @property
+    def done(self) -> bool:
+        return self.finished >= self.total
+
+    def cancel(self) -> None:
+        """Отменяет ещё не начатые задачи; уже собранные карты можно забрать collect"""
+        self._cancelled = True
+        if self._parser is not None:
+            self._parser.shutdown(wait=False, cancel_futures=True)
+        self._builder.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        # После cancel() пулы уже остановлены без ожидания, и повторный shutdown пула процессов не ждёт
+        # разбора, начатого до отмены, - поэтому ожидается сообщение о каждом файле
+        self._allReported.wait()
+        if self._parser is not None:
+            self._parser.shutdown(wait=True)
+        self._builder.shutdown(wait=True)
+
+
+def openMany(paths: list[str, ...], workers: Optional[int] = None, mapClass: type = RiskMap) -> list[Optional[RiskMap], ...]:
+    """
+    Открывает файлы .rsk параллельно (BulkOpener) и дожидается всех
+    :param paths: пути к файлам
+    :param workers: число процессов разбора, по умолчанию - число ядер
+    :param mapClass: класс карты (RiskMap или ColumnarRiskMap)
+    :return: карты в порядке paths; None для файлов, которые не удалось прочитать
+    """
+    opener = BulkOpener(paths, workers, mapClass)
+    maps: dict[str, Optional[RiskMap]] = {}
+    opener.shutdown()
+    for path, riskMap, _ in opener.collect():
+        maps[path] = riskMap
+    return [maps.get(path) for path in paths]
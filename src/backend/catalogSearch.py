@@ -0,0 +1,166 @@
+import re
+from bisect import bisect_left, insort
+from functools import lru_cache
+from math import log
+from typing import Iterable, Optional
+
+# Окончания русских слов для упрощённого стемминга, сгруппированные по длине (от длинных к коротким)
+_ENDINGS = {
+    "иями", "ями", "ами", "ого", "его", "ому", "ему", "ыми", "ими", "ость", "ости", "ение", "ения", "ению",
+    "ением", "ании", "ание", "ания", "анию", "ых", "их", "ая", "яя", "ое", "ее", "ые", "ие", "ой", "ей", "ий", "ый",
+    "ом", "ем", "ам", "ям", "ах", "ях", "ов", "ев", "ую", "юю", "ия", "ии", "ию", "ть", "ся", "сь",
+    "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+}
+_ENDINGS_BY_LEN = tuple((length, frozenset(e for e in _ENDINGS if len(e) == length))
+                        for length in sorted({len(e) for e in _ENDINGS}, reverse=True))
+_MIN_STEM = 3
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    return text.lower().replace("ё", "е")
+
+
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    for length, endings in _ENDINGS_BY_LEN:
+        if len(token) - length >= _MIN_STEM and token[-length:] in endings:
+            return token[:-length]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    return [stem(token) for token in _TOKEN_RE.findall(normalize(text))]
+
+
+def queryTokens(query: str) -> list[tuple[str, bool]]:
+    """
+    Разбивает поисковый запрос на слова. Законченные слова стеммируются, а последнее слово, за которым ещё нет
+    пробела или знака, считается недописанным и остаётся как есть: его ищут как префикс целых слов, чтобы
+    выдача при наборе только сужалась (основа недописанного слова может быть короче основы дописанного).
+    Однобуквенные предлоги и союзы не сужают выдачу, кроме случая, когда это единственное введённое слово
+    :param query: строка запроса
+    :return: пары (слово или основа, True для недописанного слова)
+    """
+    text = normalize(query)
+    words = _TOKEN_RE.findall(text)
+    typing = bool(words) and _TOKEN_RE.match(text[-1]) is not None
+    tokens = [(stem(word), False) for word in words]
+    if typing:
+        tokens[-1] = (words[-1], True)
+    return [token for token in tokens if len(token[0]) > 1] or tokens[:1]
+
+
+class _KindIndex:
+#   Инвертированный индекс по одному виду записей справочника (опасности, события или меры).
+#   Основы слов и сами слова хранятся отсортированными: законченное слово ищется как префикс основ,
+#   недописанное - как префикс слов, оба через bisect.
+#   Удалённые записи остаются в texts как None, чтобы не сдвигать номера документов
+    def __init__(self, texts: Iterable[str]):
+        self.texts: list[Optional[str]] = list(dict.fromkeys(texts))
+        self.normTexts: list[Optional[str]] = [normalize(text) for text in self.texts]
+        self.docIds: dict[str, int] = {text: docId for docId, text in enumerate(self.texts)}
+        postings: dict[str, dict[int, int]] = {}
+        wordPostings: dict[str, dict[int, int]] = {}
+        for docId, text in enumerate(self.texts):
+            for word in _TOKEN_RE.findall(normalize(text)):
+                docs = postings.setdefault(stem(word), {})
+                docs[docId] = docs.get(docId, 0) + 1
+                docs = wordPostings.setdefault(word, {})
+                docs[docId] = docs.get(docId, 0) + 1
+        self.postings = postings
+        self.stems: list[str] = sorted(postings)
+        self.wordPostings = wordPostings
+        self.words: list[str] = sorted(wordPostings)
+
+    def add(self, text: str) -> None:
+        if text in self.docIds:
+            return
+        docId = len(self.texts)
+        self.texts.append(text)
+        self.normTexts.append(normalize(text))
+        self.docIds[text] = docId
+        for word in _TOKEN_RE.findall(self.normTexts[docId]):
+            for key, postings, keys in ((stem(word), self.postings, self.stems), (word, self.wordPostings, self.words)):
+                docs = postings.get(key)
+                if docs is None:
+                    docs = postings[key] = {}
+                    insort(keys, key)
+                docs[docId] = docs.get(docId, 0) + 1
+
+    def remove(self, text: str) -> None:
+        docId = self.docIds.pop(text, None)
+        if docId is None:
+            return
+        for word in set(_TOKEN_RE.findall(self.normTexts[docId])):
+            for key, postings, keys in ((stem(word), self.postings, self.stems), (word, self.wordPostings, self.words)):
+                docs = postings.get(key)
+                if docs is None:
+                    continue
+                docs.pop(docId, None)
+                if not docs:
+                    del postings[key]
+                    del keys[bisect_left(keys, key)]
+        self.texts[docId] = None
+        self.normTexts[docId] = None
+
+    def matchToken(self, token: str, typing: bool = False) -> dict[int, float]:
+        keys, postings = (self.words, self.wordPostings) if typing else (self.stems, self.postings)
+        scores: dict[int, float] = {}
+        total = max(len(self.docIds), 1)
+        i = bisect_left(keys, token)
+        while i < len(keys) and keys[i].startswith(token):
+            s = keys[i]
+            docs = postings[s]
+            weight = log(1.0 + total / len(docs)) * (1.0 if s == token else 0.7)
+            for docId in docs:
+                if scores.get(docId, 0.0) < weight:
+                    scores[docId] = weight
+            i += 1
+        return scores
+
+
+class CatalogSearchIndex:
+#   Полнотекстовый поиск по справочнику с ранжированием:
+#   нормализация (нижний регистр, ё -> е), упрощённый стемминг и префиксное совпадение основ.
+#   Запись попадает в выдачу, только если совпали все слова запроса.
+#   Совпадение начала текста с запросом поднимает запись выше, при равенстве сохраняется порядок справочника
+    KINDS = ("danger", "event", "measure")
+
+    def __init__(self, dangers: Iterable[str] = (), events: Iterable[str] = (), measures: Iterable[str] = ()):
+        self._kinds: dict[str, _KindIndex] = {
+            "danger": _KindIndex(dangers),
+            "event": _KindIndex(events),
+            "measure": _KindIndex(measures),
+        }
+
+    def add(self, kind: str, text: str) -> None:
+        self._kinds[kind].add(text)
+
+    def remove(self, kind: str, text: str) -> None:
+        self._kinds[kind].remove(text)
+
+    def search(self, query: str, kind: str = "danger", limit: Optional[int] = 50,
+               within: Optional[Iterable[str]] = None) -> list[str]:
+        index = self._kinds[kind]
+        allowed: Optional[set[int]] = None
+        if within is not None:
+            allowed = {index.docIds[text] for text in within if text in index.docIds}
+        tokens = queryTokens(query)
+        if not tokens:
+            docIds = sorted(index.docIds.values()) if allowed is None else sorted(allowed)
+            return [index.texts[docId] for docId in docIds][:limit]
+
+        scores: Optional[dict[int, float]] = None
+        for token, typing in tokens:
+            matched = index.matchToken(token, typing)
+            if scores is None:
+                scores = matched if allowed is None else {d: w for d, w in matched.items() if d in allowed}
+            else:
+                scores = {d: w + matched[d] for d, w in scores.items() if d in matched}
+            if not scores:
+                return []
+
+        normQuery = normalize(query).strip()
+        ranked = sorted(scores, key=lambda d: (not index.normTexts[d].startswith(normQuery), -scores[d], d))
+        return [index.texts[docId] for docId in ranked[:limit]]
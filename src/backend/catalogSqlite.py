@@ -0,0 +1,260 @@
+import argparse, hashlib, json, sqlite3, threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Union
+from .catalogSearch import normalize, queryTokens
+from .database import StringPool
+
+_SCHEMA = """
+CREATE TABLE meta(key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE dangers(id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, no TEXT NOT NULL, desc TEXT NOT NULL);
+CREATE TABLE events(id INTEGER PRIMARY KEY, text TEXT NOT NULL UNIQUE);
+CREATE TABLE measures(id INTEGER PRIMARY KEY, text TEXT NOT NULL UNIQUE);
+CREATE TABLE danger_events(
+    danger_id INTEGER NOT NULL REFERENCES dangers(id),
+    event_id INTEGER NOT NULL REFERENCES events(id),
+    position INTEGER NOT NULL,
+    PRIMARY KEY(danger_id, event_id)
+) WITHOUT ROWID;
+CREATE TABLE event_measures(
+    danger_id INTEGER NOT NULL,
+    event_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    measure_id INTEGER NOT NULL REFERENCES measures(id),
+    PRIMARY KEY(danger_id, event_id, position),
+    FOREIGN KEY(danger_id, event_id) REFERENCES danger_events(danger_id, event_id)
+) WITHOUT ROWID;
+CREATE INDEX dangers_no_desc ON dangers(no, desc);
+CREATE INDEX danger_events_event ON danger_events(event_id);
+CREATE INDEX event_measures_measure ON event_measures(measure_id);
+CREATE VIRTUAL TABLE catalog_fts USING fts5(norm, kind UNINDEXED, ref UNINDEXED, tokenize='unicode61');
+"""
+
+
+def convertJsonToSqlite(jsonPath: Union[str, Path], sqlitePath: Union[str, Path]) -> None:
+    """
+    Конвертирование справочника db.json в файл SQLite для SqliteCatalogBackend.
+
+    Идентификаторы опасностей, событий и мер совпадают с идентификаторами CatalogIndex для того же db.json,
+    поэтому файлы .rsk с идентификаторами читаются одинаково с обоими бэкендами
+    :param jsonPath: путь к справочнику в формате db.json
+    :param sqlitePath: путь к создаваемому файлу, существующий файл перезаписывается
+    """
+    with open(jsonPath, mode="rb") as f:
+        raw = f.read()
+    buildSqliteCatalog(json.loads(raw.decode("utf-8")), sqlitePath, hashlib.sha256(raw).hexdigest())
+
+
+def buildSqliteCatalog(database: dict, sqlitePath: Union[str, Path], digest: str = "") -> None:
+    sqlitePath = Path(sqlitePath)
+    if sqlitePath.exists():
+        sqlitePath.unlink()
+    dangers = StringPool(database.keys())
+    events = StringPool(event for entry in database.values() for event in entry["events"])
+    measures = StringPool(measure for entry in database.values() for items in entry["events"].values() for measure in items)
+    connection = sqlite3.connect(sqlitePath)
+    try:
+        with connection:
+            connection.executescript(_SCHEMA)
+            connection.execute("INSERT INTO meta VALUES ('hash', ?)", (digest,))
+            connection.executemany("INSERT INTO dangers VALUES (?, ?, ?, ?)",
+                                   ((dangers.ids[key], key, entry["No"], entry["desc"]) for key, entry in database.items()))
+            connection.executemany("INSERT INTO events VALUES (?, ?)", enumerate(events.texts))
+            connection.executemany("INSERT INTO measures VALUES (?, ?)", enumerate(measures.texts))
+            connection.executemany("INSERT INTO danger_events VALUES (?, ?, ?)", (
+                (dangers.ids[key], events.ids[event], position)
+                for key, entry in database.items() for position, event in enumerate(entry["events"])))
+            connection.executemany("INSERT INTO event_measures VALUES (?, ?, ?, ?)", (
+                (dangers.ids[key], events.ids[event], position, measures.ids[measure])
+                for key, entry in database.items() for event, items in entry["events"].items()
+                for position, measure in enumerate(items)))
+            for kind, pool in (("danger", dangers), ("event", events), ("measure", measures)):
+                connection.executemany("INSERT INTO catalog_fts(norm, kind, ref) VALUES (?, ?, ?)",
+                                       ((normalize(text), kind, textId) for textId, text in enumerate(pool.texts)))
+            connection.execute("INSERT INTO catalog_fts(catalog_fts) VALUES ('optimize')")
+    finally:
+        connection.close()
+
+
+class SqliteCatalogBackend:
+#   Бэкенд справочника на SQLite с полнотекстовым поиском FTS5 для больших справочников организаций.
+#   Реализует тот же интерфейс, что и DatabaseManager, но не держит справочник в памяти:
+#   точечные запросы идут по индексам, описания опасностей кэшируются LRU-кэшем.
+#   Опасности и события, которых нет в файле (из старых .rsk), интернируются в памяти с идентификаторами после справочных
+    def __init__(self, path: Union[str, Path], cacheSize: int = 4096):
+        self.path = Path(path)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._catalogHash: str = self._scalar("SELECT value FROM meta WHERE key = 'hash'") or ""
+        self._dangerCount: int = self._scalar("SELECT COUNT(*) FROM dangers")
+        self._eventCount: int = self._scalar("SELECT COUNT(*) FROM events")
+        self._foreignDangers = StringPool()
+        self._foreignDangerParts: list[tuple[str, str]] = []
+        self._foreignEvents = StringPool()
+        self.dangerParts = lru_cache(maxsize=cacheSize)(self._dangerParts)
+        self.dangerKey = lru_cache(maxsize=cacheSize)(self._dangerKey)
+        self.eventText = lru_cache(maxsize=cacheSize)(self._eventText)
+        self.measureBits = lru_cache(maxsize=cacheSize)(self._measureBits)
+        self._measureOrder: Optional[tuple[str, ...]] = None
+        self._measureRank: dict[int, int] = {}
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def _query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    def _scalar(self, sql: str, params: tuple = ()):
+        rows = self._query(sql, params)
+        return rows[0][0] if rows else None
+
+#======= Интерфейс DatabaseManager =======#
+    def getDangers(self) -> list:
+        return [row[0] for row in self._query("SELECT key FROM dangers ORDER BY id")]
+
+    def getDangerSubstats(self, danger: str) -> Optional[list[str, str]]:
+        no = self._scalar("SELECT no FROM dangers WHERE key = ?", (danger,))
+        return [no, danger] if no is not None else None
+
+    def getEvents(self, danger: Optional[str] = None) -> Optional[list[str, ...]]:
+        return [row[0] for row in self._query(
+            "SELECT e.text FROM dangers d JOIN danger_events de ON de.danger_id = d.id JOIN events e ON e.id = de.event_id "
+            "WHERE d.key = ? ORDER BY de.position", (danger,))]
+
+    def hasDanger(self, danger: Optional[str]) -> bool:
+        return self.dangerId(danger) is not None
+
+    def hasEvent(self, danger: Optional[str], event: Optional[str]) -> bool:
+        return self._scalar(
+            "SELECT 1 FROM dangers d JOIN danger_events de ON de.danger_id = d.id JOIN events e ON e.id = de.event_id "
+            "WHERE d.key = ? AND e.text = ?", (danger, event)) is not None
+
+    def getMeasures(self, danger: Optional[str], event: Optional[str]) -> tuple[str, ...]:
+        return tuple(row[0] for row in self._query(
+            "SELECT m.text FROM dangers d JOIN events e ON e.text = ? "
+            "JOIN event_measures em ON em.danger_id = d.id AND em.event_id = e.id JOIN measures m ON m.id = em.measure_id "
+            "WHERE d.key = ? ORDER BY em.position", (event, danger)))
+
+#   Порядок мер для битовых масок совпадает с CatalogIndex: сравнение BINARY в SQLite
+#   для UTF-8 упорядочивает строки так же, как сортировка строк в Python
+    def _loadMeasureOrder(self) -> None:
+        rows = self._query("SELECT id, text FROM measures ORDER BY text")
+        self._measureRank = {measureId: position for position, (measureId, _) in enumerate(rows)}
+        self._measureOrder = tuple(text for _, text in rows)
+
+    def _measureBits(self, dangerId: Optional[int], eventId: Optional[int]) -> int:
+        if self._measureOrder is None:
+            self._loadMeasureOrder()
+        bits = 0
+        for (measureId,) in self._query(
+                "SELECT measure_id FROM event_measures WHERE danger_id = ? AND event_id = ?", (dangerId, eventId)):
+            bits |= 1 << self._measureRank[measureId]
+        return bits
+
+    def measureTexts(self, bits: int) -> list[str]:
+        if self._measureOrder is None:
+            self._loadMeasureOrder()
+        texts: list[str] = []
+        while bits:
+            low = bits & -bits
+            texts.append(self._measureOrder[low.bit_length() - 1])
+            bits ^= low
+        return texts
+
+#   Слова запроса разбираются так же, как в CatalogSearchIndex (queryTokens): основы законченных слов
+#   и недописанное последнее слово целиком ищутся как префиксы в FTS5,
+#   выдача ранжируется по bm25
+    def search(self, query: str, kind: str = "danger", danger: Optional[str] = None, limit: Optional[int] = 50) -> list[str]:
+        table = {"danger": "dangers", "event": "events", "measure": "measures"}[kind]
+        column = "key" if kind == "danger" else "text"
+        tokens = queryTokens(query)
+        where, params = "", []
+        if kind == "event" and danger is not None:
+            where = " AND t.id IN (SELECT de.event_id FROM danger_events de JOIN dangers d ON d.id = de.danger_id WHERE d.key = ?)"
+            params.append(danger)
+        if not tokens:
+            return [row[0] for row in self._query(
+                f"SELECT t.{column} FROM {table} t WHERE 1 = 1{where} ORDER BY t.id LIMIT ?", (*params, limit if limit is not None else -1))]
+        match = " AND ".join('"' + token.replace('"', '""') + '"*' for token, _ in tokens)
+        normQuery = normalize(query).strip()
+        return [row[0] for row in self._query(
+            f"SELECT t.{column} FROM catalog_fts f JOIN {table} t ON t.id = f.ref "
+            f"WHERE catalog_fts MATCH ? AND f.kind = ?{where} "
+            f"ORDER BY substr(f.norm, 1, ?) != ?, bm25(catalog_fts), t.id LIMIT ?",
+            (match, kind, *params, len(normQuery), normQuery, limit if limit is not None else -1))]
+
+#======= Идентификаторы записей справочника =======#
+    @property
+    def catalogHash(self) -> str:
+        return self._catalogHash
+
+    def dangerId(self, danger: Optional[str]) -> Optional[int]:
+        return self._scalar("SELECT id FROM dangers WHERE key = ?", (danger,))
+
+    def _dangerKey(self, dangerId: Optional[int]) -> Optional[str]:
+        if dangerId is None:
+            return None
+        if dangerId >= self._dangerCount:
+            return self._foreignDangers.text(dangerId - self._dangerCount)
+        return self._scalar("SELECT key FROM dangers WHERE id = ?", (dangerId,))
+
+    def _dangerParts(self, dangerId: int) -> tuple[str, str]:
+        if dangerId >= self._dangerCount:
+            return self._foreignDangerParts[dangerId - self._dangerCount]
+        return self._query("SELECT no, desc FROM dangers WHERE id = ?", (dangerId,))[0]
+
+    def eventId(self, event: Optional[str]) -> Optional[int]:
+        eventId = self._scalar("SELECT id FROM events WHERE text = ?", (event,))
+        if eventId is None and event in self._foreignEvents.ids:
+            eventId = self._eventCount + self._foreignEvents.ids[event]
+        return eventId
+
+    def _eventText(self, eventId: Optional[int]) -> Optional[str]:
+        if eventId is None:
+            return None
+        if eventId >= self._eventCount:
+            return self._foreignEvents.text(eventId - self._eventCount)
+        return self._scalar("SELECT text FROM events WHERE id = ?", (eventId,))
+
+    def isCatalogDanger(self, dangerId: Optional[int]) -> bool:
+        return dangerId is not None and dangerId < self._dangerCount
+
+    def isCatalogEvent(self, eventId: Optional[int]) -> bool:
+        return eventId is not None and eventId < self._eventCount
+
+    def internDanger(self, n: Optional[str], desc: Optional[str]) -> Optional[int]:
+        if n is None and desc is None:
+            return None
+        dangerId = self._scalar("SELECT id FROM dangers WHERE no = ? AND desc = ?", (n, desc))
+        if dangerId is not None:
+            return dangerId
+        foreignId = self._foreignDangers.intern(f"{n}. {desc}")
+        if foreignId == len(self._foreignDangerParts):
+            self._foreignDangerParts.append((n, desc))
+        return self._dangerCount + foreignId
+
+    def internDangerKey(self, key: Optional[str]) -> Optional[int]:
+        if key is None:
+            return None
+        dangerId = self.dangerId(key)
+        if dangerId is not None:
+            return dangerId
+        n, _, desc = key.partition(". ")
+        return self.internDanger(n, desc)
+
+    def internEvent(self, event: Optional[str]) -> Optional[int]:
+        if event is None:
+            return None
+        eventId = self.eventId(event)
+        if eventId is None:
+            eventId = self._eventCount + self._foreignEvents.intern(event)
+        return eventId
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Конвертирование справочника db.json в SQLite")
+    parser.add_argument("json", help="путь к db.json")
+    parser.add_argument("sqlite", help="путь к создаваемому файлу SQLite")
+    args = parser.parse_args()
+    convertJsonToSqlite(args.json, args.sqlite)
@@ -0,0 +1,405 @@
+from array import array
+from math import isnan, nan
+from typing import Callable, Iterable, Iterator, Optional, Union
+from .database import database as db
+from .riskMap import METHODS_CHANGED, Record, RiskMap, Table, _trimRow
+from .scoring import MAX_PRODUCT, PRODUCTS, RATINGS, hundredthsRow, ratingIndex, resultName
+
+# Столбцы хранилища: имя поля Record, имя столбца, код типа array и значение-заменитель None
+_COLUMNS = (
+    ("_dangerId", "dangerIds", "i", -1),
+    ("_eventId", "eventIds", "i", -1),
+    ("_damagePts", "damagePts", "b", 0),
+    ("_susceptibilityPts", "susceptibilityPts", "b", 0),
+    ("_probabilityPts", "probabilityPts", "b", 0),
+    ("_weight", "weights", "d", nan),
+    ("_identifiedDangersRisks", "risks", "d", nan),
+)
+
+
+#============== Столбцовое хранилище строк таблицы ==============#
+class ColumnStore:
+#   Строки таблицы, разложенные по столбцам array: идентификаторы опасности и события (-1 - нет значения),
+#   баллы в байтах (0 - нет значения), вес и риск в double (NaN - нет значения) и код рейтинга в байте
+#   (-1 - нет значения, иначе индекс в ratingNames, первые три - scoring.RATINGS).
+#   Снаружи хранилище ведёт себя как список записей: индекс и перебор возвращают RecordView,
+#   append принимает любую запись и копирует её поля в столбцы, pop возвращает отвязанный Record
+    def __init__(self, records: Iterable[Record] = ()):
+        for _, column, typecode, _ in _COLUMNS:
+            setattr(self, column, array(typecode))
+        self.ratings = array("b")
+        self.ratingNames: list[str, ...] = list(RATINGS)
+        self.onModifiedCallback: Optional[Callable] = None
+        for record in records:
+            self.append(record)
+
+    def __len__(self) -> int:
+        return len(self.ratings)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union['RecordView', list['RecordView', ...]]:
+        if isinstance(index, slice):
+            return [RecordView(self, row) for row in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("индекс строки вне таблицы")
+        return RecordView(self, index)
+
+    def __iter__(self) -> Iterator['RecordView']:
+        for row in range(len(self)):
+            yield RecordView(self, row)
+
+    def ratingCode(self, newRating: Optional[str]) -> int:
+        if newRating is None or newRating == "":
+            return -1
+        try:
+            return self.ratingNames.index(newRating)
+        except ValueError:
+            self.ratingNames.append(newRating)
+            return len(self.ratingNames) - 1
+
+    def append(self, record: Record) -> None:
+        for field, column, _, empty in _COLUMNS:
+            value = getattr(record, field)
+            getattr(self, column).append(empty if value is None else value)
+        self.ratings.append(self.ratingCode(record._rating))
+
+    def pop(self, index: int = -1) -> Record:
+        record = self[index].detach()
+        index = index + len(self) if index < 0 else index
+        for _, column, _, _ in _COLUMNS:
+            del getattr(self, column)[index]
+        del self.ratings[index]
+        return record
+
+    def reorder(self, rows: list[int, ...]) -> None:
+        # Оставляет строки с индексами rows в их порядке: так и удаляются строки, и выполняется сортировка
+        for _, column, typecode, _ in _COLUMNS:
+            values = getattr(self, column)
+            setattr(self, column, array(typecode, [values[row] for row in rows]))
+        self.ratings = array("b", [self.ratings[row] for row in rows])
+
+    def sort(self, key: Callable, reverse: bool = False) -> None:
+        self.reorder(sorted(range(len(self)), key=lambda row: key(RecordView(self, row)), reverse=reverse))
+
+    def isEmptyRow(self, row: int) -> bool:
+        return (self.dangerIds[row] == -1 and self.eventIds[row] == -1 and not self.damagePts[row]
+                and not self.susceptibilityPts[row] and not self.probabilityPts[row]
+                and isnan(self.weights[row]) and isnan(self.risks[row]) and self.ratings[row] == -1)
+
+
+def _columnProperty(column: str, empty) -> property:
+    def get(view: 'RecordView'):
+        value = getattr(view._store, column)[view._row]
+        return None if value == empty else value
+
+    def set(view: 'RecordView', value) -> None:
+        getattr(view._store, column)[view._row] = empty if value is None else value
+
+    return property(get, set)
+
+
+def _floatColumnProperty(column: str) -> property:
+    def get(view: 'RecordView'):
+        value = getattr(view._store, column)[view._row]
+        return None if isnan(value) else value
+
+    def set(view: 'RecordView', value) -> None:
+        getattr(view._store, column)[view._row] = nan if value is None else value
+
+    return property(get, set)
+
+
+#============== Строка столбцовой таблицы ==============#
+class RecordView(Record):
+#   Запись, которая не хранит полей, а читает и пишет их в строку row хранилища ColumnStore.
+#   Поля Record (_dangerId, _damagePts, ...) переопределены свойствами над столбцами, поэтому
+#   геттеры, сеттеры и проверки Record работают без изменений. Представления создаются при обращении
+#   к строке и остаются верными, пока строки хранилища не удалены и не переставлены
+    __slots__ = ("_store",)
+
+    def __init__(self, store: ColumnStore, row: int):
+        self._store = store
+        self._row = row
+
+    _dangerId = _columnProperty("dangerIds", -1)
+    _eventId = _columnProperty("eventIds", -1)
+    _damagePts = _columnProperty("damagePts", 0)
+    _susceptibilityPts = _columnProperty("susceptibilityPts", 0)
+    _probabilityPts = _columnProperty("probabilityPts", 0)
+    _weight = _floatColumnProperty("weights")
+    _identifiedDangersRisks = _floatColumnProperty("risks")
+
+    @property
+    def _rating(self) -> Optional[str]:
+        code = self._store.ratings[self._row]
+        return None if code < 0 else self._store.ratingNames[code]
+
+    @_rating.setter
+    def _rating(self, newRating: Optional[str]) -> None:
+        self._store.ratings[self._row] = self._store.ratingCode(newRating)
+
+    @property
+    def onModifiedCallback(self) -> Optional[Callable]:
+        return self._store.onModifiedCallback
+
+    @onModifiedCallback.setter
+    def onModifiedCallback(self, callback: Optional[Callable]) -> None:
+        self._store.onModifiedCallback = callback
+
+    def isEmpty(self) -> bool:
+        return self._store.isEmptyRow(self._row)
+
+    def detach(self) -> Record:
+        record = Record()
+        for field, _, _, _ in _COLUMNS:
+            setattr(record, field, getattr(self, field))
+        record._rating = self._rating
+        return record
+
+
+#============== Итоги инкрементального режима по столбцам ==============#
+class ColumnTotals:
+#   Замена RunningTotals для ColumnarTable с теми же полями, которые читает Table.refreshTotals.
+#   RunningTotals запоминает вклад каждого объекта строки, а строки хранилища - временные RecordView,
+#   поэтому add и discard ничего не делают, а суммы пересобираются проходом по столбцам в recount.
+#   Повторы пары (опасность, событие) не учитываются сразу, как их удалил бы calculate(), и duplicates всегда 0
+    def __init__(self):
+        self.weightSum: int = 0
+        self.productSum: int = 0
+        self.productCounts: list[int] = [0] * (MAX_PRODUCT + 1)
+        self.unfilled: set[int] = set()
+        self.duplicates: int = 0
+        self.nonEmpty: int = 0
+
+    def add(self, record: Record) -> None:
+        pass
+
+    def discard(self, record: Record) -> None:
+        pass
+
+    def recount(self, store: ColumnStore) -> None:
+        self.weightSum = self.productSum = self.duplicates = self.nonEmpty = 0
+        self.productCounts = [0] * (MAX_PRODUCT + 1)
+        self.unfilled = set()
+        seen: set[tuple[int, int]] = set()
+        for row, (dangerId, eventId, d, s, p) in enumerate(zip(
+                store.dangerIds, store.eventIds, store.damagePts, store.susceptibilityPts, store.probabilityPts)):
+            if dangerId == -1 or eventId == -1 or not d or not s or not p:
+                if store.isEmptyRow(row):
+                    continue
+                # Незаполненная строка: итоги не считаются, остальные строки можно не смотреть
+                self.unfilled.add(row)
+                self.nonEmpty += 1
+                return
+            self.nonEmpty += 1
+            key = (dangerId, eventId)
+            if key in seen:
+                continue
+            seen.add(key)
+            product = PRODUCTS[d][s][p]
+            self.weightSum += p
+            self.productSum += product
+            self.productCounts[product] += 1
+
+
+#============== Таблица со столбцовым хранением ==============#
+class ColumnarTable(Table):
+#   Необязательная замена списка объектов Record для больших карт: строки хранятся в ColumnStore,
+#   около 30 байт на строку вместо сотни с лишним у Record. Подготовка, расчёт, методики и удаление
+#   пустых строк и дубликатов работают прямо по столбцам и дают те же значения, что и Table.
+#   Инкрементальный режим ведёт ColumnTotals: итоги пересобираются проходом по столбцам при каждом обновлении
+    @property
+    def table(self) -> ColumnStore:
+        return self._store
+
+    @table.setter
+    def table(self, records: Iterable[Record]) -> None:
+        self._store = records if isinstance(records, ColumnStore) else ColumnStore(records)
+        self._store.onModifiedCallback = self._onRecordModified
+
+    # Представление знает свою строку, пока строки хранилища не переставлены
+    def _recordRow(self, record: Record, row: Optional[int]) -> Optional[int]:
+        return row if getattr(record, "_store", None) is self._store else None
+
+#======= Инкрементальный пересчёт =======#
+    def enableIncremental(self) -> int:
+        self._totals = ColumnTotals()
+        return self.refreshTotals()
+
+    def refreshTotals(self) -> int:
+        if self._totals is None:
+            return self.enableIncremental()
+        self._totals.recount(self._store)
+        return super().refreshTotals()
+
+#   Рейтинги всех строк пересчитываются по столбцам, как в calculate(), и записываются, только если изменились
+    def updateRecords(self, records: Iterable[Record]) -> int:
+        records = list(records)
+        status: int = self.refreshTotals()
+        store = self._store
+        with self.batch():
+            if status == 1:
+                weightSum: int = self._weightSum
+                codes: list[int, ...] = [ratingIndex(product, weightSum) for product in range(MAX_PRODUCT + 1)]
+                # Строки без баллов при status == 1 - пустые, их рейтинг не выставляется
+                ratings = array("b", [codes[PRODUCTS[d][s][p]] if d else code for d, s, p, code in zip(
+                    store.damagePts, store.susceptibilityPts, store.probabilityPts, store.ratings)])
+                if ratings != store.ratings:
+                    store.ratings = ratings
+                    self._markAllRecordsModified("rating")
+            else:
+                for record in records:
+                    if record.rating is not None:
+                        record.rating = None
+        return status
+
+#   Хеши строк для отпечатка читаются прямо из столбцов, без представлений строк, и совпадают
+#   с _recordDigest(RecordView) - им обновляется одна строка после правки
+    def _tableDigests(self, start: int = 0) -> list[int, ...]:
+        store = self._store
+        names: list[Optional[str], ...] = [None, *store.ratingNames]
+        columns = [getattr(store, column)[start:] for _, column, _, _ in _COLUMNS]
+        return [hash((None if dangerId == -1 else dangerId, None if eventId == -1 else eventId, d or None, s or None,
+                      p or None, None if isnan(weight) else weight, None if isnan(risk) else risk, names[code + 1]))
+                for dangerId, eventId, d, s, p, weight, risk, code in zip(*columns, store.ratings[start:])]
+
+#======= Вычисление результата =======#
+    def calculate(self, updateMethods: bool = True) -> int:
+        with self.batch():
+            status: int = self._prepareCalculation()
+            if status != 1:
+                return status
+            store = self._store
+            self.weightSum = weightSum = sum(store.probabilityPts)
+            risks: tuple[int, ...] = hundredthsRow(weightSum)
+            ratingCodes: list[int, ...] = [ratingIndex(product, weightSum) for product in range(MAX_PRODUCT + 1)]
+            products: list[int, ...] = [PRODUCTS[d][s][p] for d, s, p in zip(store.damagePts, store.susceptibilityPts, store.probabilityPts)]
+            riskValues: list[float, ...] = [risks[product] / 100 for product in products]
+            store.weights = array("d", [risks[p] / 100 for p in store.probabilityPts])
+            store.risks = array("d", riskValues)
+            store.ratings = array("b", [ratingCodes[product] for product in products])
+            self._markAllRecordsModified("weight", "identifiedDangersRisks", "rating")
+            self._profRisk = round(sum(riskValues), 2)
+            self._result = round(self._kFactor + self._profRisk, 2)
+            self._resultStr = resultName(self._result)
+            if updateMethods:
+                self.fillMethods()
+            self._markModified("profRisk", "result", "resultStr")
+            return 1
+
+    def _prepareCalculation(self) -> int:
+        self.removeEmptyRecords()
+        self._markModified()
+        store = self._store
+        if not len(store):
+            return -1
+        if -1 in store.dangerIds or -1 in store.eventIds or 0 in store.damagePts\
+                or 0 in store.susceptibilityPts or 0 in store.probabilityPts:
+            return 0
+        self.removeDuplicates()
+        sortKeys: dict[int, tuple[int, str]] = {}
+        dangerParts = db.dangerParts
+        for dangerId in set(store.dangerIds):
+            n, desc = dangerParts(dangerId)
+            sortKeys[dangerId] = (int(n), desc)
+        dangerIds = store.dangerIds
+        order: list[int, ...] = sorted(range(len(store)), key=lambda row: sortKeys[dangerIds[row]])
+        if any(row != i for i, row in enumerate(order)):
+            store.reorder(order)
+            self._rowsReordered(order, len(order))
+        return 1
+
+#======= Заполнение списка методик =======#
+    def fillMethods(self):
+        bits: int = 0
+        measureBits = db.measureBits
+        store = self._store
+        for dangerId, eventId, code in zip(store.dangerIds, store.eventIds, store.ratings):
+            if code == 1 or code == 2:
+                bits |= measureBits(dangerId, eventId)
+        self._setMethods(db.measureTexts(bits))
+
+#======= Удаление дубликатов и пустых записей =======#
+    def removeDuplicates(self) -> None:
+        seen: set[tuple, ...] = set()
+        rows: list[int, ...] = []
+        for row, key in enumerate(zip(self._store.dangerIds, self._store.eventIds)):
+            if key not in seen:
+                seen.add(key)
+                rows.append(row)
+        if len(rows) != len(self._store):
+            count: int = len(self._store)
+            self._store.reorder(rows)
+            self._rowsReordered(rows, count)
+
+    def removeEmptyRecords(self) -> None:
+        store = self._store
+        rows: list[int, ...] = [row for row in range(len(store)) if not store.isEmptyRow(row)]
+        if len(rows) != len(store):
+            count: int = len(store)
+            store.reorder(rows)
+            self._rowsReordered(rows, count)
+
+
+#============== Карта со столбцовым хранением ==============#
+class ColumnarRiskMap(ColumnarTable, RiskMap):
+#   RiskMap поверх ColumnarTable: строки таблицы читаются из файла и пишутся в файл прямо по столбцам
+    def _tableToJson(self, storeIds: bool) -> list[dict, ...]:
+        if not storeIds:
+            return super()._tableToJson(storeIds)
+        store = self._store
+        names = [None] + store.ratingNames
+        return [{
+            "dangerId": None if dangerId == -1 else dangerId,
+            "eventId": None if eventId == -1 else eventId,
+            "damagePts": d or None,
+            "susceptibilityPts": s or None,
+            "probabilityPts": p or None,
+            "weight": None if isnan(weight) else weight,
+            "identifiedDangersRisks": None if isnan(risk) else risk,
+            "rating": names[code + 1],
+        } for dangerId, eventId, d, s, p, weight, risk, code in zip(
+            store.dangerIds, store.eventIds, store.damagePts, store.susceptibilityPts, store.probabilityPts,
+            store.weights, store.risks, store.ratings)]
+
+    def _tableToRows(self) -> list[list, ...]:
+        store = self._store
+        # Коды рейтингов из RATINGS совпадают с индексами RATINGS в файле, остальные пишутся текстом
+        names = [None] + list(range(len(RATINGS))) + store.ratingNames[len(RATINGS):]
+        return [_trimRow([
+            None if dangerId == -1 else dangerId,
+            None if eventId == -1 else eventId,
+            d or None,
+            s or None,
+            p or None,
+            None if isnan(weight) else weight,
+            None if isnan(risk) else risk,
+            names[code + 1],
+        ]) for dangerId, eventId, d, s, p, weight, risk, code in zip(
+            store.dangerIds, store.eventIds, store.damagePts, store.susceptibilityPts, store.probabilityPts,
+            store.weights, store.risks, store.ratings)]
+
+    def _tableStrings(self) -> dict:
+        store = self._store
+        return {
+            "dangers": {str(dangerId): db.dangerKey(dangerId) for dangerId in dict.fromkeys(store.dangerIds) if dangerId != -1},
+            "events": {str(eventId): db.eventText(eventId) for eventId in dict.fromkeys(store.eventIds) if eventId != -1},
+        }
+
+    def _appendFromJson(self, rows: list[dict, ...], catalogMatches: bool, strings: dict) -> None:
+        start: int = len(self._store)
+        record = Record()
+        for recordData in rows:
+            self._recordFromJson(record, recordData, catalogMatches, strings)
+            self._store.append(record)
+        self._rowsAppended(start)
+
+    def _appendFromColumns(self, columns: dict[str, list], catalogMatches: bool, strings: dict) -> None:
+        start: int = len(self._store)
+        record = Record()
+        for values in self._valuesFromColumns(columns, catalogMatches, strings):
+            (record._dangerId, record._eventId, record._damagePts, record._susceptibilityPts, record._probabilityPts,
+             record._weight, record._identifiedDangersRisks, record._rating) = values
+            self._store.append(record)
+        self._rowsAppended(start)
@@ -4,6 +4,7 @@ from docx.shared import Pt, Inches, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.section import WD_ORIENT
 from docx.enum.table import WD_TABLE_ALIGNMENT, WD_ALIGN_VERTICAL
+from .scoring import hundredths
 
 def normalizeName(full_name: str) -> str:
     """
@@ -272,7 +273,7 @@ class RiskMapToDocxConverter:
             row_cells[10].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
 
             if record.probabilityPts and weight_sum:
-                k = round(record.probabilityPts / weight_sum, 2)
+                k = hundredths(record.probabilityPts, weight_sum) / 100
                 row_cells[11].text = str(k)
             else:
                 row_cells[11].text = ''
@@ -1,10 +1,254 @@
 from typing import Optional
-import json
+import json, os, threading
 from pathlib import Path
+from .catalogSearch import CatalogSearchIndex
+
+DB_JSON_PATH = Path(__file__).parent / "db.json"
+DB_CACHE_PATH = Path(__file__).parent / "db.cache"
+# Увеличивается при изменении структуры CatalogIndex, чтобы старый кэш не подхватывался
+CATALOG_CACHE_VERSION = 6
+# Дописывание строк в пулы: карты могут строиться в фоновом потоке (bulkOpen) одновременно с правками в GUI.
+# Блокировка общая для модуля, а не поле пула, так как пулы сохраняются в кэш pickle
+_INTERN_LOCK = threading.RLock()
+
+class StringPool:
+#   Пул интернированных строк с компактными целочисленными идентификаторами.
+#   Строки справочника интернируются в порядке db.json, поэтому их идентификаторы стабильны для одного db.json.
+#   Строки, которых нет в справочнике (например, из старых файлов .rsk), дописываются в конец пула.
+#   Идентификаторы не переиспользуются, даже если запись исчезла из справочника
+	def __init__(self, texts=()):
+		self.texts: list[str] = []
+		self.ids: dict[str, int] = {}
+		for text in texts:
+			self.intern(text)
+
+	def intern(self, text: str) -> int:
+		textId = self.ids.get(text)
+		if textId is None:
+			with _INTERN_LOCK:
+				textId = self.ids.get(text)
+				if textId is None:
+					textId = len(self.texts)
+					self.texts.append(text)
+					self.ids[text] = textId
+		return textId
+
+	def text(self, textId: Optional[int]) -> Optional[str]:
+		return self.texts[textId] if textId is not None else None
+
+	def __len__(self) -> int:
+		return len(self.texts)
+
+
+class CatalogIndex:
+#   Индексированное представление справочника опасностей:
+#   словари по полному ключу, номеру и описанию опасности, паре (номер, описание),
+#   frozenset событий для каждой опасности и отображение (ключ, событие) -> меры.
+#   Номера и описания в справочнике не уникальны, поэтому byNumber и byDesc хранят кортежи ключей.
+#   Полнотекстовый индекс строится вместе с остальными и попадает в бинарный кэш.
+#   Опасности, события и меры получают целочисленные идентификаторы в пулах строк,
+#   hash - sha256 db.json, по нему файлы .rsk проверяют, что идентификаторы сохранены для того же справочника.
+#   setEntry/removeEntry меняют одну опасность без перестроения всего индекса (используется слоями справочника),
+#   eventRefs и measureRefs считают, сколько опасностей ссылается на событие или меру.
+#   Для списка методик каждой паре (опасность, событие) сопоставлена битовая маска мер, где номер бита -
+#   позиция меры в отсортированном списке всех мер; маски и порядок строятся лениво и сбрасываются при изменении справочника
+	def __init__(self, database: dict, digest: str = ""):
+		self.hash: str = digest
+		self._keys: Optional[tuple[str, ...]] = None
+		self.byKey: dict[str, dict] = {}
+		self.byNumber: dict[str, tuple[str, ...]] = {}
+		self.byDesc: dict[str, tuple[str, ...]] = {}
+		self.byPair: dict[tuple[str, str], str] = {}
+		self.events: dict[str, frozenset[str]] = {}
+		self.eventLists: dict[str, tuple[str, ...]] = {}
+		self.measures: dict[tuple[str, str], tuple[str, ...]] = {}
+		self.dangerPool: StringPool = StringPool()
+		self.dangerParts: list[tuple[str, str]] = []
+		self.eventPool: StringPool = StringPool()
+		self.measurePool: StringPool = StringPool()
+		self.measureIds: dict[tuple[int, int], tuple[int, ...]] = {}
+		self.eventRefs: dict[int, int] = {}
+		self.measureRefs: dict[int, int] = {}
+		self._measureOrder: Optional[tuple[str, ...]] = None
+		self._measureBits: dict[tuple[int, int], int] = {}
+		self.search: Optional[CatalogSearchIndex] = None
+		for key, entry in database.items():
+			self.setEntry(key, entry)
+		self.search = CatalogSearchIndex(
+			self.keys,
+			(self.eventPool.texts[eventId] for eventId in self.eventRefs),
+			(self.measurePool.texts[measureId] for measureId in self.measureRefs))
+
+	@property
+	def keys(self) -> tuple[str, ...]:
+		if self._keys is None:
+			self._keys = tuple(self.byKey)
+		return self._keys
+
+	def setEntry(self, key: str, entry: dict) -> None:
+		if key in self.byKey:
+			self.removeEntry(key)
+		no, desc = entry["No"], entry["desc"]
+		self.byKey[key] = entry
+		self._keys = None
+		self._measureOrder = None
+		self.byNumber[no] = self.byNumber.get(no, ()) + (key,)
+		self.byDesc[desc] = self.byDesc.get(desc, ()) + (key,)
+		self.byPair[(no, desc)] = key
+		with _INTERN_LOCK:
+			dangerId = self.dangerPool.intern(key)
+			# Опасность, уже бывшая в справочнике, могла получить в оверлее другие номер и описание
+			if dangerId == len(self.dangerParts):
+				self.dangerParts.append((no, desc))
+			else:
+				self.dangerParts[dangerId] = (no, desc)
+		self.eventLists[key] = tuple(entry["events"].keys())
+		self.events[key] = frozenset(self.eventLists[key])
+		for event, measures in entry["events"].items():
+			self.measures[(key, event)] = tuple(measures)
+			eventId = self._acquire(self.eventRefs, self.eventPool, "event", event)
+			self.measureIds[(dangerId, eventId)] = tuple(
+				self._acquire(self.measureRefs, self.measurePool, "measure", measure) for measure in measures)
+		if self.search is not None:
+			self.search.add("danger", key)
+
+	def removeEntry(self, key: str) -> None:
+		entry = self.byKey.pop(key, None)
+		if entry is None:
+			return
+		self._keys = None
+		self._measureOrder = None
+		no, desc = entry["No"], entry["desc"]
+		self._dropKey(self.byNumber, no, key)
+		self._dropKey(self.byDesc, desc, key)
+		self.byPair.pop((no, desc), None)
+		dangerId = self.dangerPool.ids[key]
+		for event in self.eventLists.pop(key):
+			eventId = self.eventPool.ids[event]
+			self.measures.pop((key, event), None)
+			for measureId in self.measureIds.pop((dangerId, eventId), ()):
+				self._release(self.measureRefs, self.measurePool, "measure", measureId)
+			self._release(self.eventRefs, self.eventPool, "event", eventId)
+		self.events.pop(key, None)
+		if self.search is not None:
+			self.search.remove("danger", key)
+
+	@staticmethod
+	def _dropKey(index: dict[str, tuple[str, ...]], value: str, key: str) -> None:
+		keys = tuple(k for k in index.get(value, ()) if k != key)
+		if keys:
+			index[value] = keys
+		else:
+			index.pop(value, None)
+
+	def _acquire(self, refs: dict[int, int], pool: StringPool, kind: str, text: str) -> int:
+		textId = pool.intern(text)
+		refs[textId] = refs.get(textId, 0) + 1
+		if refs[textId] == 1 and self.search is not None:
+			self.search.add(kind, text)
+		return textId
+
+	def _release(self, refs: dict[int, int], pool: StringPool, kind: str, textId: int) -> None:
+		refs[textId] -= 1
+		if not refs[textId]:
+			del refs[textId]
+			if self.search is not None:
+				self.search.remove(kind, pool.texts[textId])
+
+#======= Битовые маски мер =======#
+	def _buildMeasureBits(self) -> None:
+		order = sorted(self.measureRefs, key=self.measurePool.texts.__getitem__)
+		rank = {measureId: position for position, measureId in enumerate(order)}
+		measureBits: dict[tuple[int, int], int] = {}
+		for pair, measureIds in self.measureIds.items():
+			bits = 0
+			for measureId in measureIds:
+				bits |= 1 << rank[measureId]
+			measureBits[pair] = bits
+		self._measureBits = measureBits
+		self._measureOrder = tuple(self.measurePool.texts[measureId] for measureId in order)
+
+	def measureBits(self, dangerId: Optional[int], eventId: Optional[int]) -> int:
+		if self._measureOrder is None:
+			self._buildMeasureBits()
+		return self._measureBits.get((dangerId, eventId), 0)
+
+#   Меры, отмеченные в маске, в порядке сортировки строк
+	def measureTexts(self, bits: int) -> list[str]:
+		if self._measureOrder is None:
+			self._buildMeasureBits()
+		order = self._measureOrder
+		texts: list[str] = []
+		while bits:
+			low = bits & -bits
+			texts.append(order[low.bit_length() - 1])
+			bits ^= low
+		return texts
+
+	def keyOf(self, n: Optional[str], desc: Optional[str]) -> Optional[str]:
+		return self.byPair.get((n, desc))
+
+	def isCatalogDanger(self, dangerId: Optional[int]) -> bool:
+		return dangerId is not None and self.dangerPool.texts[dangerId] in self.byKey
+
+	def isCatalogEvent(self, eventId: Optional[int]) -> bool:
+		return eventId in self.eventRefs
+
+#   Идентификатор опасности по номеру и описанию; отсутствующая в справочнике опасность интернируется
+	def internDanger(self, n: Optional[str], desc: Optional[str]) -> Optional[int]:
+		if n is None and desc is None:
+			return None
+		key = self.keyOf(n, desc)
+		if key is not None:
+			return self.dangerPool.ids[key]
+		with _INTERN_LOCK:
+			dangerId = self.dangerPool.intern(f"{n}. {desc}")
+			if dangerId == len(self.dangerParts):
+				self.dangerParts.append((n, desc))
+		return dangerId
+
+	def internDangerKey(self, key: Optional[str]) -> Optional[int]:
+		if key is None:
+			return None
+		if key in self.byKey:
+			return self.dangerPool.ids[key]
+		n, _, desc = key.partition(". ")
+		return self.internDanger(n, desc)
+
+
+#============== Слои справочника ==============#
+class CatalogLayer:
+#   Слой справочника: базовый db.json либо оверлей организации или площадки в том же формате.
+#   Опасность в оверлее может содержать поле "mode": "extend" (по умолчанию) дописывает события и меры
+#   к нижележащим слоям, "override" заменяет опасность целиком, "remove" исключает её из итогового справочника
+	def __init__(self, name: str, data: dict, path: Optional[Path] = None, digest: str = ""):
+		self.name = name
+		self.data = data
+		self.path = Path(path) if path is not None else None
+		import hashlib
+		self.digest = digest or hashlib.sha256(json.dumps(data, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+		self.mtime: Optional[int] = os.stat(self.path).st_mtime_ns if self.path is not None and self.path.exists() else None
+
+	@classmethod
+	def fromFile(cls, name: str, path) -> 'CatalogLayer':
+		with open(path, mode="rb") as f:
+			raw = f.read()
+		import hashlib
+		return cls(name, json.loads(raw.decode("utf-8")), Path(path), hashlib.sha256(raw).hexdigest())
+
+	def isStale(self) -> bool:
+		try:
+			return self.path is not None and os.stat(self.path).st_mtime_ns != self.mtime
+		except OSError:
+			return False
+
 
 class DatabaseManager:
-	def __init__(self):
-		self.database: dict = self.load_database()
+#   Справочник собирается из стопки слоёв: базовый db.json и подключаемые оверлеи (overlays - пути к json).
+#   Итоговый справочник хранится в одном CatalogIndex, поэтому поиск не зависит от числа слоёв.
+#   При изменении слоя пересобираются только опасности, которые в нём затронуты
+	def __init__(self, overlays: tuple = ()):
+		self.database, self.index = self.load_catalog()
 		if not self.database:
 			self.database = {
 				"1. Опасность": {
@@ -15,26 +259,220 @@ class DatabaseManager:
 					}
 				}
 			}
+			self.index = CatalogIndex(self.database)
+		self.layers: list[CatalogLayer] = [CatalogLayer("base", dict(self.database), DB_JSON_PATH, self.index.hash)]
+		for path in overlays:
+			self.mountLayer(Path(path).stem, path=path)
+
+#======= Подключение и обновление слоёв =======#
+	def mountLayer(self, name: str, path=None, data: Optional[dict] = None) -> CatalogLayer:
+		layer = CatalogLayer.fromFile(name, path) if path is not None else CatalogLayer(name, data or {})
+		old = self.getLayer(name)
+		if old is None:
+			self.layers.append(layer)
+		else:
+			self.layers[self.layers.index(old)] = layer
+		self._applyLayerChange(old, layer)
+		return layer
+
+	def unmountLayer(self, name: str) -> None:
+		layer = self.getLayer(name)
+		if layer is None or layer is self.layers[0]:
+			return
+		self.layers.remove(layer)
+		self._applyLayerChange(layer, None)
+
+	def reloadLayer(self, name: str) -> None:
+		layer = self.getLayer(name)
+		if layer is not None and layer.path is not None:
+			new = CatalogLayer.fromFile(name, layer.path)
+			self.layers[self.layers.index(layer)] = new
+			self._applyLayerChange(layer, new)
+
+#   Перечитывает слои, файлы которых изменились с момента загрузки; возвращает True, если справочник изменился
+	def refreshLayers(self) -> bool:
+		stale = [layer.name for layer in self.layers if layer.isStale()]
+		for name in stale:
+			self.reloadLayer(name)
+		return bool(stale)
+
+	def getLayer(self, name: str) -> Optional[CatalogLayer]:
+		return next((layer for layer in self.layers if layer.name == name), None)
+
+	def _applyLayerChange(self, old: Optional[CatalogLayer], new: Optional[CatalogLayer]) -> None:
+		oldData = old.data if old is not None else {}
+		newData = new.data if new is not None else {}
+		for key in oldData.keys() | newData.keys():
+			if oldData.get(key) == newData.get(key):
+				continue
+			merged = self._mergeEntry(key)
+			if merged is None:
+				self.database.pop(key, None)
+				self.index.removeEntry(key)
+			else:
+				self.database[key] = merged
+				self.index.setEntry(key, merged)
+		import hashlib
+		self.index.hash = self.layers[0].digest if len(self.layers) == 1 else \
+			hashlib.sha256("|".join(layer.digest for layer in self.layers).encode("utf-8")).hexdigest()
+
+	def _mergeEntry(self, key: str) -> Optional[dict]:
+		merged: Optional[dict] = None
+		n, _, desc = key.partition(". ")
+		for layer in self.layers:
+			entry = layer.data.get(key)
+			if entry is None:
+				continue
+			mode = entry.get("mode", "extend")
+			if mode == "remove":
+				merged = None
+			elif mode == "override" or merged is None:
+				merged = {
+					"No": entry.get("No", n),
+					"desc": entry.get("desc", desc),
+					"events": {event: list(measures) for event, measures in entry.get("events", {}).items()}
+				}
+			else:
+				for event, measures in entry.get("events", {}).items():
+					existing = merged["events"].setdefault(event, [])
+					existing.extend(measure for measure in measures if measure not in existing)
+		return merged
 
 	@staticmethod
 	def load_database() -> dict:
-		with open(Path(__file__).parent / "db.json", mode="r", encoding="utf-8") as f:
+		with open(DB_JSON_PATH, mode="r", encoding="utf-8") as f:
 			database: dict = json.load(f)
 		return database
 
+#======= Загрузка справочника через бинарный кэш =======#
+#   db.cache хранит заголовок (версия, sha256, mtime и размер db.json) и уже построенный CatalogIndex.
+#   Совпадение mtime и размера - быстрый путь без чтения db.json,
+#   совпадение хеша - кэш верен, но файл был переписан (например, при копировании), заголовок обновляется.
+#   Иначе db.json разбирается заново и кэш пересобирается.
+#   hashlib и pickle импортируются здесь, а не при импорте модуля: справочник загружается лениво (database)
+	@classmethod
+	def load_catalog(cls) -> tuple[dict, CatalogIndex]:
+		stat = os.stat(DB_JSON_PATH)
+		cached = cls._readCatalogCache(stat)
+		if cached is not None:
+			return cached
+		import hashlib
+		with open(DB_JSON_PATH, mode="rb") as f:
+			raw = f.read()
+		digest = hashlib.sha256(raw).hexdigest()
+		cached = cls._readCatalogCache(stat, digest)
+		if cached is None:
+			database: dict = json.loads(raw.decode("utf-8"))
+			cached = (database, CatalogIndex(database, digest))
+		cls._writeCatalogCache(stat, digest, cached)
+		return cached
+
+	@staticmethod
+	def _readCatalogCache(stat: os.stat_result, digest: Optional[str] = None) -> Optional[tuple[dict, CatalogIndex]]:
+		import pickle
+		try:
+			with open(DB_CACHE_PATH, mode="rb") as f:
+				header: dict = pickle.load(f)
+				if header.get("version") != CATALOG_CACHE_VERSION:
+					return None
+				if (header.get("mtime"), header.get("size")) != (stat.st_mtime_ns, stat.st_size) \
+						and (digest is None or header.get("hash") != digest):
+					return None
+				return pickle.load(f)
+		except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, TypeError):
+			return None
+
+#   Кэш пишется во временный файл и атомарно подменяется; ошибки записи (каталог только для чтения) игнорируются
+	@staticmethod
+	def _writeCatalogCache(stat: os.stat_result, digest: str, catalog: tuple[dict, CatalogIndex]) -> None:
+		import pickle
+		tempPath = DB_CACHE_PATH.with_suffix(".cache.tmp")
+		try:
+			with open(tempPath, mode="wb") as f:
+				pickle.dump({"version": CATALOG_CACHE_VERSION, "hash": digest,
+							 "mtime": stat.st_mtime_ns, "size": stat.st_size}, f, protocol=pickle.HIGHEST_PROTOCOL)
+				pickle.dump(catalog, f, protocol=pickle.HIGHEST_PROTOCOL)
+			os.replace(tempPath, DB_CACHE_PATH)
+		except OSError:
+			try:
+				os.remove(tempPath)
+			except OSError:
+				pass
+
 	def getDangers(self) -> list:
-		return list(self.database.keys())
+		return list(self.index.keys)
 
 	def getDangerSubstats(self, danger: str) -> Optional[list[str, str]]:
-		if danger in list(self.database.keys()):
-			return [self.database[danger]["No"], danger]
+		if danger in self.index.byKey:
+			return [self.index.byKey[danger]["No"], danger]
 		return None
 
 	def getEvents(self, danger: Optional[str] = None) -> Optional[list[str, ...]]:
-		if danger in list(self.database.keys()):
-			return list(self.database[danger]["events"].keys())
+		if danger in self.index.byKey:
+			return list(self.index.eventLists[danger])
 		return []
 
+	def hasDanger(self, danger: Optional[str]) -> bool:
+		return danger in self.index.byKey
+
+	def hasEvent(self, danger: Optional[str], event: Optional[str]) -> bool:
+		events = self.index.events.get(danger)
+		return events is not None and event in events
+
+	def getMeasures(self, danger: Optional[str], event: Optional[str]) -> tuple[str, ...]:
+		return self.index.measures.get((danger, event), ())
+
+#   Битовая маска мер пары (опасность, событие) по идентификаторам; объединение масок через | и
+#   measureTexts дают отсортированный список мер без повторов
+	def measureBits(self, dangerId: Optional[int], eventId: Optional[int]) -> int:
+		return self.index.measureBits(dangerId, eventId)
+
+	def measureTexts(self, bits: int) -> list[str]:
+		return self.index.measureTexts(bits)
+
+#   Ранжированный поиск: kind - "danger", "event" или "measure",
+#   для событий можно передать опасность, чтобы искать только среди её событий
+	def search(self, query: str, kind: str = "danger", danger: Optional[str] = None, limit: Optional[int] = 50) -> list[str]:
+		within = self.index.eventLists.get(danger, ()) if kind == "event" and danger is not None else None
+		return self.index.search.search(query, kind=kind, limit=limit, within=within)
+
+#======= Идентификаторы записей справочника =======#
+#   Record и загрузчик .rsk работают только через эти методы, поэтому их же реализует
+#   альтернативный бэкенд справочника (SqliteCatalogBackend)
+	@property
+	def catalogHash(self) -> str:
+		return self.index.hash
+
+	def dangerId(self, danger: Optional[str]) -> Optional[int]:
+		return self.index.dangerPool.ids.get(danger) if danger in self.index.byKey else None
+
+	def dangerKey(self, dangerId: Optional[int]) -> Optional[str]:
+		return self.index.dangerPool.text(dangerId)
+
+	def dangerParts(self, dangerId: int) -> tuple[str, str]:
+		return self.index.dangerParts[dangerId]
+
+	def eventId(self, event: Optional[str]) -> Optional[int]:
+		return self.index.eventPool.ids.get(event)
+
+	def eventText(self, eventId: Optional[int]) -> Optional[str]:
+		return self.index.eventPool.text(eventId)
+
+	def isCatalogDanger(self, dangerId: Optional[int]) -> bool:
+		return self.index.isCatalogDanger(dangerId)
+
+	def isCatalogEvent(self, eventId: Optional[int]) -> bool:
+		return self.index.isCatalogEvent(eventId)
+
+	def internDanger(self, n: Optional[str], desc: Optional[str]) -> Optional[int]:
+		return self.index.internDanger(n, desc)
+
+	def internDangerKey(self, key: Optional[str]) -> Optional[int]:
+		return self.index.internDangerKey(key)
+
+	def internEvent(self, event: Optional[str]) -> Optional[int]:
+		return self.index.eventPool.intern(event) if event is not None else None
+
 DAMAGE = {
 	"Незначительный ущерб": 1,
 	"Малый ущерб": 2,
@@ -59,6 +497,11 @@ PROBABILITY = {
 	"Очень вероятно": 5
 }
 
+# Обратные отображения баллов в качественные значения, текст в Record восстанавливается по баллам
+DAMAGE_BY_PTS = {pts: name for name, pts in DAMAGE.items()}
+SUSCEPTIBILITY_BY_PTS = {pts: name for name, pts in SUSCEPTIBILITY.items()}
+PROBABILITY_BY_PTS = {pts: name for name, pts in PROBABILITY.items()}
+
 REGULATORY_DOCS = [
 	"ГОСТ 12.0.003-2015. Межгосударственный стандарт. Система стандартов безопасности труда. Опасные и вредные производственные факторы. Классификация",
 	"ГОСТ Р 12.0.007-2009. Система стандартов безопасности труда. Система управления охраной труда в организации. Общие требования по разработке, применению, оценке и совершенствованию",
@@ -68,4 +511,49 @@ REGULATORY_DOCS = [
 	"Приказ Минтруда РФ от 29.10.2021 N 776н \"Об утверждении примерного положения о системе управления охраной труда\""
 ]
 
-database = DatabaseManager()
+#============== Ленивая загрузка справочника ==============#
+class LazyDatabaseManager:
+#   Потокобезопасный прокси над DatabaseManager: справочник строится при первом обращении к любому атрибуту,
+#   поэтому импорт модулей backend не читает db.json.
+#   preload() позволяет загрузить справочник заранее, например в фоновом потоке во время показа заставки
+	def __init__(self, factory=DatabaseManager):
+		self._factory = factory
+		self._instance: Optional[DatabaseManager] = None
+		self._lock = threading.Lock()
+
+	def preload(self) -> DatabaseManager:
+		instance = self._instance
+		if instance is None:
+			with self._lock:
+				if self._instance is None:
+					self._instance = self._factory()
+				instance = self._instance
+		return instance
+
+	@property
+	def isLoaded(self) -> bool:
+		return self._instance is not None
+
+#   Замена фабрики справочника; вызывается до первого обращения, так как записи хранят идентификаторы бэкенда
+	def setFactory(self, factory) -> None:
+		with self._lock:
+			self._factory = factory
+			self._instance = None
+
+	def __getattr__(self, name: str):
+		return getattr(self.preload(), name)
+
+
+def createCatalog():
+#   Фабрика справочника по умолчанию: если задана переменная окружения AURA_CATALOG_DB,
+#   справочник читается из файла SQLite (см. catalogSqlite.convertJsonToSqlite), иначе из db.json.
+#   AURA_CATALOG_OVERLAYS - список json-оверлеев через os.pathsep, подключаемых поверх db.json по порядку
+	sqlitePath = os.environ.get("AURA_CATALOG_DB")
+	if sqlitePath:
+		from .catalogSqlite import SqliteCatalogBackend
+		return SqliteCatalogBackend(sqlitePath)
+	overlays = os.environ.get("AURA_CATALOG_OVERLAYS", "")
+	return DatabaseManager(overlays=tuple(path for path in overlays.split(os.pathsep) if path))
+
+
+database = LazyDatabaseManager(createCatalog)
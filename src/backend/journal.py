@@ -0,0 +1,248 @@
+import json, os
+from typing import Callable, Optional
+from .database import database as db
+from .riskMap import CHANGED, METHODS_CHANGED, MODIFIED_CHANGED, ROWS_INSERTED, ROWS_MOVED, ROWS_REMOVED, RiskMap
+from .rskStream import dumpsJson
+
+JOURNAL_SUFFIX = ".journal"
+# Размер журнала, после которого изменения переносятся в .rsk
+DEFAULT_COMPACT_SIZE = 1 << 20
+_JOURNAL_VERSION = 1
+# Значения строки в записи "r": ключ опасности и текст события вместо идентификаторов, чтобы журнал
+# воспроизводился и после перезапуска с другим справочником
+_ROW_VALUES = ("dangerKey", "event", "damagePts", "susceptibilityPts", "probabilityPts", "weight", "identifiedDangersRisks", "rating")
+# Поля строки для подписчиков карты при восстановлении
+_ROW_FIELDS = ("danger", "event", "damage", "susceptibility", "probability", "weight", "identifiedDangersRisks", "rating")
+
+
+def journalPath(rskPath: str) -> str:
+    return rskPath + JOURNAL_SUFFIX
+
+
+def _fileSignature(path: str) -> Optional[list[int, ...]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+#============== Журнал изменений карты ==============#
+class EditJournal:
+#   Журнал изменений карты рядом с её файлом (<файл>.rsk.journal): каждое изменение, разосланное шиной карты,
+#   дописывается в конец журнала строкой JSON, поэтому при сбое теряется не больше одного изменения,
+#   а стоимость записи не зависит от размера карты. Первая строка журнала - размер и время изменения файла .rsk,
+#   к которому относятся записи. Записи:
+#   ["+", строки] - добавлены пустые строки, ["-", строки] - удалены строки (по убыванию индексов),
+#   ["m", порядок] - строки переставлены, ["r", строки, значения] - значения строк, ["f", {поле: значение}] - поля карты.
+#   Когда карта сохранена (признак изменения снят), журнал удаляется. Когда журнал превышает compactSize,
+#   вызывается onCompact - по умолчанию saveToRsk, - и после сохранения журнал начинается заново.
+#   Пока у карты нет пути сохранения или запись журнала не удалась, журнал не ведётся (active = False)
+    def __init__(self, riskMap: RiskMap, compactSize: int = DEFAULT_COMPACT_SIZE,
+                 onCompact: Optional[Callable[[RiskMap], None]] = None):
+        self.riskMap = riskMap
+        self.compactSize = compactSize
+        self._onCompact = onCompact or (lambda riskMap: riskMap.saveToRsk(riskMap.savePath))
+        self._nextCompaction: int = compactSize
+        self._file = None
+        self._path: Optional[str] = None
+        self._lines: list[bytes, ...] = []
+        self._skipChanges: bool = False
+        self.failed: bool = False
+        riskMap.subscribe(ROWS_INSERTED, self._onRowsInserted)
+        riskMap.subscribe(ROWS_REMOVED, self._onRowsRemoved)
+        riskMap.subscribe(ROWS_MOVED, self._onRowsMoved)
+        riskMap.subscribe(MODIFIED_CHANGED, self._onModifiedChanged)
+        riskMap.subscribe(CHANGED, self._onChanged)
+
+    @property
+    def active(self) -> bool:
+        return bool(self.riskMap.savePath) and not self.failed
+
+    def detach(self) -> None:
+        for eventType, handler in ((ROWS_INSERTED, self._onRowsInserted), (ROWS_REMOVED, self._onRowsRemoved),
+                                   (ROWS_MOVED, self._onRowsMoved), (MODIFIED_CHANGED, self._onModifiedChanged),
+                                   (CHANGED, self._onChanged)):
+            self.riskMap.unsubscribe(eventType, handler)
+        self.close()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+#   Удаляет журнал: изменения сохранены или отброшены пользователем
+    def discard(self) -> None:
+        self.close()
+        self._nextCompaction = self.compactSize
+        path: Optional[str] = self._path or self.riskMap.savePath
+        if path:
+            try:
+                os.remove(journalPath(path))
+            except OSError:
+                # Оставшийся журнал не применится: он относится к прежней версии файла
+                pass
+        self._path = None
+
+#======= Обработчики событий карты =======#
+    def _onRowsInserted(self, event: dict) -> None:
+        self._lines.append(dumpsJson(["+", event["rows"]]))
+
+    def _onRowsRemoved(self, event: dict) -> None:
+        self._lines.append(dumpsJson(["-", event["rows"]]))
+
+    def _onRowsMoved(self, event: dict) -> None:
+        self._lines.append(dumpsJson(["m", event["order"]]))
+
+    # Признак изменения снят после сохранения карты: файл содержит все изменения, журнал больше не нужен.
+    # CHANGED этой же рассылки приходит после, его записи тоже уже в файле
+    def _onModifiedChanged(self, event: dict) -> None:
+        if not event["isModified"]:
+            self._lines = []
+            self._skipChanges = True
+            self.discard()
+
+    def _onChanged(self, event: dict) -> None:
+        lines, self._lines = self._lines, []
+        if self._skipChanges or not self.active:
+            self._skipChanges = False
+            return
+        table = self.riskMap.table
+        if event["rows"]:
+            values = [[getattr(table[row], field) for field in _ROW_VALUES] for row in event["rows"]]
+            lines.append(dumpsJson(["r", event["rows"], values]))
+        fields = sorted(event["fields"] - {"table"})
+        if fields:
+            lines.append(dumpsJson(["f", {field: self._fieldValue(field) for field in fields}]))
+        if lines:
+            self._write(lines)
+
+    def _fieldValue(self, field: str):
+        if field == "methods":
+            return list(self.riskMap.methods) if self.riskMap.methods is not None else None
+        return getattr(self.riskMap, "_" + field)
+
+#======= Запись журнала =======#
+    def _open(self):
+        path: Optional[str] = self.riskMap.savePath
+        if self._file is not None and self._path == path:
+            return self._file
+        self.close()
+        self._path = path
+        signature = _fileSignature(path)
+        if signature is None:
+            return None
+        target: str = journalPath(path)
+        # Журнал того же файла (например, восстановленный при открытии) продолжается, иначе начинается заново
+        if _readHeader(target) == signature:
+            self._file = open(target, 'ab')
+        else:
+            self._file = open(target, 'wb')
+            self._file.write(dumpsJson({"journal": _JOURNAL_VERSION, "rsk": signature}) + b"\n")
+        return self._file
+
+    def _write(self, lines: list[bytes, ...]) -> None:
+        if not self.active:
+            return
+        try:
+            file = self._open()
+            if file is None:
+                return
+            file.write(b"\n".join(lines) + b"\n")
+            file.flush()
+            size: int = file.tell()
+        except OSError:
+            self.close()
+            self.failed = True
+            return
+        if size > self._nextCompaction:
+            self._nextCompaction = size + self.compactSize
+            self._onCompact(self.riskMap)
+
+
+def _readHeader(path: str) -> Optional[list[int, ...]]:
+    try:
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+    return header.get("rsk") if isinstance(header, dict) and header.get("journal") == _JOURNAL_VERSION else None
+
+
+#======= Восстановление карты по журналу =======#
+def recoverJournal(riskMap: RiskMap) -> int:
+    """
+    Применяет к карте, только что прочитанной из файла, журнал изменений этого файла, оставшийся после сбоя.
+    Журнал другой версии файла не применяется. Оборванная при сбое последняя запись отбрасывается
+    и обрезается в журнале, чтобы следующие записи дописывались после целых
+    :param riskMap: карта, загруженная из riskMap.savePath
+    :return: число применённых записей
+    """
+    path: Optional[str] = riskMap.savePath
+    if not path or not os.path.isfile(journalPath(path)):
+        return 0
+    target: str = journalPath(path)
+    if _readHeader(target) != _fileSignature(path):
+        return 0
+    applied: int = 0
+    with open(target, 'rb') as f:
+        f.readline()
+        valid: int = f.tell()
+        with riskMap.batch():
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                _applyRecord(riskMap, record)
+                applied += 1
+                valid += len(line)
+        torn: bool = valid < f.seek(0, os.SEEK_END)
+    if torn:
+        with open(target, 'r+b') as f:
+            f.truncate(valid)
+    if applied and riskMap._totals is not None:
+        riskMap.enableIncremental()
+    return applied
+
+
+def _applyRecord(riskMap: RiskMap, record: list) -> None:
+    kind = record[0]
+    if kind == "+":
+        for _ in record[1]:
+            riskMap.tableAddRecord()
+    elif kind == "-":
+        for row in record[1]:
+            riskMap.tableRemoveRecord(row)
+    elif kind == "m":
+        order: list[int, ...] = record[1]
+        table = riskMap.table
+        if isinstance(table, list):
+            table[:] = [table[row] for row in order]
+        else:
+            table.reorder(order)
+        riskMap._rowsReordered(order, len(order))
+    elif kind == "r":
+        for row, (danger, event, damagePts, susceptibilityPts, probabilityPts, weight, risk, rating) in zip(record[1], record[2]):
+            target = riskMap.table[row]
+            target._dangerId = db.internDangerKey(danger)
+            target._eventId = db.internEvent(event)
+            target._damagePts = damagePts
+            target._susceptibilityPts = susceptibilityPts
+            target._probabilityPts = probabilityPts
+            target._weight = weight
+            target._identifiedDangersRisks = risk
+            target._rating = rating
+            for field in _ROW_FIELDS:
+                riskMap._onRecordModified(target, field, row)
+    elif kind == "f":
+        fields: dict = record[1]
+        for field, value in fields.items():
+            if field == "methods":
+                riskMap.methods = value
+                riskMap._queueEvent(METHODS_CHANGED)
+            else:
+                setattr(riskMap, "_" + field, value)
+        riskMap._markModified(*fields)
@@ -1,11 +1,44 @@
-import json, os
-import gzip as gz
+import os
+from contextlib import contextmanager
 from .database import *
 from .database import database as db
-from typing import Optional
+from .rskStream import DEFAULT_CODEC, FORMAT_VERSION, RskReader, encodeRsk, writeFileAtomic
+from .scoring import MAX_PRODUCT, PRODUCTS, RATINGS, hundredthsRow, rating, ratingIndex, resultName
+from typing import Callable, Iterable, Iterator, Optional
+from itertools import islice
 import copy
 from pathlib import Path
 
+# Типы событий шины изменений таблицы (см. Table.subscribe)
+ROWS_INSERTED = "rowsInserted"
+ROWS_REMOVED = "rowsRemoved"
+ROWS_MOVED = "rowsMoved"
+FIELDS_CHANGED = "fieldsChanged"
+SUMMARY_CHANGED = "summaryChanged"
+METHODS_CHANGED = "methodsChanged"
+MAP_CHANGED = "mapChanged"
+MODIFIED_CHANGED = "modifiedChanged"
+CHANGED = "changed"
+# Поля таблицы, изменение которых означает SUMMARY_CHANGED
+SUMMARY_FIELDS = frozenset(("weightSum", "kFactor", "profRisk", "result", "resultStr"))
+# Порядок значений строки таблицы в файле .rsk v2
+ROW_COLUMNS = ("dangerId", "eventId", "damagePts", "susceptibilityPts", "probabilityPts", "weight", "identifiedDangersRisks", "rating")
+
+
+def _trimRow(row: list) -> list:
+    while row and row[-1] is None:
+        row.pop()
+    return row
+
+
+# Размер и время изменения файла (None, если файла нет)
+def _fileState(path: str) -> Optional[tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
 
 #============== Строка таблицы ==============#
 class Record:
@@ -13,60 +46,76 @@ class Record:
 #   Pts-поля и n выставляются автоматически,
 #   weight, identifiedDangerRisks и rating вычисляются
 #   изменения передаются в параметр isModified класса Table
-#   onModifiedCallback принимает в параметр функцию, меняющую стостояние триггера модификации
+#   onModifiedCallback принимает в параметр функцию, меняющую стостояние триггера модификации,
+#   она вызывается с записью, именем изменённого поля и индексом строки _row, который записи выставляет таблица
+#   Опасность и событие хранятся как идентификаторы в пулах строк справочника,
+#   качественные значения восстанавливаются по баллам, поэтому запись не держит копий длинных строк
+    __slots__ = ("_dangerId", "_eventId", "_damagePts", "_susceptibilityPts", "_probabilityPts",
+                 "_weight", "_identifiedDangersRisks", "_rating", "onModifiedCallback", "_row")
+
     def __init__(self, onModifiedCallback = None):
-        self._n = None
-        self._danger = None
-        self._event = None
-        self._damage = None
+        self._dangerId = None
+        self._eventId = None
         self._damagePts = None
-        self._susceptibility = None
         self._susceptibilityPts = None
-        self._probability = None
         self._probabilityPts = None
         self._weight = None
         self._identifiedDangersRisks = None
         self._rating = None
 
         self.onModifiedCallback = onModifiedCallback
+        self._row = None
 
 #======= Callback при изменении значений =======#
-    def _triggerOnModification(self):
+    def _triggerOnModification(self, field: str):
         if self.onModifiedCallback:
-            self.onModifiedCallback()
+            self.onModifiedCallback(self, field, self._row)
 
 #======= Геттеры и сеттеры =======#
 #   При некорректном вводе геттеры выставляют по-дефолту None,
 #   Сделано для надежности, хотя выбор значений и так происходит из заданных списков
     @property
     def n(self):
-        return self._n
+        return db.dangerParts(self._dangerId)[0] if self._dangerId is not None else None
 
     @property
     def danger(self):
-        return self._danger
+        return db.dangerParts(self._dangerId)[1] if self._dangerId is not None else None
 
     @danger.setter
     def danger(self, new_danger) -> None:
-        if new_danger in list(db.database.keys()):
-            self._danger = db.database[new_danger]["desc"]
-            self._n = db.database[new_danger]["No"]
-            self._event = None
-            self._triggerOnModification()
+        dangerId = db.dangerId(new_danger)
+        if dangerId is not None:
+            self._dangerId = dangerId
+            self._eventId = None
+            self._triggerOnModification("danger")
+
+#   Полный ключ опасности в справочнике ("N. Описание")
+    @property
+    def dangerKey(self) -> Optional[str]:
+        return db.dangerKey(self._dangerId)
+
+    @property
+    def dangerId(self) -> Optional[int]:
+        return self._dangerId
 
     @property
     def event(self):
-        return self._event
+        return db.eventText(self._eventId)
 
     @event.setter
     def event(self, newEvent):
-        if self._danger is not None and newEvent in list(db.database[f'{self._n}. {self.danger}']["events"].keys()):
-            self._event = newEvent
-            self._triggerOnModification()
+        if self._dangerId is not None and db.hasEvent(self.dangerKey, newEvent):
+            self._eventId = db.eventId(newEvent)
+            self._triggerOnModification("event")
+
+    @property
+    def eventId(self) -> Optional[int]:
+        return self._eventId
 
     @property
     def damage(self):
-        return self._damage
+        return DAMAGE_BY_PTS.get(self._damagePts)
 
     @property
     def damagePts(self):
@@ -74,14 +123,13 @@ class Record:
 
     @damage.setter
     def damage(self, newDamage) -> None:
-        if newDamage in list(DAMAGE.keys()) and self._event is not None:
-            self._damage = newDamage
+        if newDamage in DAMAGE and self._eventId is not None:
             self._damagePts = DAMAGE[newDamage]
-            self._triggerOnModification()
+            self._triggerOnModification("damage")
 
     @property
     def susceptibility(self):
-        return self._susceptibility
+        return SUSCEPTIBILITY_BY_PTS.get(self._susceptibilityPts)
 
     @property
     def susceptibilityPts(self):
@@ -89,14 +137,13 @@ class Record:
 
     @susceptibility.setter
     def susceptibility(self, newSusceptibility) -> None:
-        if newSusceptibility in list(SUSCEPTIBILITY.keys()) and self._event is not None:
-            self._susceptibility = newSusceptibility
+        if newSusceptibility in SUSCEPTIBILITY and self._eventId is not None:
             self._susceptibilityPts = SUSCEPTIBILITY[newSusceptibility]
-            self._triggerOnModification()
+            self._triggerOnModification("susceptibility")
 
     @property
     def probability(self):
-        return self._probability
+        return PROBABILITY_BY_PTS.get(self._probabilityPts)
 
     @property
     def probabilityPts(self):
@@ -104,10 +151,9 @@ class Record:
 
     @probability.setter
     def probability(self, newProbability) -> None:
-        if newProbability in list(PROBABILITY.keys()) and self._event is not None:
-            self._probability = newProbability
+        if newProbability in PROBABILITY and self._eventId is not None:
             self._probabilityPts = PROBABILITY[newProbability]
-            self._triggerOnModification()
+            self._triggerOnModification("probability")
 
     @property
     def weight(self):
@@ -116,7 +162,7 @@ class Record:
     @weight.setter
     def weight(self, newWeight: float) -> None:
         self._weight = round(float(newWeight), 2)
-        self._triggerOnModification()
+        self._triggerOnModification("weight")
 
     @property
     def identifiedDangersRisks(self):
@@ -125,7 +171,7 @@ class Record:
     @identifiedDangersRisks.setter
     def identifiedDangersRisks(self, newIdentifiedDangersRisks: float) -> None:
         self._identifiedDangersRisks = round(float(newIdentifiedDangersRisks), 2)
-        self._triggerOnModification()
+        self._triggerOnModification("identifiedDangersRisks")
 
     @property
     def rating(self):
@@ -134,15 +180,76 @@ class Record:
     @rating.setter
     def rating(self, newRating: str) -> None:
         self._rating = newRating
-        self._triggerOnModification()
+        self._triggerOnModification("rating")
 
 #======= Проверка записи на заполненность критически важных для вычислений полей и пустоту =======#
     def isNotFilled(self) -> bool:
-        return (self._n is None) or (self._danger is None) or (self._event is None) or (self._damage is None) or (self._susceptibility is None)\
-            or (self._probability is None) or (self._damagePts is None) or (self._susceptibilityPts is None) or (self._probabilityPts is None)
+        return (self._dangerId is None) or (self._eventId is None) or (self._damagePts is None)\
+            or (self._susceptibilityPts is None) or (self._probabilityPts is None)
 
     def isEmpty(self) -> bool:
-        return all((v is None or v == "") for v in vars(self).values())
+        return all(getattr(self, slot) in (None, "") for slot in self.__slots__ if slot != "onModifiedCallback" and slot != "_row")
+
+#============== Текущие суммы для инкрементального пересчёта ==============#
+class RunningTotals:
+#   Суммы по строкам таблицы, которые обновляются за O(1) при изменении одной строки:
+#   weightSum и productSum - суммы баллов вероятности и произведений D*S*P по заполненным строкам,
+#   productCounts - число строк с каждым произведением (1..125), unfilled - незаполненные непустые строки,
+#   keyCounts и duplicates - число строк на пару (опасность, событие) и число лишних повторов.
+#   Для каждой строки запоминается её вклад, поэтому при изменении или удалении строки вычитается именно он
+    def __init__(self, records: Iterable[Record] = ()):
+        self.rows: dict[int, Optional[tuple[tuple, int, int]]] = {}
+        self.weightSum: int = 0
+        self.productSum: int = 0
+        self.productCounts: list[int] = [0] * (MAX_PRODUCT + 1)
+        self.unfilled: set[int] = set()
+        self.keyCounts: dict[tuple, int] = {}
+        self.duplicates: int = 0
+        self.nonEmpty: int = 0
+        for record in records:
+            self.add(record)
+
+    def add(self, record: Record) -> None:
+        rowId = id(record)
+        if record.isEmpty():
+            self.rows[rowId] = None
+            return
+        self.nonEmpty += 1
+        key = (record._dangerId, record._eventId)
+        count = self.keyCounts.get(key, 0)
+        self.keyCounts[key] = count + 1
+        if count:
+            self.duplicates += 1
+        if record.isNotFilled():
+            self.unfilled.add(rowId)
+            self.rows[rowId] = (key, 0, 0)
+            return
+        product = PRODUCTS[record._damagePts][record._susceptibilityPts][record._probabilityPts]
+        self.weightSum += record._probabilityPts
+        self.productSum += product
+        self.productCounts[product] += 1
+        self.rows[rowId] = (key, record._probabilityPts, product)
+
+    def discard(self, record: Record) -> None:
+        rowId = id(record)
+        if rowId not in self.rows:
+            return
+        state = self.rows.pop(rowId)
+        if state is None:
+            return
+        key, probabilityPts, product = state
+        self.nonEmpty -= 1
+        count = self.keyCounts.pop(key) - 1
+        if count:
+            self.keyCounts[key] = count
+            self.duplicates -= 1
+        if rowId in self.unfilled:
+            self.unfilled.discard(rowId)
+            return
+        self.weightSum -= probabilityPts
+        self.productSum -= product
+        self.productCounts[product] -= 1
+
 
 #============== Таблица и её приложения ==============#
 class Table:
@@ -159,10 +266,176 @@ class Table:
         self._result = None
         self._resultStr = None
         self._isModified = False
+        # Отпечаток содержимого: хеши строк по порядку таблицы и их сумма с индексами строк обновляются
+        # по изменённым строкам, отпечаток последнего сохранения отличает действительные изменения
+        # от повторной записи тех же значений
+        self._rowDigests: Optional[list[int, ...]] = None
+        self._digestSum: int = 0
+        self._digestAll: bool = False
+        self._fingerprint: Optional[int] = None
+        self._savedFingerprint: Optional[int] = None
         self._methodModified = True
-
-    def _markModified(self):
+        self._totals: Optional[RunningTotals] = None
+        self._subscribers: dict[str, list[Callable[[dict], None]]] = {}
+        self._batchDepth: int = 0
+        self._pendingEvents: list[dict, ...] = []
+        self._pendingRows: set[int] = set()
+        self._pendingAllRecords: bool = False
+        self._pendingRecordFields: set[str] = set()
+        self._pendingFields: set[str] = set()
+        self._pendingChange: bool = False
+        self._notifiedModified: bool = False
+
+#======= Шина изменений =======#
+#   Подписчики получают события-словари с ключом "type" (константы ROWS_INSERTED ... CHANGED в начале модуля):
+#   ROWS_INSERTED {"rows"} и ROWS_REMOVED {"rows"} - индексы строк, удалённые идут по убыванию;
+#   ROWS_MOVED {"order"} - прежние индексы строк в новом порядке; FIELDS_CHANGED {"rows", "fields"} - поля строк;
+#   SUMMARY_CHANGED и MAP_CHANGED {"fields"} - итоги и прочие поля карты; METHODS_CHANGED {"removed"} - удалена
+#   одна методика, без "removed" - список методик заменён; MODIFIED_CHANGED {"isModified"} - признак изменения карты;
+#   CHANGED {"rows", "recordFields", "fields"} - сводка всех изменений ("table" в fields - строки добавлены,
+#   удалены или переставлены).
+#   Изменения копятся и рассылаются сразу, а внутри batch() - один раз при выходе из внешнего блока:
+#   события строк идут в порядке изменений, FIELDS_CHANGED - с индексами строк на момент рассылки
+    def subscribe(self, eventType: str, handler: Callable[[dict], None]) -> None:
+        handlers = self._subscribers.setdefault(eventType, [])
+        if handler not in handlers:
+            handlers.append(handler)
+
+    def unsubscribe(self, eventType: str, handler: Callable[[dict], None]) -> None:
+        handlers = self._subscribers.get(eventType)
+        if handlers and handler in handlers:
+            handlers.remove(handler)
+
+    def _notify(self, *fields: str) -> None:
+        self._pendingFields.update(fields)
+        if not self._batchDepth:
+            self._flushChanges()
+
+    def _markModified(self, *fields: str) -> None:
         self._isModified = True
+        self._fingerprint = None
+        self._pendingChange = True
+        self._notify(*fields)
+
+#   Текущее содержимое сохранено
+    def markUnmodified(self) -> None:
+        self.markSaved(self.fingerprint)
+
+#   Сохранено содержимое с отпечатком fingerprint (например, снимок при фоновом сохранении):
+#   карта остаётся изменённой, только если с тех пор её содержимое стало другим
+    def markSaved(self, fingerprint: int) -> None:
+        self._savedFingerprint = fingerprint
+        if self.fingerprint == fingerprint:
+            self._isModified = False
+        self._notify()
+
+    def _onRecordModified(self, record: Record, field: str, row: Optional[int] = None) -> None:
+        row = self._recordRow(record, row)
+        if row is not None:
+            self._pendingRows.add(row)
+            self._updateRowDigest(row)
+        self._pendingRecordFields.add(field)
+        self._markModified()
+
+#   Индекс строки записи в таблице (None - записи в таблице нет). Индекс, переданный записью, проверяется
+#   по таблице; если строки сдвинулись, индексы всех записей обновляются одним проходом
+    def _recordRow(self, record: Record, row: Optional[int]) -> Optional[int]:
+        table = self.table
+        if row is not None and row < len(table) and table[row] is record:
+            return row
+        for i, other in enumerate(table):
+            other._row = i
+        row = record._row
+        return row if row is not None and row < len(table) and table[row] is record else None
+
+#   Изменены поля fields у всех строк - например, после расчёта
+    def _markAllRecordsModified(self, *fields: str) -> None:
+        self._pendingAllRecords = True
+        self._digestAll = True
+        self._pendingRecordFields.update(fields)
+        self._markModified()
+
+    def _queueEvent(self, eventType: str, **payload) -> None:
+        if self._subscribers:
+            self._pendingEvents.append({"type": eventType, **payload})
+
+#   Таблица из count строк заменена строками с прежними индексами order в этом порядке: подписчики получают
+#   удаление выпавших строк и перестановку оставшихся (в индексах после удаления)
+    def _rowsReordered(self, order: list[int, ...], count: int) -> None:
+        digests = self._rowDigests
+        if digests is not None and len(digests) == count and not self._digestAll:
+            self._setRowDigests([digests[row] for row in order])
+        else:
+            self._digestAll = True
+        if self._pendingRows:
+            newRows: dict[int, int] = {row: i for i, row in enumerate(order)}
+            self._pendingRows = {newRows[row] for row in self._pendingRows if row in newRows}
+        if self._subscribers:
+            kept: list[int, ...] = sorted(order)
+            removed: list[int, ...] = sorted(set(range(count)).difference(kept), reverse=True)
+            if removed:
+                self._queueEvent(ROWS_REMOVED, rows=removed)
+            if order != kept:
+                rank: dict[int, int] = {row: i for i, row in enumerate(kept)}
+                self._queueEvent(ROWS_MOVED, order=[rank[row] for row in order])
+        self._markModified("table")
+
+#   Строки с индекса start добавлены загрузкой: это не изменение карты, но подписчики получают ROWS_INSERTED
+    def _rowsAppended(self, start: int) -> None:
+        digests = self._rowDigests
+        if digests is not None and len(digests) == start and not self._digestAll:
+            added: list[int, ...] = self._tableDigests(start)
+            self._digestSum += sum(map(hash, enumerate(added, start)))
+            digests.extend(added)
+        self._fingerprint = None
+        if len(self.table) > start:
+            self._queueEvent(ROWS_INSERTED, rows=list(range(start, len(self.table))))
+            self._notify("table")
+
+    @contextmanager
+    def batch(self) -> Iterator['Table']:
+        self._batchDepth += 1
+        try:
+            yield self
+        finally:
+            self._batchDepth -= 1
+            if not self._batchDepth:
+                self._flushChanges()
+
+    def _flushChanges(self) -> None:
+        events, fields, recordFields = self._pendingEvents, self._pendingFields, self._pendingRecordFields
+        pendingRows, allRecords, changed = self._pendingRows, self._pendingAllRecords, self._pendingChange
+        self._pendingEvents, self._pendingFields, self._pendingRecordFields = [], set(), set()
+        self._pendingRows, self._pendingAllRecords, self._pendingChange = set(), False, False
+        if not self._subscribers:
+            self._notifiedModified = self._isModified
+            return
+        rows: list[int, ...] = list(range(len(self.table))) if allRecords else sorted(pendingRows)
+        if rows:
+            events.append({"type": FIELDS_CHANGED, "rows": rows, "fields": recordFields})
+        if fields & SUMMARY_FIELDS:
+            events.append({"type": SUMMARY_CHANGED, "fields": fields & SUMMARY_FIELDS})
+        if fields - SUMMARY_FIELDS - {"table", "methods"}:
+            events.append({"type": MAP_CHANGED, "fields": fields - SUMMARY_FIELDS - {"table", "methods"}})
+        modified: bool = self.isModified
+        if modified != self._notifiedModified:
+            self._notifiedModified = modified
+            events.append({"type": MODIFIED_CHANGED, "isModified": modified})
+        if changed or events:
+            events.append({"type": CHANGED, "rows": rows, "recordFields": recordFields, "fields": fields})
+        for event in events:
+            for handler in list(self._subscribers.get(event["type"], ())):
+                handler(event)
+
+#   Копия карты не наследует подписчиков: это объекты интерфейса исходной карты
+    def __deepcopy__(self, memo: dict) -> 'Table':
+        clone = self.__class__.__new__(self.__class__)
+        memo[id(self)] = clone
+        for name, value in self.__dict__.items():
+            if name != "_subscribers":
+                clone.__dict__[name] = copy.deepcopy(value, memo)
+        clone._subscribers = {}
+        return clone
 
 #============== Геттеры и сеттеры, методы для добавления и удаления строк таблицы, удаления записи из списка методик ==============#
     @property
@@ -172,19 +445,45 @@ class Table:
     @weightSum.setter
     def weightSum(self, newWeightSum: int) -> None:
         self._weightSum = newWeightSum
-        self._markModified()
+        self._markModified("weightSum")
 
     def tableAddRecord(self) -> None:
-        self.table.append(Record(onModifiedCallback=self._markModified()))
-        self._markModified()
+        row: int = len(self.table)
+        record = Record(onModifiedCallback=self._onRecordModified)
+        record._row = row
+        self.table.append(record)
+        digests = self._rowDigests
+        if digests is not None and len(digests) == row and not self._digestAll:
+            digests.append(self._recordDigest(record))
+            self._digestSum += hash((row, digests[row]))
+        if self._totals is not None:
+            self._totals.add(self.table[-1])
+        self._queueEvent(ROWS_INSERTED, rows=[row])
+        self._markModified("table")
 
     def tableRemoveRecord(self, index: int) -> None:
-        self.table.pop(index)
-        self._markModified()
+        record = self.table.pop(index)
+        row: int = index % (len(self.table) + 1)
+        digests = self._rowDigests
+        if digests is not None and len(digests) == len(self.table) + 1 and not self._digestAll:
+            # Строки после удалённой сдвигаются на одну: их слагаемые суммы пересчитываются с новыми индексами
+            tail: list[int, ...] = digests[row:]
+            self._digestSum += sum(map(hash, enumerate(tail[1:], row))) - sum(map(hash, enumerate(tail, row)))
+            del digests[row]
+        else:
+            self._digestAll = True
+        if self._pendingRows:
+            self._pendingRows = {pending - (pending > row) for pending in self._pendingRows if pending != row}
+        if self._totals is not None:
+            self._totals.discard(record)
+            self.refreshTotals()
+        self._queueEvent(ROWS_REMOVED, rows=[row])
+        self._markModified("table")
 
     def methodsRemoveLine(self, index: int):
         self.methods.pop(index)
-        self._markModified()
+        self._queueEvent(METHODS_CHANGED, removed=index % (len(self.methods) + 1))
+        self._markModified("methods")
 
     @property
     def profRisk(self) -> float:
@@ -198,7 +497,9 @@ class Table:
     def kFactor(self, newKFactor: float) -> None:
         if newKFactor in (-1.0, 0.0, 1.0):
             self._kFactor = newKFactor
-            self._markModified()
+            self._markModified("kFactor")
+            if self._totals is not None:
+                self.refreshTotals()
 
     @property
     def result(self) -> float:
@@ -208,10 +509,55 @@ class Table:
     def resultStr(self) -> str:
         return self._resultStr
 
+#   Карта изменена, если после последнего сохранения что-то менялось и содержимое отличается от сохранённого:
+#   пересчёт без изменений или возврат прежнего значения не делают карту изменённой
     @property
     def isModified(self) -> bool:
+        if self._isModified and self._savedFingerprint is not None:
+            return self.fingerprint != self._savedFingerprint
         return self._isModified
 
+#======= Отпечаток содержимого =======#
+#   Отпечаток сравнивается только в пределах одного запуска (hash строк зависит от PYTHONHASHSEED).
+#   Строки входят в него суммой hash((индекс, хеш строки)): правка и добавление строки заменяют или добавляют
+#   одно слагаемое, поэтому стоимость не зависит от размера таблицы. Порядок строк учитывается индексами:
+#   слагаемые пересчитываются по сохранённым хешам только при перестановке строк (ROWS_MOVED) и для строк
+#   после удалённой; хеши всех строк заново - только после расчёта и замены таблицы
+    @property
+    def fingerprint(self) -> int:
+        if self._fingerprint is None:
+            if self._rowDigests is None or self._digestAll or len(self._rowDigests) != len(self.table):
+                self._setRowDigests(self._tableDigests())
+                self._digestAll = False
+            self._fingerprint = hash((self._fieldsDigest(), len(self._rowDigests), self._digestSum))
+        return self._fingerprint
+
+    def _setRowDigests(self, digests: list[int, ...]) -> None:
+        self._rowDigests = digests
+        self._digestSum = sum(map(hash, enumerate(digests)))
+
+#   Слагаемое строки row заменяется хешем её нового содержимого
+    def _updateRowDigest(self, row: int) -> None:
+        digests = self._rowDigests
+        if digests is None or self._digestAll or len(digests) != len(self.table):
+            return
+        digest: int = self._recordDigest(self.table[row])
+        self._digestSum += hash((row, digest)) - hash((row, digests[row]))
+        digests[row] = digest
+
+#   Хеши строк таблицы с индекса start
+    def _tableDigests(self, start: int = 0) -> list[int, ...]:
+        recordDigest = self._recordDigest
+        return [recordDigest(record) for record in islice(self.table, start, None)]
+
+    @staticmethod
+    def _recordDigest(record: Record) -> int:
+        return hash((record._dangerId, record._eventId, record._damagePts, record._susceptibilityPts, record._probabilityPts,
+                     record._weight, record._identifiedDangersRisks, record._rating))
+
+    def _fieldsDigest(self) -> int:
+        return hash((self._kFactor, self._profRisk, self._result, self._resultStr, tuple(self.methods or ())))
+
 #======= Вычисление результата =======#
 #   Удаляются полностью пустые записи ->
 #   Выполняется проверка на заполненность всех строк ->
@@ -219,63 +565,191 @@ class Table:
 #   Проводятся вычисления ->
 #   На основе вычислений формируются результат и список методик
     def calculate(self, updateMethods: bool = True) -> int:
+        with self.batch():
+            status: int = self._prepareCalculation()
+            if status != 1:
+                return status
+            self.weightSum: int = sum(record.probabilityPts for record in self.table)
+            # Риски и веса строк берутся из таблицы сотых для этого weightSum, рейтинг - по целочисленным порогам (см. scoring).
+            # Значения уже кратны сотым, поэтому пишутся в поля напрямую, а об изменении всех строк сообщается один раз
+            risks: tuple[int, ...] = hundredthsRow(self.weightSum)
+            for record in self.table:
+                product: int = PRODUCTS[record._damagePts][record._susceptibilityPts][record._probabilityPts]
+                record._weight = risks[record._probabilityPts] / 100
+                record._identifiedDangersRisks = risks[product] / 100
+                record._rating = RATINGS[ratingIndex(product, self.weightSum)]
+            self._markAllRecordsModified("weight", "identifiedDangersRisks", "rating")
+            profRisk: float = round(sum(record._identifiedDangersRisks for record in self.table), 2)
+            self._profRisk = profRisk
+            self._result = round(self._kFactor + self._profRisk, 2)
+            self._resultStr = resultName(self._result)
+            if updateMethods:
+                self.fillMethods()
+            self._markModified("profRisk", "result", "resultStr")
+            return 1
+
+#   Строки, которые оставит calculate(), без изменения таблицы: непустые, первые для своей пары (опасность, событие).
+#   None, если есть незаполненные строки
+    def calculableRecords(self) -> Optional[list[Record, ...]]:
+        seen: set[tuple] = set()
+        records: list[Record, ...] = []
+        for record in self.table:
+            if record.isEmpty():
+                continue
+            if record.isNotFilled():
+                return None
+            key: tuple = (record.dangerId, record.eventId)
+            if key not in seen:
+                seen.add(key)
+                records.append(record)
+        return records
+
+#   Подготовка таблицы к calculate (batchCalc повторяет её над упакованными массивами многих карт):
+#   -1 - таблица пуста, 0 - есть незаполненные строки, 1 - дубликаты удалены, строки отсортированы
+    def _prepareCalculation(self) -> int:
         self.removeEmptyRecords()
         self._markModified()
         if not self.table:
             return -1
+        for record in self.table:
+            if record.isNotFilled():
+                return 0
+        self.removeDuplicates()
+        # Ключ сортировки (номер, описание) вычисляется один раз на опасность, а не на каждую строку
+        sortKeys: dict[int, tuple[int, str]] = {}
+        dangerParts = db.dangerParts
+        for dangerId in {record.dangerId for record in self.table}:
+            n, desc = dangerParts(dangerId)
+            sortKeys[dangerId] = (int(n), desc)
+        table: list[Record, ...] = self.table
+        order: list[int, ...] = sorted(range(len(table)), key=lambda row: sortKeys[table[row].dangerId])
+        if any(row != i for i, row in enumerate(order)):
+            self.table = [table[row] for row in order]
+            self._rowsReordered(order, len(table))
+        return 1
+
+#======= Инкрементальный пересчёт =======#
+#   В инкрементальном режиме таблица поддерживает RunningTotals, и после изменения строки
+#   updateRecord пересчитывает weightSum, profRisk, result и resultStr без прохода по таблице.
+#   Риски строк округляются до сотых по отдельности, поэтому profRisk собирается из целого числа сотых
+#   по productCounts: это не больше 125 слагаемых и даёт то же значение, что и calculate().
+#   updateRecords после правки нескольких строк дополнительно выставляет рейтинги всех строк по новому weightSum.
+#   Строки, веса и методики не меняются - их пересчитывает полный calculate()
+    @property
+    def isIncremental(self) -> bool:
+        return self._totals is not None
+
+    def enableIncremental(self) -> int:
+        self._totals = RunningTotals(self.table)
+        return self.refreshTotals()
+
+    def disableIncremental(self) -> None:
+        self._totals = None
+
+    def updateRecord(self, record: Record) -> int:
+        if self._totals is None:
+            return self.enableIncremental()
+        self._totals.discard(record)
+        self._totals.add(record)
+        return self.refreshTotals()
+
+#   Правка вероятности меняет weightSum, а с ним рейтинг любой строки, поэтому рейтинги пересчитываются
+#   по всей таблице; изменённые рейтинги записываются в строки одним пакетом событий.
+#   Пока итоги не посчитаны (есть незаполненные строки), сбрасываются только рейтинги изменённых строк
+    def updateRecords(self, records: Iterable[Record]) -> int:
+        records = list(records)
+        if self._totals is None:
+            status = self.enableIncremental()
         else:
-            fillFlag: bool = False
+            for record in records:
+                self._totals.discard(record)
+                self._totals.add(record)
+            status = self.refreshTotals()
+        with self.batch():
+            for record in self.table if status == 1 else records:
+                newRating = self.recordRating(record) if status == 1 else None
+                if record.rating != newRating:
+                    record.rating = newRating
+        return status
+
+#   Коды совпадают с calculate(): -1 - нет непустых строк, 0 - есть незаполненные строки, 1 - итоги обновлены.
+#   Повторяющиеся пары (опасность, событие) нарушают инвариант сумм: calculate() оставил бы только первую из них,
+#   поэтому в этом случае суммы один раз пересобираются проходом по таблице
+    def refreshTotals(self) -> int:
+        if self._totals is None:
+            return self.enableIncremental()
+        totals = self._totals
+        if not totals.nonEmpty:
+            return -1
+        if totals.unfilled:
+            return 0
+        if totals.duplicates:
+            seen: set[tuple] = set()
+            unique: list[Record, ...] = []
             for record in self.table:
-                if record.isNotFilled():
-                    fillFlag = True
-                    break
-            if not fillFlag:
-                self.removeDuplicates()
-                self.table.sort(key=lambda x: (int(x.n), x.danger))
-                self.weightSum: int = sum(record.probabilityPts for record in self.table)
-                for record in self.table:
-                    record.weight = record.probabilityPts/self.weightSum
-                    record.identifiedDangersRisks = round(record.damagePts * record.susceptibilityPts * record.probabilityPts / self.weightSum, 2)
-                    record.rating ="Низкий" if record.identifiedDangersRisks <= 0.9 else \
-                                  ("Умеренный" if record.identifiedDangersRisks <= 1.8 else "Высокий")
-                profRisk: float = round(sum(record.identifiedDangersRisks for record in self.table), 2)
-                self._profRisk = profRisk
-                self._result = round(self._kFactor + self._profRisk, 2)
-                self._resultStr = "Низкий" if self._result <= 10.0 else ("Средний" if self._result < 15 else "Высокий")
-                if updateMethods:
-                    self.fillMethods()
-                self._markModified()
-                return 1
-            else:
-                return 0
+                key: tuple = (record.dangerId, record.eventId)
+                if key not in seen and not record.isEmpty():
+                    seen.add(key)
+                    unique.append(record)
+            totals = RunningTotals(unique)
+        weightSum = totals.weightSum
+        risks = hundredthsRow(weightSum)
+        hundredths = sum(count * risks[product] for product, count in enumerate(totals.productCounts) if count)
+        self._weightSum = weightSum
+        self._profRisk = round(hundredths / 100, 2)
+        self._result = round(self._kFactor + self._profRisk, 2)
+        self._resultStr = resultName(self._result)
+        self._markModified("weightSum", "profRisk", "result", "resultStr")
+        return 1
+
+#   Рейтинг одной строки по текущему weightSum инкрементального режима, как его выставил бы calculate()
+    def recordRating(self, record: Record) -> Optional[str]:
+        if self._totals is None or not self._weightSum or record.isNotFilled():
+            return None
+        return rating(PRODUCTS[record.damagePts][record.susceptibilityPts][record.probabilityPts], self._weightSum)
 
 #======= Заполнение списка методик =======#
     def fillMethods(self):
-        temp_methods: list[str, ...] = []
+        bits: int = 0
+        measureBits = db.measureBits
         for record in self.table:
-            if (record.rating is not None) and (record.rating == "Умеренный" or record.rating == "Высокий"):
-                temp_methods += db.database[f'{record.n}. {record.danger}']["events"][record.event]
-        temp_methods = list(set(temp_methods))
-        temp_methods.sort()
+            if record.rating == "Умеренный" or record.rating == "Высокий":
+                bits |= measureBits(record._dangerId, record._eventId)
+        self._setMethods(db.measureTexts(bits))
+
+#   Новый список методик; об изменении сообщается, только если он отличается от прежнего
+    def _setMethods(self, temp_methods: list[str, ...]) -> None:
         if self.methods != temp_methods:
             self._methodModified = True
+            self._queueEvent(METHODS_CHANGED)
+            self._markModified("methods")
         self.methods = temp_methods.copy()
 
 #======= Удаление дубликатов =======#
     def removeDuplicates(self) -> None:
         seen: set[tuple, ...] = set()
-        unique_records: list[Record, ...] = []
-        for record in self.table:
-            key : tuple = (record.n, record.danger, record.event)
+        rows: list[int, ...] = []
+        for row, record in enumerate(self.table):
+            key : tuple = (record.dangerId, record.eventId)
             if key not in seen:
                 seen.add(key)
-                unique_records.append(record)
-        self.table = unique_records
+                rows.append(row)
+        if len(rows) != len(self.table):
+            count: int = len(self.table)
+            self.table = [self.table[row] for row in rows]
+            self._rowsReordered(rows, count)
+            if self._totals is not None:
+                self._totals = RunningTotals(self.table)
 
 #======= Удаление пустых записей =======#
     def removeEmptyRecords(self) -> None:
-        if self.table:
-            self.table = [record for record in self.table if not record.isEmpty()]
+        rows: list[int, ...] = [row for row, record in enumerate(self.table) if not record.isEmpty()]
+        if len(rows) != len(self.table):
+            count: int = len(self.table)
+            self.table = [self.table[row] for row in rows]
+            self._rowsReordered(rows, count)
+            if self._totals is not None:
+                self._totals = RunningTotals(self.table)
 
 
 #============== Карта профессиональных рисков ==============#
@@ -295,8 +769,15 @@ class RiskMap(Table):
         self._toolsMaterials = None
         self._regulatoryDocs = REGULATORY_DOCS
         self._name = f"Новая карта {self._new_map_counter}"
+        # Путь, отпечаток, параметры записи и размер со временем изменения файла после последней записи:
+        # повторная запись того же содержимого в неизменённый с тех пор файл пропускается
+        self._writtenState: Optional[tuple] = None
         RiskMap._new_map_counter += 1
 
+    def _fieldsDigest(self) -> int:
+        return hash((super()._fieldsDigest(), self._mapNo, self._chairman, self._profession, self._structDivision,
+                     self._description, self._toolsMaterials))
+
 #======= Сеттеры и геттеры =======#
     @property
     def mapNo(self) -> str:
@@ -309,7 +790,7 @@ class RiskMap(Table):
                 self._mapNo = newMapNo
             else:
                 self._mapNo = None
-            self._markModified()
+            self._markModified("mapNo")
 
     @property
     def chairman(self):
@@ -318,7 +799,7 @@ class RiskMap(Table):
     @chairman.setter
     def chairman(self, newChairman: str) -> None:
         self._chairman = newChairman
-        self._markModified()
+        self._markModified("chairman")
 
     @property
     def profession(self):
@@ -327,7 +808,7 @@ class RiskMap(Table):
     @profession.setter
     def profession(self, newProfession: str) -> None:
         self._profession = newProfession
-        self._markModified()
+        self._markModified("profession")
 
     @property
     def structDivision(self):
@@ -336,7 +817,7 @@ class RiskMap(Table):
     @structDivision.setter
     def structDivision(self, newStructDivision: str) -> None:
         self._structDivision = newStructDivision
-        self._markModified()
+        self._markModified("structDivision")
 
     @property
     def description(self):
@@ -345,7 +826,7 @@ class RiskMap(Table):
     @description.setter
     def description(self, newDescription: str) -> None:
         self._description = newDescription
-        self._markModified()
+        self._markModified("description")
 
     @property
     def toolsMaterials(self):
@@ -354,7 +835,7 @@ class RiskMap(Table):
     @toolsMaterials.setter
     def toolsMaterials(self, newToolMaterials: str) -> None:
         self._toolsMaterials = newToolMaterials
-        self._markModified()
+        self._markModified("toolsMaterials")
 
     @property
     def name(self):
@@ -364,6 +845,7 @@ class RiskMap(Table):
     def name(self, newName: str):
         if newName is not None:
             self._name = newName
+            self._notify("name")
 
     @property
     def savePath(self):
@@ -375,17 +857,45 @@ class RiskMap(Table):
             self._savePath = newPath
 
     def getTabName(self) -> str:
-        return f"{self.name}{"*" if self._isModified else ""}.rsk"
+        return f"{self.name}{"*" if self.isModified else ""}.rsk"
 
 #======= Сериализация объекта в .rsk на основе JSON =======#
-    def saveToRsk(self, path: str, compressed: bool = True, name: str = None) -> bool:
+#   При storeIds строки таблицы хранят идентификаторы опасности и события из справочника с хешем db.json,
+#   а тексты использованных записей один раз пишутся в "strings" - по ним файл читается и при другом справочнике.
+#   storeIds=False сохраняет прежний формат с полными текстами в каждой строке.
+#   version=2 (по умолчанию) пишет компактный формат v2 (rskStream), version=1 и storeIds=False - документ v1.
+#   codec - кодек сжатия rskStream.CODECS ("gzip:6", "lzma", "zlib:1", "none"), по умолчанию DEFAULT_CODEC,
+#   а при compressed=False - без сжатия. Файл заменяется атомарно: при сбое во время записи остаётся прежняя версия
+    def saveToRsk(self, path: str, compressed: bool = True, name: str = None, storeIds: bool = True,
+                  version: int = FORMAT_VERSION, codec: str = None) -> bool:
         if path:
             self._savePath = path if path.lower().endswith(".rsk") else path+".rsk"
         if not self._savePath:
             return False
-        if name is None and self._name is None:
+        codec = codec or (DEFAULT_CODEC if compressed else "none")
+        options: tuple = (name, codec, storeIds, version)
+        if self._writtenState == (self._savePath, self.fingerprint, options, _fileState(self._savePath)):
+            self.markSaved(self.fingerprint)
+            return True
+        writeFileAtomic(self._savePath, encodeRsk(self.rskSnapshot(name, storeIds, version), codec))
+        self.markWritten(self._savePath, self.fingerprint, options)
+        return True
+
+#   Файл path записан из снимка с отпечатком fingerprint и параметрами записи options
+    def markWritten(self, path: str, fingerprint: int, options: tuple) -> None:
+        self._writtenState = (path, fingerprint, options, _fileState(path))
+        self.markSaved(fingerprint)
+
+#   Снимок карты для записи в .rsk: новые списки и словари из неизменяемых значений, не связанные с картой,
+#   поэтому кодировать и записывать снимок можно в другом потоке, пока карта редактируется
+    def rskSnapshot(self, name: str = None, storeIds: bool = True, version: int = FORMAT_VERSION) -> dict:
+        if name is None and self._name is None and self._savePath:
             name = Path(self._savePath).stem
-        data = {
+        if version >= 2 and storeIds:
+            data = {"version": FORMAT_VERSION, "catalogHash": db.catalogHash, "columns": list(ROW_COLUMNS)}
+        else:
+            data = {}
+        data.update({
             "mapNo": str(self._mapNo) if self._mapNo is not None else self._mapNo,
             "chairman": self._chairman,
             "profession": self._profession,
@@ -398,88 +908,266 @@ class RiskMap(Table):
             "result": self._result,
             "resultStr": self._resultStr,
             "name": name if name else self._name,
-            "table": [
-                {
-                    "n": record.n,
-                    "danger": record.danger,
-                    "event": record.event,
-                    "damage": record.damage,
-                    "damagePts": record.damagePts,
-                    "susceptibility": record.susceptibility,
-                    "susceptibilityPts": record.susceptibilityPts,
-                    "probability": record.probability,
-                    "probabilityPts": record.probabilityPts,
-                    "weight": record.weight,
-                    "identifiedDangersRisks": record.identifiedDangersRisks,
-                    "rating": record.rating,
-                }
-                for record in self.table
-            ],
-            "methods": self.methods
+            "methods": list(self.methods) if self.methods is not None else None
+        })
+        if storeIds:
+            data["catalogHash"] = db.catalogHash
+            data["strings"] = self._tableStrings()
+        # Таблица пишется последней: при потоковом чтении (RiskMapLoader) все поля карты известны до первой строки
+        data["table"] = self._tableToRows() if "version" in data else self._tableToJson(storeIds)
+        return data
+
+#   Строки таблицы и тексты использованных опасностей и событий для "table" и "strings" файла
+    def _tableToJson(self, storeIds: bool) -> list[dict, ...]:
+        return [self._recordToIds(record) if storeIds else self._recordToText(record) for record in self.table]
+
+    def _tableStrings(self) -> dict:
+        dangerIds = dict.fromkeys(record._dangerId for record in self.table)
+        eventIds = dict.fromkeys(record._eventId for record in self.table)
+        return {
+            "dangers": {str(dangerId): db.dangerKey(dangerId) for dangerId in dangerIds if dangerId is not None},
+            "events": {str(eventId): db.eventText(eventId) for eventId in eventIds if eventId is not None},
+        }
+
+#   Строки таблицы для v2: значения в порядке ROW_COLUMNS без завершающих None, рейтинг из RATINGS - его индексом
+    def _tableToRows(self) -> list[list, ...]:
+        # Снимок снимается в GUI-потоке при автосохранении, поэтому поля читаются напрямую, без свойств
+        ratingCodes: dict[str, int] = {name: code for code, name in enumerate(RATINGS)}
+        return [_trimRow([record._dangerId, record._eventId, record._damagePts, record._susceptibilityPts,
+                          record._probabilityPts, record._weight, record._identifiedDangersRisks,
+                          ratingCodes.get(record._rating, record._rating)]) for record in self.table]
+
+    @staticmethod
+    def _recordToText(record: Record) -> dict:
+        return {
+            "n": record.n,
+            "danger": record.danger,
+            "event": record.event,
+            "damage": record.damage,
+            "damagePts": record.damagePts,
+            "susceptibility": record.susceptibility,
+            "susceptibilityPts": record.susceptibilityPts,
+            "probability": record.probability,
+            "probabilityPts": record.probabilityPts,
+            "weight": record.weight,
+            "identifiedDangersRisks": record.identifiedDangersRisks,
+            "rating": record.rating,
+        }
+
+    @staticmethod
+    def _recordToIds(record: Record) -> dict:
+        return {
+            "dangerId": record.dangerId,
+            "eventId": record.eventId,
+            "damagePts": record.damagePts,
+            "susceptibilityPts": record.susceptibilityPts,
+            "probabilityPts": record.probabilityPts,
+            "weight": record.weight,
+            "identifiedDangersRisks": record.identifiedDangersRisks,
+            "rating": record.rating,
         }
-        if compressed:
-            jsonStr = json.dumps(data, ensure_ascii=False, indent=4)
-            with gz.open(self._savePath, 'wt', encoding='utf-8') as f:
-                f.write(jsonStr)
-        else:
-            with open(self._savePath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
-            f.close()
-        self._isModified = False
-        return True
+
+#   Идентификаторы из файла используются напрямую, только если файл сохранён с тем же справочником
+#   и идентификатор принадлежит справочнику; иначе опасность и событие ищутся по текстам из "strings".
+#   Строки старого формата без идентификаторов разбираются по полям n, danger и event
+    @staticmethod
+    def _resolveRecordIds(recordData: dict, catalogMatches: bool, strings: dict) -> tuple[Optional[int], Optional[int]]:
+        if "dangerId" not in recordData:
+            event = recordData.get("event")
+            return db.internDanger(recordData.get("n"), recordData.get("danger")), db.internEvent(event)
+        dangerId, eventId = recordData.get("dangerId"), recordData.get("eventId")
+        if dangerId is not None and not (catalogMatches and db.isCatalogDanger(dangerId)):
+            dangerId = db.internDangerKey(strings.get("dangers", {}).get(str(dangerId)))
+        if eventId is not None and not (catalogMatches and db.isCatalogEvent(eventId)):
+            eventId = db.internEvent(strings.get("events", {}).get(str(eventId)))
+        return dangerId, eventId
+
+#   Значения полей записей по столбцам документа (readRskColumns) в порядке слотов Record: идентификаторы
+#   опасностей и событий разрешаются, как в _resolveRecordIds, но по одному разу на значение, а не на строку
+    @staticmethod
+    def _valuesFromColumns(columns: dict[str, list], catalogMatches: bool, strings: dict) -> Iterator[tuple]:
+        count: int = max(map(len, columns.values()), default=0)
+        empty: list[None, ...] = [None] * count
+
+        def resolved(name: str, texts: dict, isCatalog: Callable, intern: Callable) -> Iterator[Optional[int]]:
+            values: list = columns.get(name) or empty
+            ids: dict = {value: value if value is None or (catalogMatches and isCatalog(value))
+                         else intern(texts.get(str(value))) for value in set(values)}
+            return map(ids.__getitem__, values)
+
+        ratings: list = columns.get("rating") or empty
+        names: dict = {rating: RATINGS[rating] if isinstance(rating, int) else rating for rating in set(ratings)}
+        return zip(resolved("dangerId", strings.get("dangers", {}), db.isCatalogDanger, db.internDangerKey),
+                   resolved("eventId", strings.get("events", {}), db.isCatalogEvent, db.internEvent),
+                   *(columns.get(name) or empty for name in ("damagePts", "susceptibilityPts", "probabilityPts",
+                                                               "weight", "identifiedDangersRisks")),
+                   map(names.__getitem__, ratings))
 
 #======= Чтение .rsk, создание нового объекта на основе сериализованных данных, добавление пути для автосохранения =======#
+#   Файл читается потоково (RiskMapLoader), поэтому в памяти не держится весь документ JSON
     @classmethod
-    def loadFromRsk(cls, path:str, compressed:bool=True) -> Optional['RiskMap']:
-        if path.lower().endswith(".rsk") and os.path.exists(path) and os.path.isfile(path) and (path is not None):
-            if compressed:
-                f = gz.open(path, 'rt', encoding='utf-8')
-            else:
-                f = open(path, 'r', encoding='utf-8')
-            data = json.load(f)
-            riskMap = cls()
+    def loadFromRsk(cls, path:str) -> Optional['RiskMap']:
+        loader = RiskMapLoader.open(path, mapClass=cls)
+        return loader.loadAll() if loader else None
+
+#   Карта из документа, уже прочитанного readRskDocument или readRskColumns (например, в другом процессе), -
+#   то же, что loadFromRsk(path)
+    @classmethod
+    def fromRskDocument(cls, path: str, data: dict) -> 'RiskMap':
+        riskMap = cls()
+        rows: list = data.get("table") or []
+        columns: Optional[list[str, ...]] = data.get("columns")
+        if columns:
+            rows = [dict(zip(columns, row)) if isinstance(row, list) else row for row in rows]
+        catalogMatches: bool = bool(db.catalogHash) and data.get("catalogHash") == db.catalogHash
+        with riskMap.batch():
             riskMap.name = os.path.split(path)[1].removesuffix(".rsk")
-            riskMap.mapNo = data.get("mapNo")
-            riskMap.chairman = data.get("chairman")
-            riskMap.profession = data.get("profession")
-            riskMap.structDivision = data.get("structDivision")
-            riskMap.description = data.get("description")
-            riskMap.toolsMaterials = data.get("toolsMaterials")
-            riskMap.kFactor = data.get("kFactor")
-            riskMap._profRisk = data.get("profRisk")
-            riskMap._result = data.get("result")
-            riskMap._resultStr = data.get("resultStr")
-            riskMap.methods = data.get("methods")
-            riskMap.name = data.get("name")
-            riskMap.table = []
-            for recordData in data.get("table", []):
-                record = Record(onModifiedCallback=riskMap._markModified())
-                record._n = recordData.get("n")
-                record._danger = recordData.get("danger")
-                record._event = recordData.get("event")
-                record._damage = recordData.get("damage")
-                record._damagePts = recordData.get("damagePts")
-                record._susceptibility = recordData.get("susceptibility")
-                record._susceptibilityPts = recordData.get("susceptibilityPts")
-                record._probability = recordData.get("probability")
-                record._probabilityPts = recordData.get("probabilityPts")
-                record._weight = recordData.get("weight")
-                record._identifiedDangersRisks = recordData.get("identifiedDangersRisks")
-                record._rating = recordData.get("rating")
-                riskMap.table.append(record)
-            riskMap._savePath = path
-            riskMap._isModified = False
-            f.close()
-            return riskMap
-        else:
-            return
+            riskMap._applyFileFields(data)
+            if "tableColumns" in data:
+                riskMap._appendFromColumns(data["tableColumns"], catalogMatches, data.get("strings") or {})
+            else:
+                riskMap._appendFromJson(rows, catalogMatches, data.get("strings") or {})
+        riskMap._savePath = path
+        riskMap.markUnmodified()
+        return riskMap
+
+#   Поля карты из заголовка файла; отсутствующие в data поля не меняются
+    def _applyFileFields(self, data: dict) -> None:
+        for field in ("mapNo", "chairman", "profession", "structDivision", "description", "toolsMaterials", "kFactor"):
+            if field in data:
+                setattr(self, field, data[field])
+        for field in ("profRisk", "result", "resultStr"):
+            if field in data:
+                setattr(self, "_" + field, data[field])
+        if data.keys() & {"profRisk", "result", "resultStr"}:
+            self._notify("profRisk", "result", "resultStr")
+        if data.get("methods") is not None:
+            self.methods = data["methods"]
+            self._queueEvent(METHODS_CHANGED)
+            self._notify("methods")
+        if "name" in data:
+            self.name = data["name"]
+
+    def _appendFromJson(self, rows: list[dict, ...], catalogMatches: bool, strings: dict) -> None:
+        start: int = len(self.table)
+        for recordData in rows:
+            record = Record(onModifiedCallback=self._onRecordModified)
+            self._recordFromJson(record, recordData, catalogMatches, strings)
+            record._row = len(self.table)
+            self.table.append(record)
+        self._rowsAppended(start)
+
+    def _appendFromColumns(self, columns: dict[str, list], catalogMatches: bool, strings: dict) -> None:
+        start: int = len(self.table)
+        callback = self._onRecordModified
+        for row, values in enumerate(self._valuesFromColumns(columns, catalogMatches, strings), start):
+            record = Record(onModifiedCallback=callback)
+            (record._dangerId, record._eventId, record._damagePts, record._susceptibilityPts, record._probabilityPts,
+             record._weight, record._identifiedDangersRisks, record._rating) = values
+            record._row = row
+            self.table.append(record)
+        self._rowsAppended(start)
+
+    @classmethod
+    def _recordFromJson(cls, record: Record, recordData: dict, catalogMatches: bool, strings: dict) -> None:
+        record._dangerId, record._eventId = cls._resolveRecordIds(recordData, catalogMatches, strings)
+        record._damagePts = recordData.get("damagePts", DAMAGE.get(recordData.get("damage")))
+        record._susceptibilityPts = recordData.get("susceptibilityPts", SUSCEPTIBILITY.get(recordData.get("susceptibility")))
+        record._probabilityPts = recordData.get("probabilityPts", PROBABILITY.get(recordData.get("probability")))
+        record._weight = recordData.get("weight")
+        record._identifiedDangersRisks = recordData.get("identifiedDangersRisks")
+        rating = recordData.get("rating")
+        record._rating = RATINGS[rating] if isinstance(rating, int) else rating
 
 #======= Автосохранение файла =======#
     def autoSave(self, compressed: bool = True) -> bool:
-        if self._isModified and self._savePath:
+        if self.isModified and self._savePath:
             return self.saveToRsk(self._savePath, compressed=compressed)
         return False
 
     @staticmethod
     def copy(other: 'RiskMap') -> 'RiskMap':
         return copy.deepcopy(other)
+
+
+#============== Потоковая загрузка карты ==============#
+class RiskMapLoader:
+#   Загрузка .rsk по частям: при открытии читаются только поля карты из заголовка (RskReader), и карту уже можно
+#   показать; строки таблицы добавляются пачками по chunkSize вызовами loadChunk, подписчики карты получают
+#   ROWS_INSERTED на каждую пачку. Пиковая память определяется размером пачки, а не размером файла.
+#   В файлах прежнего порядка полей хеш справочника и тексты "strings" записаны после таблицы - тогда они
+#   берутся предварительным проходом по файлу без сохранения строк. Путь сохранения и сброс признака
+#   изменения выставляются только после загрузки всех строк, чтобы автосохранение не записало неполную карту
+    DEFAULT_CHUNK_SIZE = 1000
+
+    def __init__(self, path: str, chunkSize: int = DEFAULT_CHUNK_SIZE, mapClass: type = None):
+        self.path = path
+        self._chunkSize = chunkSize
+        self._reader: Optional[RskReader] = RskReader(path)
+        self._strings: Optional[dict] = None
+        self._catalogMatches: bool = False
+        self.loadedRows: int = 0
+        self.riskMap: RiskMap = (mapClass or RiskMap)()
+        with self.riskMap.batch():
+            self.riskMap.name = os.path.split(path)[1].removesuffix(".rsk")
+            self.riskMap._applyFileFields(self._reader.header)
+        self._headerKeys: set[str] = set(self._reader.header)
+        self.riskMap.markUnmodified()
+        if not self._reader.hasRows:
+            self._finish()
+
+    @classmethod
+    def open(cls, path: str, chunkSize: int = DEFAULT_CHUNK_SIZE, mapClass: type = None) -> Optional['RiskMapLoader']:
+        if path and path.lower().endswith(".rsk") and os.path.isfile(path):
+            return cls(path, chunkSize, mapClass)
+        return None
+
+    @property
+    def done(self) -> bool:
+        return self._reader is None
+
+    def _resolveStrings(self, rows: list[dict, ...]) -> None:
+        header: dict = self._reader.header
+        if "catalogHash" not in header and any("dangerId" in row for row in rows):
+            with RskReader(self.path) as scan:
+                scan.skipRows()
+                header = {**header, **scan.header}
+        self._catalogMatches = bool(db.catalogHash) and header.get("catalogHash") == db.catalogHash
+        self._strings = header.get("strings") or {}
+
+#   Загружает следующую пачку строк, возвращает число добавленных строк
+    def loadChunk(self) -> int:
+        if self._reader is None:
+            return 0
+        rows: list[dict, ...] = self._reader.readRows(self._chunkSize)
+        if rows:
+            if self._strings is None:
+                self._resolveStrings(rows)
+            with self.riskMap.batch():
+                self.riskMap._appendFromJson(rows, self._catalogMatches, self._strings)
+            self.loadedRows += len(rows)
+        if not self._reader.hasRows:
+            self._finish()
+        return len(rows)
+
+    def _finish(self) -> None:
+        reader, self._reader = self._reader, None
+        tail: dict = {key: value for key, value in reader.header.items() if key not in self._headerKeys}
+        reader.close()
+        # Правки, сделанные пользователем во время загрузки, не сбрасываются
+        modified: bool = self.riskMap.isModified
+        with self.riskMap.batch():
+            self.riskMap._applyFileFields(tail)
+        self.riskMap._savePath = self.path
+        if not modified:
+            self.riskMap.markUnmodified()
+
+    def loadAll(self) -> RiskMap:
+        while self._reader is not None:
+            self.loadChunk()
+        return self.riskMap
+
+    def close(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
@@ -0,0 +1,456 @@
+import io
+import json
+import os
+import re
+import zlib
+from itertools import zip_longest
+from typing import Any, BinaryIO, Optional, TextIO
+
+# gzip, lzma, tempfile и orjson импортируются при первом использовании: их импорт заметно удлиняет
+# запуск приложения, а при импорте модулей backend файлы ещё не читаются и не пишутся
+_orjson: Any = False
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# Первые символы числа JSON и символы, которыми число может продолжаться
+_NUMBER_START = frozenset("-0123456789")
+_NUMBER_CHARS = re.compile(r"[0-9.eE+\-]*")
+# Размер порции текста, читаемой из файла за раз
+READ_SIZE = 1 << 16
+
+#======= Формат файла =======#
+#   v1 - документ JSON с отступами, строки таблицы - объекты с именами полей.
+#   v2 - строка MAGIC_V2, затем компактный документ JSON: "version" и "catalogHash" первыми полями,
+#   строки таблицы - массивы значений в порядке "columns" без завершающих null.
+#   Оба варианта пишутся любым кодеком сжатия (CODECS) или без сжатия; кодек и вариант определяются по первым
+#   байтам файла, а сами байты записывает формат сжатия: заголовок gzip, контейнер xz или заголовок потока zlib
+FORMAT_VERSION = 2
+MAGIC_GZIP = b"\x1f\x8b"
+MAGIC_XZ = b"\xfd7zXZ\x00"
+MAGIC_V2 = "RSK2\n"
+
+#======= Кодеки сжатия =======#
+#   Кодек задаётся строкой "имя" или "имя:уровень": gzip (уровень 1-9), lzma (пресет xz 0-9), zlib (поток zlib
+#   без обёртки gzip, уровень 0-9) и none - без сжатия. Уровень 9 gzip, прежний по умолчанию, заметно медленнее
+#   уровня 6 при почти том же размере сжатого JSON (python -m benchmarks.rskCodecs).
+#   Кодек сохранения по умолчанию задаётся переменной окружения AURA_RSK_CODEC
+CODECS = {"gzip": 6, "lzma": 6, "zlib": 6, "none": None}
+
+
+def parseCodec(codec: str) -> tuple[str, Optional[int]]:
+    """
+    Разбор строки кодека
+    :param codec: "имя" или "имя:уровень"
+    :return: имя кодека и уровень сжатия (None у none)
+    """
+    name, _, level = codec.lower().partition(":")
+    if name not in CODECS:
+        raise ValueError(f"Неизвестный кодек сжатия {codec!r}, доступны: {', '.join(CODECS)}")
+    if CODECS[name] is None:
+        return name, None
+    level = int(level) if level else CODECS[name]
+    if not (1 if name == "gzip" else 0) <= level <= 9:
+        raise ValueError(f"Недопустимый уровень сжатия {codec!r}")
+    return name, level
+
+
+def _defaultCodec() -> str:
+    codec: str = os.environ.get("AURA_RSK_CODEC") or "gzip:6"
+    try:
+        parseCodec(codec)
+    except ValueError:
+        # Опечатка в переменной окружения не должна мешать сохранению карт
+        return "gzip:6"
+    return codec
+
+
+DEFAULT_CODEC = _defaultCodec()
+
+
+def compressPayload(payload: bytes, codec: str = DEFAULT_CODEC) -> bytes:
+    """
+    Сжатие содержимого файла .rsk
+    :param payload: несжатые байты
+    :param codec: кодек сжатия
+    :return: байты файла
+    """
+    name, level = parseCodec(codec)
+    if name == "gzip":
+        import gzip as gz
+        # mtime=0: одинаковое содержимое даёт одинаковый файл
+        return gz.compress(payload, compresslevel=level, mtime=0)
+    if name == "lzma":
+        import lzma
+        return lzma.compress(payload, format=lzma.FORMAT_XZ, preset=level)
+    if name == "zlib":
+        return zlib.compress(payload, level)
+    return payload
+
+
+def detectCodec(head: bytes) -> str:
+    """
+    Кодек файла по первым байтам
+    :param head: не меньше шести первых байтов файла
+    :return: имя кодека
+    """
+    if head[:len(MAGIC_GZIP)] == MAGIC_GZIP:
+        return "gzip"
+    if head[:len(MAGIC_XZ)] == MAGIC_XZ:
+        return "lzma"
+    # Заголовок zlib: метод deflate с окном до 32 КБ и контрольная сумма заголовка, кратная 31.
+    # Несжатый документ начинается с "{", пробела или MAGIC_V2 и под это правило не подходит
+    if len(head) >= 2 and head[0] & 0x0F == 8 and head[0] >> 4 <= 7 and (head[0] << 8 | head[1]) % 31 == 0:
+        return "zlib"
+    return "none"
+
+
+def decompressPayload(payload: bytes) -> bytes:
+    """
+    Распаковка содержимого файла .rsk с определением кодека по первым байтам
+    :param payload: байты файла
+    :return: несжатые байты
+    """
+    codec: str = detectCodec(payload[:len(MAGIC_XZ)])
+    if codec == "gzip":
+        import gzip as gz
+        return gz.decompress(payload)
+    if codec == "lzma":
+        import lzma
+        return lzma.decompress(payload)
+    if codec == "zlib":
+        return zlib.decompress(payload)
+    return payload
+
+
+def openDecompressed(path: str) -> BinaryIO:
+    """
+    Открывает файл .rsk для потокового чтения распакованных байтов с определением кодека по первым байтам
+    :param path: путь к файлу
+    :return: двоичный поток с поддержкой seek(0)
+    """
+    with open(path, 'rb') as f:
+        codec: str = detectCodec(f.read(len(MAGIC_XZ)))
+    if codec == "gzip":
+        import gzip as gz
+        return gz.open(path, 'rb')
+    if codec == "lzma":
+        import lzma
+        return lzma.open(path, 'rb')
+    if codec == "zlib":
+        return io.BufferedReader(_ZlibReader(path))
+    return open(path, 'rb')
+
+
+class _ZlibReader(io.RawIOBase):
+#   Потоковая распаковка файла zlib порциями READ_SIZE. Как у GzipFile, seek к началу перезапускает распаковку;
+#   другие переходы не нужны openRskText и не поддерживаются
+    def __init__(self, path: str):
+        super().__init__()
+        self._file = open(path, 'rb')
+        self._rewind()
+
+    def _rewind(self) -> None:
+        self._file.seek(0)
+        self._decompressor = zlib.decompressobj()
+        self._pending = memoryview(b"")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            if self._decompressor.eof:
+                return 0
+            chunk = self._file.read(READ_SIZE)
+            if not chunk:
+                raise EOFError("Сжатый поток zlib оборван")
+            self._pending = memoryview(self._decompressor.decompress(chunk))
+        size: int = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        self._pos += size
+        return size
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR and offset == 0:
+            return self._pos
+        if whence != io.SEEK_SET or offset != 0:
+            raise io.UnsupportedOperation("Поток zlib поддерживает переход только к началу")
+        self._rewind()
+        return 0
+
+    def close(self) -> None:
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+def orjsonModule() -> Any:
+    """
+    Модуль orjson, импортируемый при первом вызове
+    :return: модуль или None, если orjson не установлен
+    """
+    global _orjson
+    if _orjson is False:
+        try:
+            import orjson
+        except ImportError:
+            orjson = None
+        _orjson = orjson
+    return _orjson
+
+
+def dumpsJson(data: Any) -> bytes:
+    """
+    Компактная сериализация в UTF-8: orjson, если установлен, иначе json из стандартной библиотеки
+    :param data: сериализуемые данные
+    :return: байты документа JSON
+    """
+    orjson = orjsonModule()
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loadsJson(payload: bytes) -> Any:
+    """
+    Разбор документа JSON из байтов UTF-8: orjson, если установлен, иначе json из стандартной библиотеки
+    :param payload: байты документа
+    :return: значение JSON
+    """
+    orjson = orjsonModule()
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def encodeRsk(data: dict, codec: str = DEFAULT_CODEC) -> bytes:
+    """
+    Содержимое файла .rsk для снимка карты (RiskMap.rskSnapshot): v2, если в снимке есть "version", иначе v1
+    :param data: снимок карты
+    :param codec: кодек сжатия (CODECS), "none" - без сжатия
+    :return: байты файла
+    """
+    if "version" in data:
+        payload: bytes = MAGIC_V2.encode("utf-8") + dumpsJson(data)
+    else:
+        payload = json.dumps(data, ensure_ascii=False, indent=4).encode("utf-8")
+    return compressPayload(payload, codec)
+
+
+def writeFileAtomic(path: str, payload: bytes) -> None:
+    """
+    Атомарная запись файла: данные пишутся во временный файл в той же папке, сбрасываются на диск (fsync)
+    и заменяют файл одним os.replace, поэтому файл всегда содержит либо прежнюю, либо новую версию целиком
+    :param path: путь к файлу
+    :param payload: содержимое
+    """
+    import shutil, tempfile
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmpPath = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp создаёт файл с правами 0600 - новый файл получает права прежнего
+        if os.path.exists(path):
+            shutil.copymode(path, tmpPath)
+        else:
+            os.chmod(tmpPath, 0o644)
+        os.replace(tmpPath, path)
+    except BaseException:
+        try:
+            os.remove(tmpPath)
+        except OSError:
+            pass
+        raise
+
+
+def openRskText(path: str) -> tuple[TextIO, int]:
+    """
+    Открывает файл .rsk как текст, определяя кодек сжатия и версию формата по первым байтам
+    :param path: путь к файлу
+    :return: текстовый поток, установленный на начало документа JSON, и версия формата
+    """
+    file: TextIO = io.TextIOWrapper(openDecompressed(path), encoding='utf-8')
+    try:
+        if file.read(len(MAGIC_V2)) == MAGIC_V2:
+            return file, 2
+        file.seek(0)
+    except Exception:
+        file.close()
+        raise
+    return file, 1
+
+
+def readRskDocument(path: str) -> dict:
+    """
+    Чтение файла .rsk целиком в документ JSON без построения карты: распаковка и разбор не обращаются
+    к справочнику, поэтому выполняются в любом процессе (bulkOpen). Строки таблицы v2 остаются массивами
+    в порядке "columns"
+    :param path: путь к файлу
+    :return: документ карты
+    """
+    with open(path, 'rb') as f:
+        payload: bytes = decompressPayload(f.read())
+    magic: bytes = MAGIC_V2.encode("utf-8")
+    if payload[:len(magic)] == magic:
+        payload = payload[len(magic):]
+    data = loadsJson(payload)
+    if not isinstance(data, dict):
+        raise ValueError(f"Файл {path} не является картой .rsk")
+    return data
+
+
+def readRskColumns(path: str) -> dict:
+    """
+    readRskDocument для открытия в другом процессе (bulkOpen): строки таблицы v2 перекладываются в столбцы
+    "tableColumns" {столбец: значения}, чтобы процесс, строящий карту, разрешал идентификаторы опасностей
+    и событий по одному разу на значение и заполнял записи без словаря на строку
+    :param path: путь к файлу
+    :return: документ карты; таблица без "columns" или со строками-словарями остаётся в "table"
+    """
+    data: dict = readRskDocument(path)
+    columns, rows = data.get("columns"), data.get("table") or []
+    if columns and all(isinstance(row, list) for row in rows):
+        # Строки v2 обрезаны по последнему непустому значению: недостающие значения - None
+        values: list[tuple, ...] = list(zip_longest(*rows))
+        data["tableColumns"] = {column: list(values[i]) if i < len(values) else [None] * len(rows)
+                                for i, column in enumerate(columns)}
+        data.pop("table", None)
+    return data
+
+
+class JsonStream:
+#   Последовательное чтение JSON из текстового потока: значения разбираются json.JSONDecoder.raw_decode
+#   прямо из буфера, а буфер дочитывается порциями, поэтому в памяти находится только текущее значение.
+#   Если значение не помещается в буфер, дочитывается не меньше уже накопленного, чтобы повторный разбор
+#   длинного значения оставался линейным
+    def __init__(self, file: TextIO, readSize: int = READ_SIZE):
+        self._file = file
+        self._readSize = readSize
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self, size: int) -> bool:
+        if self._eof:
+            return False
+        chunk = self._file.read(size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill(self._readSize):
+                return ""
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Ожидался один из символов {chars!r}, получено {char!r}")
+        self._pos += 1
+        return char
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill(max(self._readSize, len(self._buffer) - self._pos)):
+                    continue
+                raise
+            # Число, за которым в буфере нет разделителя, могло быть обрезано ("12." | "5") - дочитываем и разбираем заново
+            truncated = self._buffer[self._pos] in _NUMBER_START and _NUMBER_CHARS.match(self._buffer, end).end() == len(self._buffer)
+            if truncated and self._fill(self._readSize):
+                continue
+            self._pos = end
+            return value
+
+
+class RskReader:
+#   Потоковое чтение файла .rsk: поля карты, записанные до "table", читаются при открытии в header,
+#   строки таблицы выдаются пачками readRows, поля после таблицы добавляются в header, когда строки закончились.
+#   Строки v2 возвращаются словарями по "columns", как строки v1.
+#   В памяти одновременно находятся только заголовок, буфер чтения и текущая пачка строк
+    def __init__(self, path: str, readSize: int = READ_SIZE):
+        self._file, self.version = openRskText(path)
+        self._stream = JsonStream(self._file, readSize)
+        self.header: dict = {}
+        self._inTable = False
+        self._columns: Optional[list[str, ...]] = None
+        try:
+            self._stream.expect("{")
+            self._readFields()
+        except Exception:
+            self.close()
+            raise
+
+    def _readFields(self) -> None:
+        stream = self._stream
+        while True:
+            char = stream.peek()
+            if char == "}" or not char:
+                stream.expect("}")
+                return
+            if char == ",":
+                stream.expect(",")
+            key = stream.value()
+            stream.expect(":")
+            if key == "table" and stream.peek() == "[":
+                stream.expect("[")
+                self._inTable = True
+                self._columns = self.header.get("columns")
+                return
+            self.header[key] = stream.value()
+
+    @property
+    def hasRows(self) -> bool:
+        return self._inTable
+
+    def readRows(self, count: int) -> list[dict, ...]:
+        rows: list[dict, ...] = []
+        stream = self._stream
+        while self._inTable and len(rows) < count:
+            char = stream.peek()
+            if char == "]":
+                stream.expect("]")
+                self._inTable = False
+                self._readFields()
+                break
+            if char == ",":
+                stream.expect(",")
+            row = stream.value()
+            rows.append(dict(zip(self._columns, row)) if self._columns and isinstance(row, list) else row)
+        return rows
+
+    # Пропуск оставшихся строк: нужен, чтобы добраться до полей, записанных после таблицы
+    def skipRows(self, count: int = 4096) -> None:
+        while self._inTable:
+            self.readRows(count)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> 'RskReader':
+        return self
+
+    def __exit__(self, *args) -> Optional[bool]:
+        self.close()
+        return None
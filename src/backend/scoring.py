@@ -0,0 +1,59 @@
+from functools import lru_cache
+
+# Произведения баллов D*S*P для всех 125 сочетаний: PRODUCTS[d][s][p], нулевые индексы не используются
+PRODUCTS: tuple[tuple[tuple[int, ...], ...], ...] = tuple(
+    tuple(tuple(d * s * p for p in range(6)) for s in range(6)) for d in range(6))
+MAX_PRODUCT = 125
+RATINGS = ("Низкий", "Умеренный", "Высокий")
+RESULT_NAMES = ("Низкий", "Средний", "Высокий")
+
+
+def hundredths(value: int, weightSum: int) -> int:
+    """
+    Значение round(value / weightSum, 2) в целых сотых, вычисленное в целых числах.
+
+    Вне точной середины между сотыми результат определяется остатком от деления. В середине встроенный round
+    решает по двоичному представлению частного, поэтому этот редкий случай считается как в calculate()
+    :param value: произведение баллов или балл вероятности
+    :param weightSum: сумма баллов вероятности по карте
+    :return: число сотых
+    """
+    q, r = divmod(100 * value, weightSum)
+    if 2 * r < weightSum:
+        return q
+    if 2 * r > weightSum:
+        return q + 1
+    return round(round(value / weightSum, 2) * 100)
+
+
+@lru_cache(maxsize=4096)
+def hundredthsRow(weightSum: int) -> tuple[int, ...]:
+    """
+    Риски всех произведений 0..125 в целых сотых для одного weightSum
+    :param weightSum: сумма баллов вероятности по карте
+    :return: кортеж, индекс - произведение баллов
+    """
+    return tuple(hundredths(product, weightSum) for product in range(MAX_PRODUCT + 1))
+
+
+def ratingIndex(product: int, weightSum: int) -> int:
+    """
+    Рейтинг строки без деления: пороги round(product / weightSum, 2) <= 0.9 и <= 1.8, умноженные на 200 * weightSum.
+
+    Частные 0.905 и 1.805 в двоичном виде чуть больше и чуть меньше середины, поэтому round
+    отправляет первое вверх, а второе вниз - отсюда строгое и нестрогое сравнение
+    :return: 0 - низкий, 1 - умеренный, 2 - высокий
+    """
+    if 200 * product < 181 * weightSum:
+        return 0
+    if 200 * product <= 361 * weightSum:
+        return 1
+    return 2
+
+
+def rating(product: int, weightSum: int) -> str:
+    return RATINGS[ratingIndex(product, weightSum)]
+
+
+def resultName(result: float) -> str:
+    return "Низкий" if result <= 10.0 else ("Средний" if result < 15 else "Высокий")
@@ -0,0 +1,84 @@
+import numpy as np
+from typing import Optional
+from .riskMap import Table
+from .scoring import MAX_PRODUCT, hundredthsRow, resultName
+
+# Все 125 сочетаний баллов (тяжесть, подверженность, вероятность), баллы 1..5
+_COMBOS = np.array([(d, s, p) for d in range(1, 6) for s in range(1, 6) for p in range(1, 6)], dtype=np.int64)
+_COMBO_PRODUCTS = _COMBOS.prod(axis=1)
+
+
+def analyzeSensitivity(table: Table, limit: Optional[int] = 20, maxSteps: Optional[int] = None,
+                       bestPerRow: bool = True) -> list[dict]:
+    """
+    Анализ "что если": как изменятся profRisk, result и resultStr карты, если у одной строки
+    поменять баллы тяжести, подверженности и вероятности.
+
+    Для каждой строки сразу оцениваются все 125 сочетаний баллов. Изменение вероятности меняет weightSum,
+    а с ним риски всех строк карты; таких weightSum у строки всего пять, поэтому сумма рисков остальных строк
+    берётся из таблицы "произведение x weightSum" в целых сотых - так же, как её округляет calculate().
+    Таблица не изменяется
+    :param table: карта, все непустые строки которой заполнены
+    :param limit: сколько лучших вариантов вернуть (None - все)
+    :param maxSteps: наибольшее суммарное изменение баллов строки, например 1 - сдвиг одного параметра на шаг
+    :param bestPerRow: оставлять только лучший вариант для каждой строки
+    :return: варианты, уменьшающие result, от самого эффективного; строка задаётся индексом в table.table
+    """
+    rows = table.calculableRecords()
+    if not rows:
+        return []
+    pts = np.array([(r.damagePts, r.susceptibilityPts, r.probabilityPts) for r in rows], dtype=np.int64)
+    products = pts.prod(axis=1)
+    weightSum = int(pts[:, 2].sum())
+
+    # Риски в сотых для всех произведений 0..125 при weightSum - 4 .. weightSum + 4
+    sums = [weightSum + shift for shift in range(-4, 5)]
+    hundredths = np.array([hundredthsRow(ws) if ws > 0 else (0,) * (MAX_PRODUCT + 1) for ws in sums], dtype=np.int64).T
+    counts = np.bincount(products, minlength=MAX_PRODUCT + 1)
+    totals = counts @ hundredths
+    baseHundredths = int(totals[4])
+
+    # Индекс нового weightSum для каждой строки и сочетания: weightSum - P + p
+    columns = (4 - pts[:, 2])[:, None] + _COMBOS[None, :, 2]
+    newHundredths = (totals[columns] - hundredths[products[:, None], columns]
+                     + hundredths[_COMBO_PRODUCTS[None, :], columns])
+
+    steps = np.abs(_COMBOS[None, :, :] - pts[:, None, :]).sum(axis=2)
+    candidates = newHundredths < baseHundredths
+    if maxSteps is not None:
+        candidates &= steps <= maxSteps
+    rowIds, comboIds = np.nonzero(candidates)
+    if not rowIds.size:
+        return []
+    order = np.lexsort((steps[rowIds, comboIds], newHundredths[rowIds, comboIds]))
+    rowIds, comboIds = rowIds[order], comboIds[order]
+    if bestPerRow:
+        _, first = np.unique(rowIds, return_index=True)
+        keep = np.sort(first)
+        rowIds, comboIds = rowIds[keep], comboIds[keep]
+    if limit is not None:
+        rowIds, comboIds = rowIds[:limit], comboIds[:limit]
+
+    baseProfRisk = round(baseHundredths / 100, 2)
+    baseResult = round(table.kFactor + baseProfRisk, 2)
+    positions = {id(record): i for i, record in enumerate(table.table)}
+    report: list[dict] = []
+    for row, combo in zip(rowIds.tolist(), comboIds.tolist()):
+        record = rows[row]
+        profRisk = round(int(newHundredths[row, combo]) / 100, 2)
+        result = round(table.kFactor + profRisk, 2)
+        d, s, p = _COMBOS[combo].tolist()
+        report.append({
+            "row": positions[id(record)],
+            "danger": record.dangerKey,
+            "event": record.event,
+            "damagePts": (record.damagePts, d),
+            "susceptibilityPts": (record.susceptibilityPts, s),
+            "probabilityPts": (record.probabilityPts, p),
+            "steps": int(steps[row, combo]),
+            "profRisk": profRisk,
+            "result": result,
+            "resultStr": resultName(result),
+            "delta": round(result - baseResult, 2),
+        })
+    return report
@@ -0,0 +1,144 @@
+import numpy as np
+from math import sqrt
+from statistics import NormalDist
+from typing import Optional
+from .riskMap import Table
+from .scoring import MAX_PRODUCT, RESULT_NAMES, hundredthsRow
+
+# По умолчанию эксперты расходятся на одну категорию в подверженности и вероятности
+DEFAULT_DISTRIBUTION: dict[str, dict[int, float]] = {
+    "susceptibility": {-1: 0.15, 0: 0.7, 1: 0.15},
+    "probability": {-1: 0.15, 0: 0.7, 1: 0.15},
+}
+_FIELDS = ("damage", "susceptibility", "probability")
+# Смещение гистограммы: result * 100 не меньше -100 (kFactor = -1)
+_HIST_OFFSET = 100
+
+
+class _RiskHundredths:
+#   Риски строк в целых сотых (scoring.hundredthsRow) для всех weightSum, встретившихся в выборках.
+#   Столбцы для новых weightSum досчитываются по мере появления в выборке
+    def __init__(self):
+        self.columns: dict[int, int] = {}
+        self.table = np.zeros((MAX_PRODUCT + 1, 0), dtype=np.int64)
+
+    def lookup(self, weightSums: np.ndarray) -> np.ndarray:
+        unique = np.unique(weightSums)
+        missing = [int(ws) for ws in unique.tolist() if ws not in self.columns]
+        if missing:
+            block = np.array([hundredthsRow(ws) for ws in missing], dtype=np.int64).T
+            for ws in missing:
+                self.columns[ws] = len(self.columns)
+            self.table = np.concatenate((self.table, block), axis=1)
+        index = np.array([self.columns[int(ws)] for ws in unique.tolist()], dtype=np.int64)
+        return index[np.searchsorted(unique, weightSums)]
+
+
+def _shiftSampler(distribution: dict[int, float]) -> tuple[np.ndarray, np.ndarray]:
+    shifts = np.array(sorted(distribution), dtype=np.int64)
+    probabilities = np.array([distribution[shift] for shift in shifts.tolist()], dtype=np.float64)
+    if (probabilities < 0).any() or abs(probabilities.sum() - 1.0) > 1e-9:
+        raise ValueError("Вероятности смещений категории должны быть неотрицательными и в сумме давать 1")
+    return shifts, np.cumsum(probabilities)[:-1]
+
+
+def _quantile(histogram: np.ndarray, total: int, q: float) -> float:
+    position = int(np.searchsorted(np.cumsum(histogram), max(1, int(np.ceil(q * total)))))
+    return (position - _HIST_OFFSET) / 100
+
+
+def _accumulate(histogram: np.ndarray, values: np.ndarray) -> np.ndarray:
+    counts = np.bincount(values + _HIST_OFFSET)
+    if len(counts) > len(histogram):
+        histogram = np.concatenate((histogram, np.zeros(len(counts) - len(histogram), dtype=np.int64)))
+    histogram[:len(counts)] += counts
+    return histogram
+
+
+def simulateUncertainty(table: Table, samples: int = 1_000_000, seed: Optional[int] = None,
+                        distribution: Optional[dict[str, dict[int, float]]] = None,
+                        confidence: float = 0.95, batchSize: Optional[int] = None) -> dict:
+    """
+    Моделирование Монте-Карло неопределённости уровня риска рабочего места.
+
+    В каждой выборке баллы строк независимо сдвигаются на случайное число категорий (с ограничением 1..5),
+    затем карта пересчитывается целиком: weightSum, риски строк, profRisk, result и resultStr.
+    Выборки обрабатываются пачками NumPy; риски строк берутся в целых сотых, поэтому каждая выборка
+    даёт ровно то, что дал бы calculate() для карты с такими баллами
+    :param table: карта, все непустые строки которой заполнены
+    :param samples: число выборок
+    :param seed: зерно генератора для воспроизводимости
+    :param distribution: для "damage", "susceptibility", "probability" - вероятности смещений категории,
+        например {-1: 0.1, 0: 0.8, 1: 0.1}; не указанные параметры не меняются
+    :param confidence: уровень доверительных интервалов
+    :param batchSize: число выборок в пачке, по умолчанию около 4 млн значений на параметр
+    :return: вероятности категорий resultStr с доверительными интервалами, среднее, СКО и интервал result и profRisk
+    """
+    rows = table.calculableRecords()
+    if not rows:
+        raise ValueError("Карта пуста или не все обязательные поля заполнены")
+    distribution = DEFAULT_DISTRIBUTION if distribution is None else distribution
+    unknown = set(distribution) - set(_FIELDS)
+    if unknown:
+        raise ValueError(f"Неизвестные параметры распределения: {', '.join(sorted(unknown))}")
+    samplers = {field: _shiftSampler(distribution[field]) for field in _FIELDS if field in distribution}
+    kFactor = int(table.kFactor or 0)
+    pts = np.array([(r.damagePts, r.susceptibilityPts, r.probabilityPts) for r in rows], dtype=np.int64)
+    batchSize = batchSize or max(1, (1 << 22) // len(rows))
+    rng = np.random.default_rng(seed)
+    hundredths = _RiskHundredths()
+    profHistogram = np.zeros(0, dtype=np.int64)
+    resultHistogram = np.zeros(0, dtype=np.int64)
+
+    done = 0
+    while done < samples:
+        size = min(batchSize, samples - done)
+        sampled = []
+        for i, field in enumerate(_FIELDS):
+            column = np.broadcast_to(pts[:, i], (size, len(rows)))
+            if field in samplers:
+                shifts, bounds = samplers[field]
+                column = np.clip(column + shifts[np.searchsorted(bounds, rng.random((size, len(rows))), side="right")], 1, 5)
+            sampled.append(column)
+        products = sampled[0] * sampled[1] * sampled[2]
+        columns = hundredths.lookup(sampled[2].sum(axis=1))
+        profRisk = hundredths.table[products, columns[:, None]].sum(axis=1)
+        result = profRisk + 100 * kFactor
+        profHistogram = _accumulate(profHistogram, profRisk)
+        resultHistogram = _accumulate(resultHistogram, result)
+        done += size
+
+    values = (np.arange(len(resultHistogram)) - _HIST_OFFSET) / 100
+    low = resultHistogram[:_HIST_OFFSET + 1001].sum()
+    mid = resultHistogram[_HIST_OFFSET + 1001:_HIST_OFFSET + 1500].sum()
+    counts = (int(low), int(mid), int(samples - low - mid))
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    probabilities, intervals = {}, {}
+    for name, count in zip(RESULT_NAMES, counts):
+        # Интервал Уилсона для доли выборок в категории
+        p = count / samples
+        centre = (p + z * z / (2 * samples)) / (1 + z * z / samples)
+        half = z * sqrt(p * (1 - p) / samples + z * z / (4 * samples * samples)) / (1 + z * z / samples)
+        probabilities[name] = p
+        intervals[name] = (max(0.0, centre - half), min(1.0, centre + half))
+
+    def describe(histogram: np.ndarray) -> dict:
+        points = (np.arange(len(histogram)) - _HIST_OFFSET) / 100
+        mean = float((points * histogram).sum() / samples)
+        std = float(sqrt(max(0.0, (points * points * histogram).sum() / samples - mean * mean)))
+        tail = (1 - confidence) / 2
+        return {"mean": round(mean, 4), "std": round(std, 4),
+                "interval": (_quantile(histogram, samples, tail), _quantile(histogram, samples, 1 - tail))}
+
+    return {
+        "samples": samples,
+        "seed": seed,
+        "rows": len(rows),
+        "probabilities": probabilities,
+        "probabilityIntervals": intervals,
+        "profRisk": describe(profHistogram),
+        "result": describe(resultHistogram),
+        "mostLikely": RESULT_NAMES[int(np.argmax(counts))],
+        "resultRange": (float(values[np.nonzero(resultHistogram)[0][0]]), float(values[np.nonzero(resultHistogram)[0][-1]])),
+    }
+
@@ -8,39 +8,35 @@ from PySide6.QtCore import QTimer
 from src.ui.splash import SplashScreen
 from src.ui.mainMenu import MainMenuWindow
 from src.ui.riskTabs import RiskAnalysisMainWindow
-from src.backend.riskMap import RiskMap
+from src.backend.database import database
 import sys
 import os.path
+import threading
+import multiprocessing
 
 
 if __name__ == '__main__':
+    # Пул процессов открытия карт (bulkOpen) в собранном приложении
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
 
     if len(sys.argv) > 1 and sys.argv[1] == '--register':
         app_path = sys.executable
         sys.exit(0)
 
-    file_to_open = None
-    if len(sys.argv) > 1 and sys.argv[1].endswith('.rsk') and os.path.exists(sys.argv[1]):
-        file_to_open = sys.argv[1]
+    files_to_open = [arg for arg in sys.argv[1:] if arg.endswith('.rsk') and os.path.exists(arg)]
 
     splash = SplashScreen()
     splash.show()
+    threading.Thread(target=database.preload, daemon=True).start()
 
 
     def setup():
         main_menu = MainMenuWindow()
-        if file_to_open:
+        if files_to_open:
             risk_window = RiskAnalysisMainWindow(createDefaultMap=False)
             risk_window.setRecentFilesManager(main_menu.recentFilesManager)
-            risk_map = RiskMap.loadFromRsk(path=file_to_open)
-            if risk_map:
-                risk_window.riskMaps.append(risk_map)
-                tab = risk_window.RiskMapTab(risk_map)
-                risk_window.tabWidget.addTab(tab, risk_map.getTabName())
-                risk_window.tabWidget.setCurrentIndex(len(risk_window.riskMaps) - 1)
-                risk_window._currentMapIndex = len(risk_window.riskMaps) - 1
-                tab.updateFormFromRisk()
+            risk_window.openRiskMapFiles(files_to_open)
             risk_window.showMaximized()
             splash.finish(risk_window)
         else:
@@ -2,7 +2,6 @@ from pathlib import Path
 from .resources import TEMPLATES_FOLDER
 from PySide6.QtWidgets import  QFileDialog
 import sys, os
-from ..backend import riskMap
 
 class ActionHandler:
     def __init__(self, mainWindow):
@@ -31,33 +30,21 @@ class ActionHandler:
         else:
             return
 
+    # Можно выбрать несколько файлов: они открываются параллельно, вкладки добавляются по мере готовности карт
     def onOpen(self):
-        filePath, _ = QFileDialog.getOpenFileName(self.mainWindow,
-                                                  "Открыть файл карты рисков",
-                                                  "",
-                                                  "Файлы карт рисков (*.rsk)")
-        if not filePath:
+        filePaths, _ = QFileDialog.getOpenFileNames(self.mainWindow,
+                                                    "Открыть файлы карт рисков",
+                                                    "",
+                                                    "Файлы карт рисков (*.rsk)")
+        if not filePaths:
             return
-        risk_map = riskMap.RiskMap.loadFromRsk(path=filePath)
-        if risk_map:
-            risk_map.savePath = None
-            risk_map._isModified = False
-            if hasattr(self.mainWindow, "recentFilesManager"):
-                self.mainWindow.recentFilesManager.addFile(filePath)
-            existing_names = {rm.name for rm in self.mainWindow.riskMaps}
-            base_name = risk_map.name
-            counter = 1
-            while risk_map.name in existing_names:
-                risk_map.name = f"{base_name} ({counter})"
-                counter += 1
-            newTab = self.mainWindow.RiskMapTab(risk_map)
-            self.mainWindow.riskMaps.append(risk_map)
-            self.mainWindow.tabWidget.addTab(newTab, risk_map.getTabName())
-            self.mainWindow.tabWidget.setCurrentIndex(len(self.mainWindow.riskMaps) - 1)
-            self.mainWindow._currentMapIndex = len(self.mainWindow.riskMaps) - 1
-            newTab.updateFormFromRisk()
-            newTab._methodModified = False
-            newTab.riskMap._isModified = False
+        self.mainWindow.openRiskMapFiles(filePaths, keepSavePath=False)
+
+    # Фоновое автосохранение этой карты завершается до явного сохранения, чтобы не заменить файл после него
+    def _waitAutoSave(self, risk_map):
+        autoSaver = getattr(self.mainWindow, "autoSaver", None)
+        if autoSaver:
+            autoSaver.wait(risk_map)
 
     def onSave(self):
         risk_map = self.mainWindow.currentRiskMap()
@@ -68,6 +55,7 @@ class ActionHandler:
             self.onSaveAs()
             return
 
+        self._waitAutoSave(risk_map)
         risk_map.saveToRsk(risk_map.savePath)
         if hasattr(self.mainWindow, "recentFilesManager") and self.mainWindow.recentFilesManager:
             self.mainWindow.recentFilesManager.addFile(risk_map.savePath)
@@ -85,6 +73,7 @@ class ActionHandler:
         if not savePath:
             return
 
+        self._waitAutoSave(risk_map)
         risk_map.name = Path(savePath).stem
         risk_map.savePath = savePath
         risk_map.saveToRsk(savePath)
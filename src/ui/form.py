@@ -1,13 +1,31 @@
 from PySide6.QtWidgets import (
     QGridLayout, QHeaderView, QLineEdit, QPushButton, QScrollArea, QSizePolicy,
     QTableWidgetItem, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QFrame, QTableWidget, QStyledItemDelegate, QComboBox,
-    QCompleter)
-from PySide6.QtCore import Qt
-from src.backend.riskMap import RiskMap
+    QCompleter, QCheckBox)
+from PySide6.QtCore import Qt, QStringListModel, QTimer, Signal
+from src.backend.riskMap import FIELDS_CHANGED, METHODS_CHANGED, ROWS_INSERTED, ROWS_MOVED, ROWS_REMOVED, \
+    SUMMARY_CHANGED, RiskMap
 import src.backend.database as database
 from src.backend.database import database as db
 
 
+class CatalogCompleter(QCompleter):
+    # Комплитер для опасностей и событий: вместо MatchContains по сырым строкам
+    # список подсказок берётся из ранжированного полнотекстового индекса справочника
+    def __init__(self, kind: str, danger: str = None, parent=None):
+        super().__init__(parent)
+        self._kind = kind
+        self._danger = danger
+        self._model = QStringListModel(self)
+        self.setModel(self._model)
+        self.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.setMaxVisibleItems(15)
+
+    def updateQuery(self, text: str):
+        self._model.setStringList(db.search(text, kind=self._kind, danger=self._danger))
+        self.complete()
+
+
 class RiskDataTableHorizontalHeaderView(QHeaderView):
     def __init__(self, parent: QWidget):
         super().__init__(Qt.Orientation.Horizontal, parent)
@@ -30,6 +48,15 @@ class RiskDataTableHorizontalHeaderView(QHeaderView):
 
 
 class RiskDataTable(QTableWidget):
+#   В режиме расчёта при вводе изменённые строки копятся в _pendingRows и по таймеру передаются
+#   в инкрементальный пересчёт карты; перерисовываются только рейтинги этих строк,
+#   итоги передаются форме сигналом liveTotalsChanged с кодом результата расчёта.
+#   Строки виджета следуют за картой по событиям её шины изменений: добавление, удаление и перестановка строк
+#   и изменение полей меняют только затронутые строки и ячейки, а не перестраивают таблицу
+    liveTotalsChanged = Signal(int)
+    LIVE_DEBOUNCE_MS = 150
+    FIELD_COLUMNS = {"danger": 2, "event": 3, "damage": 4, "susceptibility": 5, "probability": 6, "rating": 7}
+
     def __init__(self, parent: QWidget, riskMap: RiskMap):
         self._column_names = [
             '',
@@ -43,6 +70,12 @@ class RiskDataTable(QTableWidget):
         ]
         super().__init__(1, len(self._column_names), parent)
         self.riskMap = riskMap
+        self._liveMode = False
+        self._pendingRows: set[int] = set()
+        self._liveTimer = QTimer(self)
+        self._liveTimer.setSingleShot(True)
+        self._liveTimer.setInterval(self.LIVE_DEBOUNCE_MS)
+        self._liveTimer.timeout.connect(self._flushLiveUpdates)
         self._setupUI()
         self._setup_connections()
 
@@ -54,6 +87,10 @@ class RiskDataTable(QTableWidget):
         self.setItemDelegateForColumn(7, self.ReadOnlyDelegate(self))
 
         self._initialize_default_row()
+        self.riskMap.subscribe(ROWS_INSERTED, self._onRowsInserted)
+        self.riskMap.subscribe(ROWS_REMOVED, self._onRowsRemoved)
+        self.riskMap.subscribe(ROWS_MOVED, self._onRowsMoved)
+        self.riskMap.subscribe(FIELDS_CHANGED, self._onFieldsChanged)
 
     def _setupUI(self):
         self.setStyleSheet("""
@@ -176,9 +213,11 @@ class RiskDataTable(QTableWidget):
 
             if index.column() == 2:
                 editor.addItems(db.getDangers())
+                self._setCatalogCompleter(editor, "danger")
             elif index.column() == 3:
                 danger_item = self.parent_table.item(index.row(), 2).text()
                 editor.addItems(db.getEvents(danger_item))
+                self._setCatalogCompleter(editor, "event", danger_item)
             elif index.column() == 4:
                 editor.addItems(list(database.DAMAGE.keys()))
             elif index.column() == 5:
@@ -187,6 +226,12 @@ class RiskDataTable(QTableWidget):
                 editor.addItems(list(database.PROBABILITY.keys()))
             return editor
 
+        @staticmethod
+        def _setCatalogCompleter(editor: QComboBox, kind: str, danger: str = None):
+            completer = CatalogCompleter(kind, danger, editor)
+            editor.setCompleter(completer)
+            editor.lineEdit().textEdited.connect(completer.updateQuery)
+
         def setEditorData(self, editor, index):
             value = index.model().data(index, Qt.DisplayRole)
             if value:
@@ -205,19 +250,46 @@ class RiskDataTable(QTableWidget):
     def _onCellChanged(self,  row, column):
         if row == self.rowCount() - 1:
             return
-        if column == 2:
-            self._updateDanger(row)
-        elif column == 3:
-            self._updateEvent(row)
-        elif column in (4, 5, 6):
-            self._updateRiskParams(row)
+        with self.riskMap.batch():
+            if column == 2:
+                self._updateDanger(row)
+            elif column == 3:
+                self._updateEvent(row)
+            elif column in (4, 5, 6):
+                self._updateRiskParams(row)
+        if self._liveMode and column in (2, 3, 4, 5, 6):
+            self._pendingRows.add(row)
+            self._liveTimer.start()
+
+#======= Расчёт при вводе =======#
+    @property
+    def liveMode(self) -> bool:
+        return self._liveMode
+
+    def setLiveMode(self, enabled: bool):
+        self._liveMode = enabled
+        self._pendingRows.clear()
+        self._liveTimer.stop()
+        if enabled:
+            self.liveTotalsChanged.emit(self.riskMap.enableIncremental())
+        else:
+            self.riskMap.disableIncremental()
+
+    def _flushLiveUpdates(self):
+        self._liveTimer.stop()
+        rows = sorted(row for row in self._pendingRows if row < len(self.riskMap.table))
+        self._pendingRows.clear()
+        if not rows:
+            return
+        # Рейтинги всех строк записываются в карту, ячейки перерисовывает обработчик FIELDS_CHANGED
+        self.liveTotalsChanged.emit(self.riskMap.updateRecords(self.riskMap.table[row] for row in rows))
 
     def _updateDanger(self, row: int):
         dangerItem = self.item(row, 2)
         if not dangerItem:
             return
         danger = dangerItem.text()
-        if danger in db.getDangers():
+        if db.hasDanger(danger):
             self.item(row, 2).setText(danger)
             self.setItem(row, 3, QTableWidgetItem(""))
             self.setItem(row, 4, QTableWidgetItem(""))
@@ -231,7 +303,7 @@ class RiskDataTable(QTableWidget):
             self.setItem(row, 4, QTableWidgetItem(""))
             self.setItem(row, 5, QTableWidgetItem(""))
             self.setItem(row, 6, QTableWidgetItem(""))
-        self.riskMap._isModified = True
+        self.riskMap._markModified()
 
     def _updateEvent(self, row):
         event_item = self.item(row, 3)
@@ -240,14 +312,14 @@ class RiskDataTable(QTableWidget):
             return
         event = event_item.text()
         danger = danger_item.text()
-        if danger in db.getDangers() and event in db.getEvents(danger):
+        if db.hasEvent(danger, event):
             record = self._getOrCreateRecord(row)
             record.event = event
         else:
             self.setItem(row, 4, QTableWidgetItem(""))
             self.setItem(row, 5, QTableWidgetItem(""))
             self.setItem(row, 6, QTableWidgetItem(""))
-        self.riskMap._isModified = True
+        self.riskMap._markModified()
 
     def _updateRiskParams(self, row):
         for col in range(4, 7):
@@ -256,17 +328,17 @@ class RiskDataTable(QTableWidget):
 
         record = self._getOrCreateRecord(row)
         damage = self.item(row, 4).text()
-        if damage in list(database.DAMAGE.keys()):
+        if damage in database.DAMAGE:
            record.damage = damage
 
         susceptibility = self.item(row, 5).text()
-        if susceptibility in list(database.SUSCEPTIBILITY.keys()):
+        if susceptibility in database.SUSCEPTIBILITY:
             record.susceptibility = susceptibility
 
         probability = self.item(row, 6).text()
-        if probability in list(database.PROBABILITY.keys()):
+        if probability in database.PROBABILITY:
             record.probability = probability
-        self.riskMap._isModified = True
+        self.riskMap._markModified()
 
     def _getOrCreateRecord(self, row):
         if row >= len(self.riskMap.table):
@@ -295,12 +367,12 @@ class RiskDataTable(QTableWidget):
         self.update_custom_numbering()
         self.updateHeight()
 
-    # Добавление строки в таблицу
+    # Добавление строки в таблицу: строку виджета вставляет обработчик события карты
     def add_row(self):
-        row_index = self.rowCount() - 1
-        self.insertRow(row_index)
         self.riskMap.tableAddRecord()
 
+    def _insertRowWidgets(self, row_index: int):
+        self.insertRow(row_index)
         remove_button = QPushButton('-')
         remove_button.setObjectName('ManageRowButtonDelete')
         remove_button.clicked.connect(self.on_remove_row_clicked)
@@ -317,24 +389,81 @@ class RiskDataTable(QTableWidget):
 
             self.setItem(row_index, col, item)
 
+    # Тексты ячеек строки по записи карты; сигналы блокируются, чтобы не вызвать обратную запись в карту
+    def _setRowTexts(self, row: int, record, columns=(2, 3, 4, 5, 6, 7)):
+        values = {2: record.dangerKey, 3: record.event, 4: record.damage, 5: record.susceptibility,
+                  6: record.probability, 7: record.rating}
+        wasBlocked = self.blockSignals(True)
+        for col in columns:
+            text = values[col] or ""
+            item = self.item(row, col)
+            if item is None:
+                item = QTableWidgetItem(text)
+                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                self.setItem(row, col, item)
+            elif item.text() != text:
+                item.setText(text)
+        self.blockSignals(wasBlocked)
+
+    # Полное построение строк по карте - при открытии вкладки
+    def loadRows(self):
+        wasBlocked = self.blockSignals(True)
+        self.setRowCount(0)
+        for row, record in enumerate(self.riskMap.table):
+            self._insertRowWidgets(row)
+            self._setRowTexts(row, record)
+        self._initialize_default_row()
+        self.blockSignals(wasBlocked)
+
+#======= Обработчики событий карты =======#
+    def _onRowsInserted(self, event: dict):
+        for row in event["rows"]:
+            # Строка могла быть уже добавлена в виджет до появления записи в карте (_getOrCreateRecord)
+            if self.rowCount() - 1 < len(self.riskMap.table):
+                self._insertRowWidgets(row)
+                self._setRowTexts(row, self.riskMap.table[row])
+        self.update_custom_numbering()
+        self.updateHeight()
+
+    def _onRowsRemoved(self, event: dict):
+        for row in event["rows"]:
+            if row < self.rowCount() - 1:
+                self.removeRow(row)
+        self._pendingRows = {row for row in self._pendingRows if row < len(self.riskMap.table)}
         self.update_custom_numbering()
         self.updateHeight()
 
-    # Удаление строк из таблицы по кнопке
+    def _onRowsMoved(self, event: dict):
+        for row, oldRow in enumerate(event["order"]):
+            if row != oldRow and row < len(self.riskMap.table):
+                self._setRowTexts(row, self.riskMap.table[row])
+
+    def _onFieldsChanged(self, event: dict):
+        columns = sorted({self.FIELD_COLUMNS[field] for field in event["fields"] if field in self.FIELD_COLUMNS})
+        if not columns:
+            return
+        for row in event["rows"]:
+            if row < len(self.riskMap.table) and row < self.rowCount() - 1:
+                self._setRowTexts(row, self.riskMap.table[row], columns)
+
+    # Удаление строк из таблицы по кнопке: строку виджета удаляет обработчик события карты
     def on_remove_row_clicked(self):
         button = self.sender()
         if button:
+            if self._liveMode:
+                self._flushLiveUpdates()
             for row in range(self.rowCount() - 1):
                 if self.cellWidget(row, 0) == button:
-                    self.removeRow(row)
                     if row < len(self.riskMap.table):
                         self.riskMap.tableRemoveRecord(row)
+                    else:
+                        self.removeRow(row)
+                        self.update_custom_numbering()
+                        self.updateHeight()
+                    if self._liveMode:
+                        self.liveTotalsChanged.emit(self.riskMap.updateRecords(()))
                     break
 
-        self.update_custom_numbering()
-        self.updateHeight()
-        self.riskMap._markModified()
-
     def updateHeight(self):
         rowHeight = self.rowHeight(0) if self.rowCount() > 0 else 30
         totalHeight = (self.rowCount() * rowHeight) + self.horizontalHeader().height() + 2
@@ -350,6 +479,8 @@ class RiskDataTable(QTableWidget):
 
 
 class MethodsTable(QTableWidget):
+#   Список методик следует за картой по событию METHODS_CHANGED: удаление одной методики
+#   убирает одну строку, новый список после расчёта строится заново
     def __init__(self, parent: QWidget, riskMap: RiskMap):
         self._column_names = [
             '',
@@ -418,6 +549,33 @@ class MethodsTable(QTableWidget):
         self.setColumnWidth(0, 40)
         self.setColumnWidth(1, 1000)
         self.setFixedHeight(60)
+        self.riskMap.subscribe(METHODS_CHANGED, self._onMethodsChanged)
+
+    def loadMethods(self):
+        self.setRowCount(0)
+        for method in self.riskMap.methods:
+            row = self.rowCount()
+            self.insertRow(row)
+
+            remove_button = QPushButton('-')
+            remove_button.setObjectName('ManageRowButton')
+            remove_button.clicked.connect(self._onRemoveMethodClicked)
+            self.setCellWidget(row, 0, remove_button)
+
+            item = QTableWidgetItem(method)
+            item.setFlags(Qt.ItemFlag.NoItemFlags)
+            item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
+            self.setItem(row, 1, item)
+        self._initialize_default_row()
+        self.riskMap._methodModified = False
+
+    def _onMethodsChanged(self, event: dict):
+        if "removed" in event:
+            if event["removed"] < self.rowCount() - 1:
+                self.removeRow(event["removed"])
+            self.updateHeight()
+        else:
+            self.loadMethods()
 
     def _initialize_default_row(self):
         row = self.rowCount()
@@ -436,13 +594,12 @@ class MethodsTable(QTableWidget):
         if button:
             for row in range(self.rowCount()):
                 if self.cellWidget(row, 0) == button:
-                    method = self.item(row, 1).text()
-                    if method in self.riskMap.methods:
-                        self.riskMap.methods.remove(method)
-                    self.removeRow(row)
+                    if row < len(self.riskMap.methods):
+                        self.riskMap.methodsRemoveLine(row)
+                    else:
+                        self.removeRow(row)
+                        self.updateHeight()
                     break
-        self.updateHeight()
-        self.riskMap._markModified()
 
     def updateHeight(self):
         row_height = self.rowHeight(0) if self.rowCount() > 0 else 30
@@ -742,6 +899,8 @@ class RiskAnalysisMainForm(QWidget):
         self.button_convert_to = QPushButton('Преобразовать в doc', parent=buttons_widget)
         self.button_convert_to.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         self.button_convert_to.setObjectName('ConvertButton')
+        self.checkbox_live = QCheckBox('Расчёт при вводе', parent=buttons_widget)
+        self.checkbox_live.setStyleSheet("color: #424874; font-size: 14px;")
 
         table_params_outer_frame = QFrame(table_widget)
         table_params_outer_layout = QHBoxLayout(table_params_outer_frame)
@@ -769,6 +928,7 @@ class RiskAnalysisMainForm(QWidget):
         buttons_widget_layout.addStretch()
         buttons_widget_layout.addWidget(self.button_calculate)
         buttons_widget_layout.addWidget(self.button_convert_to)
+        buttons_widget_layout.addWidget(self.checkbox_live)
         buttons_widget_layout.addStretch()
 
         main_scroll_layout = QVBoxLayout(main_scroll_widget)
@@ -792,6 +952,9 @@ class RiskAnalysisMainForm(QWidget):
         self._usedInstrumentsMaterialsTextEdit.textChanged.connect(self._on_used_materials_changed)
         self._chairmanFullNameTextEdit.textChanged.connect(self._on_chairman_changed)
         self._summary_risk_indicator_value.textChanged.connect(self._on_risk_indicator_changed)
+        self.checkbox_live.toggled.connect(self.riskDataTableWidget.setLiveMode)
+        self.riskDataTableWidget.liveTotalsChanged.connect(self._on_live_totals_changed)
+        self.riskMap.subscribe(SUMMARY_CHANGED, self._on_summary_changed)
 
     def _on_map_no_changed(self, text):
         if self.riskMap:
@@ -822,6 +985,24 @@ class RiskAnalysisMainForm(QWidget):
                 self.riskMap.kFactor = float(text) if text else None
             except ValueError:
                 pass
+            if self.riskDataTableWidget.liveMode:
+                self._on_live_totals_changed(self.riskMap.refreshTotals())
+
+    # Обновление итогов в режиме расчёта при вводе, поле коэффициента не перезаписывается
+    def _on_live_totals_changed(self, status: int):
+        if status == 1:
+            self.summary_risk_level_text = str(round(self.riskMap.profRisk, 2)) if self.riskMap.profRisk else ""
+            self.summary_risk_final_level_text = str(round(self.riskMap.result, 2)) if self.riskMap.result else ""
+            self.summary_risk_classification_text = self.riskMap.resultStr
+        else:
+            self.summary_risk_level_text = ""
+            self.summary_risk_final_level_text = ""
+            self.summary_risk_classification_text = ""
+
+    # Итоги после расчёта приходят событием карты; поле коэффициента не перезаписывается, его правит пользователь
+    def _on_summary_changed(self, event: dict):
+        if self.riskMap.resultStr and event["fields"] - {"kFactor"}:
+            self._on_live_totals_changed(1)
 
     def setQLineBlockSignals(self, flag: bool):
         self._mapNoTextEdit.blockSignals(flag)
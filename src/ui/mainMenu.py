@@ -4,7 +4,6 @@ from PySide6.QtGui import QAction, QIcon
 from PySide6.QtCore import Qt, QSize
 from .resources import RECENT_FILES_JSON, APP_ICON, DOCUMENT_ICON_LOGO
 from .rusMsgBox import RusMsgBox
-from ..backend import riskMap
 from .actionHandler import ActionHandler
 from pathlib import Path
 import json
@@ -53,6 +52,9 @@ class RecentFilesGrid(QWidget):
         self.current_col = 0
         self.max_columns = 11
         self.parent = parent
+        # Файлы, отмеченные щелчком с Ctrl: обычный щелчок открывает их вместе с выбранным
+        self.selectedFiles = []
+        self.cards = {}
 
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
 
@@ -62,16 +64,9 @@ class RecentFilesGrid(QWidget):
             self.current_col = 0
 
         card = QFrame()
-        card.setStyleSheet("""
-            QFrame {
-                background: #DCD6F7;
-                border-radius: 10px;
-            }
-            QFrame:hover {
-                background: #E9E4FF;
-            }
-        """)
+        card.setStyleSheet(self._cardStyle(selected=False))
         card.setFixedSize(140, 175)
+        card.setToolTip(f"{filePath}\nCtrl+щелчок - выбрать несколько файлов")
 
         card.setObjectName("recentFileCard")
         card.setAttribute(Qt.WA_Hover, True)
@@ -108,14 +103,42 @@ class RecentFilesGrid(QWidget):
         card_layout.addWidget(icon_label, alignment=Qt.AlignmentFlag.AlignCenter)
         card_layout.addWidget(file_name, alignment=Qt.AlignmentFlag.AlignCenter)
 
-        card.mousePressEvent = lambda event, path=filePath: self._onCardClicked(path)
+        card.mousePressEvent = lambda event, path=filePath: self._onCardClicked(path, event)
+        self.cards[filePath] = card
 
         self.layout.addWidget(card, self.current_row, self.current_col, alignment=Qt.AlignmentFlag.AlignLeft)
         self.current_col += 1
 
-    def _onCardClicked(self, filePath):
-        if hasattr(self.parent, '_onRecentFileClicked'):
-            self.parent._onRecentFileClicked(filePath)
+    @staticmethod
+    def _cardStyle(selected):
+        return f"""
+            QFrame {{
+                background: {"#A6B1E1" if selected else "#DCD6F7"};
+                border-radius: 10px;
+            }}
+            QFrame:hover {{
+                background: #E9E4FF;
+            }}
+        """
+
+    def clearSelection(self):
+        for filePath in self.selectedFiles:
+            if filePath in self.cards:
+                self.cards[filePath].setStyleSheet(self._cardStyle(selected=False))
+        self.selectedFiles = []
+
+    def _onCardClicked(self, filePath, event=None):
+        if event is not None and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            if filePath in self.selectedFiles:
+                self.selectedFiles.remove(filePath)
+            else:
+                self.selectedFiles.append(filePath)
+            self.cards[filePath].setStyleSheet(self._cardStyle(selected=filePath in self.selectedFiles))
+            return
+        filePaths = self.selectedFiles + [filePath] if filePath not in self.selectedFiles else list(self.selectedFiles)
+        self.clearSelection()
+        if hasattr(self.parent, '_onRecentFilesClicked'):
+            self.parent._onRecentFilesClicked(filePaths)
 
 
 class MainMenuWindow(QMainWindow):
@@ -321,17 +344,22 @@ class MainMenuWindow(QMainWindow):
 
         self.recentFilesGrid.current_row = 0
         self.recentFilesGrid.current_col = 0
+        self.recentFilesGrid.selectedFiles = []
+        self.recentFilesGrid.cards = {}
 
         recentFiles = self.recentFilesManager.getRecentFiles()
         for filePath in recentFiles:
             icon = QIcon(DOCUMENT_ICON_LOGO) if filePath.endswith(".rsk") else QIcon("text-x-generic")
             self.recentFilesGrid.addFile(filePath, icon)
 
-    def _onRecentFileClicked(self, filePath):
-        if Path(filePath).exists():
-            self._onOpenRecent(filePath)
-        else:
-            self.recentFilesManager.recentFiles.remove(filePath)
+    def _onRecentFilesClicked(self, filePaths):
+        missing = [filePath for filePath in filePaths if not Path(filePath).exists()]
+        existing = [filePath for filePath in filePaths if filePath not in missing]
+        if existing:
+            self._onOpenRecent(existing)
+        if missing:
+            for filePath in missing:
+                self.recentFilesManager.recentFiles.remove(filePath)
             self.recentFilesManager.saveHistory()
 
             self._loadRecentFiles()
@@ -339,7 +367,7 @@ class MainMenuWindow(QMainWindow):
             RusMsgBox.information(
                 self,
                 "Файл не найден",
-                f"Файл {Path(filePath)} не существует или был удален")
+                "\n".join(f"Файл {Path(filePath)} не существует или был удален" for filePath in missing))
 
     def _onNewClicked(self):
         from src.ui.riskTabs import RiskAnalysisMainWindow
@@ -369,53 +397,26 @@ class MainMenuWindow(QMainWindow):
     def _onSaveAs(self):
         pass
 
-    def _onOpenRecent(self, filePath):
+    def _onOpenRecent(self, filePaths):
         from src.ui.riskTabs import RiskAnalysisMainWindow
         self.riskWindow = RiskAnalysisMainWindow(createDefaultMap=False)
         self.riskWindow.setRecentFilesManager(self.recentFilesManager)
         self.riskWindow.showMaximized()
         self.hide()
-        risk_map = riskMap.RiskMap.loadFromRsk(path=filePath)
-        if risk_map:
-            existing_names = {rm.name for rm in self.riskWindow.riskMaps}
-            base_name = risk_map.name
-            counter = 1
-            while risk_map.name in existing_names:
-                risk_map.name = f"{base_name} ({counter})"
-                counter += 1
-            newTab = self.riskWindow.RiskMapTab(risk_map)
-            self.riskWindow.riskMaps.append(risk_map)
-            self.riskWindow.tabWidget.addTab(newTab, risk_map.getTabName())
-            self.riskWindow.tabWidget.setCurrentIndex(len(self.riskWindow.riskMaps) - 1)
-            self.riskWindow._currentMapIndex = len(self.riskWindow.riskMaps) - 1
-            newTab.updateFormFromRisk()
-            self._loadRecentFiles()
+        self.riskWindow.openRiskMapFiles(filePaths)
+        self._loadRecentFiles()
 
     def _onOpen(self):
-        filePath, _ = QFileDialog.getOpenFileName(self,
-                                                  "Открыть файл карты рисков",
-                                                  "",
-                                                  "Файлы карт рисков (*.rsk)")
-        if not filePath:
+        filePaths, _ = QFileDialog.getOpenFileNames(self,
+                                                    "Открыть файлы карт рисков",
+                                                    "",
+                                                    "Файлы карт рисков (*.rsk)")
+        if not filePaths:
             return
         from src.ui.riskTabs import RiskAnalysisMainWindow
         self.riskWindow = RiskAnalysisMainWindow(createDefaultMap=False)
         self.riskWindow.setRecentFilesManager(self.recentFilesManager)
         self.riskWindow.showMaximized()
         self.hide()
-        risk_map = riskMap.RiskMap.loadFromRsk(path=filePath)
-        if risk_map:
-            self.recentFilesManager.addFile(filePath)
-            existing_names = {rm.name for rm in self.riskWindow.riskMaps}
-            base_name = risk_map.name
-            counter = 1
-            while risk_map.name in existing_names:
-                risk_map.name = f"{base_name} ({counter})"
-                counter += 1
-            newTab = self.riskWindow.RiskMapTab(risk_map)
-            self.riskWindow.riskMaps.append(risk_map)
-            self.riskWindow.tabWidget.addTab(newTab, risk_map.getTabName())
-            self.riskWindow.tabWidget.setCurrentIndex(len(self.riskWindow.riskMaps) - 1)
-            self.riskWindow._currentMapIndex = len(self.riskWindow.riskMaps) - 1
-            newTab.updateFormFromRisk()
-            self._loadRecentFiles()
+        self.riskWindow.openRiskMapFiles(filePaths)
+        self._loadRecentFiles()
@@ -1,13 +1,16 @@
 from .form import RiskAnalysisMainForm
 from .actionHandler import ActionHandler
 from PySide6.QtWidgets import QTabWidget, QMessageBox, QWidget, QVBoxLayout, QToolBar, QStatusBar, QMainWindow, \
-    QPushButton, QTableWidgetItem, QFileDialog
+    QPushButton, QTableWidgetItem, QFileDialog, QProgressBar
 from PySide6.QtGui import QAction, Qt, QIcon
 from PySide6.QtCore import QTimer
-from src.backend.riskMap import RiskMap
+from src.backend.riskMap import MAP_CHANGED, MODIFIED_CHANGED, RiskMap, RiskMapLoader
 from .rusMsgBox import RusMsgBox
 from .resources import *
 from ..backend.convertion import RiskMapToDocxConverter
+from ..backend.autosave import BackgroundSaver
+from ..backend.bulkOpen import BulkOpener
+from ..backend.journal import EditJournal, recoverJournal
 
 
 class RiskAnalysisMainWindow(QMainWindow):
@@ -33,6 +36,18 @@ class RiskAnalysisMainWindow(QMainWindow):
         self.autosaveTimer.setInterval(300000)
         self.autosaveTimer.timeout.connect(self.autoSaveMaps)
         self.autosaveTimer.start()
+        self.autoSaver = BackgroundSaver()
+        self._autosaveQueue: list[RiskMap, ...] = []
+        self._autosaveCollectTimer = QTimer(self)
+        self._autosaveCollectTimer.setInterval(100)
+        self._autosaveCollectTimer.timeout.connect(self._collectAutosaves)
+        self._bulkOpener: BulkOpener = None
+        self._bulkKeepSavePath: bool = True
+        self._bulkErrors: list[str, ...] = []
+        self._bulkTimer = QTimer(self)
+        self._bulkTimer.setInterval(50)
+        self._bulkTimer.timeout.connect(self._collectOpenedMaps)
+        self._bulkProgress: QProgressBar = None
         self._riskMaps = []
         self._currentMapIndex = -1
         self._actionHandler = ActionHandler(self)
@@ -139,25 +154,41 @@ class RiskAnalysisMainWindow(QMainWindow):
         self._tabWidget.tabCloseRequested.connect(self.closeRiskMap)
         self._tabWidget.currentChanged.connect(self.switchRiskMap)
         if fileToOpen:
-            risk_map = RiskMap.loadFromRsk(path=fileToOpen)
-            if risk_map:
-                self._riskMaps.append(risk_map)
-                tab = self.RiskMapTab(risk_map)
-                self._tabWidget.addTab(tab, risk_map.getTabName())
-                self._tabWidget.setCurrentIndex(len(self._riskMaps) - 1)
-                self._currentMapIndex = len(self._riskMaps) - 1
-                tab.updateFormFromRisk()
+            self.openRiskMapFile(fileToOpen)
         elif createDefaultMap:
             self.createNewRiskMap(fromTemplate=False)
 
         self._updateMenuActions()
 
+    # Изменения карт с путём сохранения пишутся в журнал (EditJournal) сразу, такие карты не перезаписываются.
+    # Сохраняются изменённые карты без журнала, включая открытую. В GUI-потоке снимается только снимок карты,
+    # по одной карте за такт цикла событий; сериализация, сжатие и запись идут в потоке BackgroundSaver
     def autoSaveMaps(self):
-        for i, riskMap in enumerate(self._riskMaps):
-            if i != self._currentMapIndex:
-                riskMap.autoSave()
+        tabs = [self._tabWidget.widget(i) for i in range(self._tabWidget.count())]
+        journaled = {id(tab.riskMap) for tab in tabs if isinstance(tab, self.RiskMapTab) and tab.journal and tab.journal.active}
+        self._autosaveQueue = [riskMap for riskMap in self._riskMaps
+                               if riskMap.isModified and riskMap.savePath and id(riskMap) not in journaled]
+        self._autoSaveNext()
+
+    def _autoSaveNext(self):
+        while self._autosaveQueue:
+            riskMap = self._autosaveQueue.pop(0)
+            if any(riskMap is openMap for openMap in self._riskMaps) and self.autoSaver.submit(riskMap):
+                break
+        if self._autosaveQueue:
+            QTimer.singleShot(0, self._autoSaveNext)
+        if self.autoSaver.busy and not self._autosaveCollectTimer.isActive():
+            self._autosaveCollectTimer.start()
+
+    def _collectAutosaves(self):
+        for riskMap, path, error in self.autoSaver.collect():
+            self.statusBar().showMessage(f"Не удалось автоматически сохранить {path}: {error}", 10000)
+        if not self.autoSaver.busy:
+            self._autosaveCollectTimer.stop()
 
     class RiskMapTab(QWidget):
+#   Вкладка строится по карте один раз, дальше таблицы, итоги и заголовок вкладки
+#   обновляются по событиям шины изменений карты
         def __init__(self, riskMap: RiskMap, parent=None):
             super().__init__(parent)
             self.riskMap = riskMap
@@ -169,14 +200,79 @@ class RiskAnalysisMainWindow(QMainWindow):
 
             self.form.button_calculate.clicked.connect(self.onCalcButtonClicked)
             self.form.button_convert_to.clicked.connect(self.onConvertButtonClicked)
+            self.riskMap.subscribe(MODIFIED_CHANGED, self._updateTabTitle)
+            self.riskMap.subscribe(MAP_CHANGED, self._updateTabTitle)
+            self._loader: RiskMapLoader = None
+            self._loadTimer: QTimer = None
+            self._keepSavePath: bool = True
+            self.journal: EditJournal = None
             self.updateFormFromRisk()
 
+        # Журнал подключается к полностью загруженной карте; recover - сначала применить журнал, оставшийся после сбоя
+        def startJournal(self, recover: bool = False):
+            if self.journal is not None:
+                return
+            if recover:
+                recovered = recoverJournal(self.riskMap)
+                if recovered:
+                    RusMsgBox.information(self, "Восстановление карты",
+                                          f"Восстановлены несохранённые изменения карты \"{self.riskMap.name}\": {recovered}")
+            self.journal = EditJournal(self.riskMap)
+
+        # Строки карты дочитываются по одной пачке за такт цикла событий, таблица заполняется по событиям шины
+        def loadProgressively(self, loader: RiskMapLoader, keepSavePath: bool = True):
+            self._loader = loader
+            self._keepSavePath = keepSavePath
+            self.form.button_calculate.setEnabled(False)
+            self.form.button_convert_to.setEnabled(False)
+            self._loadTimer = QTimer(self)
+            self._loadTimer.setInterval(0)
+            self._loadTimer.timeout.connect(self._loadNextChunk)
+            self._loadTimer.start()
+            self._loadNextChunk()
+
+        def _loadNextChunk(self):
+            if self._loader is None:
+                return
+            try:
+                self._loader.loadChunk()
+            except (OSError, ValueError):
+                path = self._loader.path
+                self.stopLoading()
+                RusMsgBox.information(self, "Ошибка чтения", f"Файл {path} повреждён, загружена только часть карты.")
+                return
+            if self._loader.done:
+                self.stopLoading()
+                if not self._keepSavePath:
+                    self.riskMap._savePath = None
+                self.startJournal(recover=True)
+
+        def stopLoading(self):
+            if self._loadTimer:
+                self._loadTimer.stop()
+                self._loadTimer = None
+            if self._loader:
+                self._loader.close()
+                self._loader = None
+            self.form.button_calculate.setEnabled(True)
+            self.form.button_convert_to.setEnabled(True)
+
+        # Страница вкладки лежит в QStackedWidget внутри QTabWidget
+        def _updateTabTitle(self, event: dict):
+            if event["type"] == MAP_CHANGED and "name" not in event["fields"]:
+                return
+            stack = self.parentWidget()
+            tabWidget = stack.parentWidget() if stack else None
+            if isinstance(tabWidget, QTabWidget):
+                index = tabWidget.indexOf(self)
+                if index >= 0:
+                    tabWidget.setTabText(index, self.riskMap.getTabName())
+
         def onCalcButtonClicked(self):
             if self.riskMap:
                 result = self.riskMap.calculate()
                 if result == 1:
                     if self.form and self.form.methodsDataTableWidget:
-                        self.updateFormFromRisk()
                         RusMsgBox.information(self, "Расчет завершен", "Расчет рисков выполнен успешно!")
 
                 elif result == 0:
@@ -222,74 +318,94 @@ class RiskAnalysisMainWindow(QMainWindow):
 
                 self.form.setQLineBlockSignals(False)
 
-                self.form.riskDataTableWidget.setRowCount(0)
-                for record in self.riskMap.table:
-                    row = self.form.riskDataTableWidget.rowCount()
-                    self.form.riskDataTableWidget.insertRow(row)
-
-                    removeButton = QPushButton('-')
-                    removeButton.setObjectName('ManageRowButtonDelete')
-                    removeButton.clicked.connect(self.form.riskDataTableWidget.on_remove_row_clicked)
-                    self.form.riskDataTableWidget.setCellWidget(row, 0, removeButton)
-
-                    item1 = QTableWidgetItem(str(row + 1))
-                    item1.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignHCenter)
-                    self.form.riskDataTableWidget.setItem(row, 1, item1)
-
-                    item2 = QTableWidgetItem(f"{record.n}. {record.danger}")
-                    item2.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignHCenter)
-                    self.form.riskDataTableWidget.setItem(row, 2, item2)
-
-                    if record.event:
-                        item3 = QTableWidgetItem(record.event)
-                        item3.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignHCenter)
-                        self.form.riskDataTableWidget.setItem(row, 3, item3)
-
-                    if record.damage:
-                        item4 = QTableWidgetItem(record.damage)
-                        item4.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignHCenter)
-                        self.form.riskDataTableWidget.setItem(row, 4, item4)
-
-                    if record.susceptibility:
-                        item5 = QTableWidgetItem(record.susceptibility)
-                        item5.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignHCenter)
-                        self.form.riskDataTableWidget.setItem(row, 5, item5)
-
-                    if record.probability:
-                        item6 = QTableWidgetItem(record.probability)
-                        item6.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignHCenter)
-                        self.form.riskDataTableWidget.setItem(row, 6, item6)
-
-                    if record.rating:
-                        item7 = QTableWidgetItem(record.rating)
-                        item7.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignHCenter)
-                        self.form.riskDataTableWidget.setItem(row, 7, item7)
-
-                self.form.riskDataTableWidget._initialize_default_row()
+                self.form.riskDataTableWidget.loadRows()
 
                 if self.riskMap._methodModified:
-                    self.form.methodsDataTableWidget.setRowCount(0)
-                    for method in self.riskMap.methods:
-                        row = self.form.methodsDataTableWidget.rowCount()
-                        self.form.methodsDataTableWidget.insertRow(row)
-
-                        remove_button = QPushButton('-')
-                        remove_button.setObjectName('ManageRowButton')
-                        remove_button.clicked.connect(self.form.methodsDataTableWidget._onRemoveMethodClicked)
-                        self.form.methodsDataTableWidget.setCellWidget(row, 0, remove_button)
-
-                        item = QTableWidgetItem(method)
-                        item.setFlags(Qt.ItemFlag.NoItemFlags)
-                        item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-                        self.form.methodsDataTableWidget.setItem(row, 1, item)
-                    self.form.methodsDataTableWidget._initialize_default_row()
-
+                    self.form.methodsDataTableWidget.loadMethods()
                     self.form.riskDataTableWidget.updateHeight()
                     self.form.methodsDataTableWidget.updateHeight()
-                    self.riskMap._methodModified = False
             else:
                 return
 
+    # Вкладка появляется сразу после чтения полей карты, строки таблицы догружаются в ней по частям
+    def openRiskMapFile(self, path: str, keepSavePath: bool = True):
+        loader = RiskMapLoader.open(path)
+        if not loader:
+            return None
+        tab = self._addMapTab(loader.riskMap)
+        tab.loadProgressively(loader, keepSavePath)
+        return tab
+
+    def _addMapTab(self, risk_map: RiskMap):
+        existing_names = {rm.name for rm in self._riskMaps}
+        base_name = risk_map.name
+        counter = 1
+        while risk_map.name in existing_names:
+            risk_map.name = f"{base_name} ({counter})"
+            counter += 1
+        tab = self.RiskMapTab(risk_map)
+        self._riskMaps.append(risk_map)
+        self._tabWidget.addTab(tab, risk_map.getTabName())
+        self._tabWidget.setCurrentIndex(len(self._riskMaps) - 1)
+        self._currentMapIndex = len(self._riskMaps) - 1
+        return tab
+
+    # Несколько файлов открываются параллельно (BulkOpener): файлы разбираются в пуле процессов, карты строятся
+    # в фоновом потоке, а вкладки добавляются по мере готовности карт; ход открытия показывается в строке состояния.
+    # Один файл открывается как раньше, с догрузкой строк во вкладке
+    def openRiskMapFiles(self, paths: list[str, ...], keepSavePath: bool = True):
+        paths = [path for path in dict.fromkeys(paths) if path.lower().endswith(".rsk")]
+        if len(paths) == 1:
+            tab = self.openRiskMapFile(paths[0], keepSavePath)
+            if tab and self.recentFilesManager:
+                self.recentFilesManager.addFile(paths[0])
+            return
+        if not paths or self._bulkOpener is not None:
+            return
+        self._bulkOpener = BulkOpener(paths)
+        self._bulkKeepSavePath = keepSavePath
+        self._bulkErrors = []
+        self._bulkProgress = QProgressBar(self)
+        self._bulkProgress.setRange(0, len(paths))
+        self._bulkProgress.setFormat("Открытие карт: %v из %m")
+        self._bulkProgress.setMaximumWidth(300)
+        self.statusBar().addPermanentWidget(self._bulkProgress)
+        self._bulkTimer.start()
+
+    def _collectOpenedMaps(self):
+        opener = self._bulkOpener
+        if opener is None:
+            self._bulkTimer.stop()
+            return
+        opened = opener.collect()
+        if opened:
+            self.setUpdatesEnabled(False)
+            for path, risk_map, error in opened:
+                if risk_map is None:
+                    if error is not None:
+                        self._bulkErrors.append(f"{path}: {error}")
+                    continue
+                if not self._bulkKeepSavePath:
+                    risk_map._savePath = None
+                tab = self._addMapTab(risk_map)
+                tab.startJournal(recover=True)
+                if self.recentFilesManager:
+                    self.recentFilesManager.addFile(path)
+            self.setUpdatesEnabled(True)
+            self._bulkProgress.setValue(opener.finished)
+        if opener.done:
+            self._finishBulkOpen()
+
+    def _finishBulkOpen(self):
+        self._bulkTimer.stop()
+        self._bulkOpener.shutdown()
+        self._bulkOpener = None
+        self.statusBar().removeWidget(self._bulkProgress)
+        self._bulkProgress.deleteLater()
+        self._bulkProgress = None
+        if self._bulkErrors:
+            RusMsgBox.information(self, "Ошибка чтения", "Не удалось открыть файлы:\n" + "\n".join(self._bulkErrors))
+
     def setRecentFilesManager(self, manager):
         self.recentFilesManager = manager
 
@@ -317,6 +433,7 @@ class RiskAnalysisMainWindow(QMainWindow):
 
             self._riskMaps.append(riskMap)
             tab = self.RiskMapTab(riskMap)
+            tab.startJournal()
             self._tabWidget.addTab(tab, riskMap.getTabName())
             self._tabWidget.setCurrentIndex(len(self._riskMaps) - 1)
             self._currentMapIndex = len(self._riskMaps) - 1
@@ -325,6 +442,7 @@ class RiskAnalysisMainWindow(QMainWindow):
     def closeRiskMap(self, index):
         if index < 0 or index >= len(self._riskMaps):
             return
+        tab = self._tabWidget.widget(index)
         if self._riskMaps[index].isModified:
             reply = RusMsgBox.question(
                 self,
@@ -335,10 +453,20 @@ class RiskAnalysisMainWindow(QMainWindow):
             elif reply == QMessageBox.StandardButton.Yes:
                 self._currentMapIndex = index
                 self._actionHandler.onSave()
+            elif isinstance(tab, self.RiskMapTab) and tab.journal:
+                # Изменения отброшены пользователем - восстанавливать их при следующем открытии не нужно
+                tab.journal.discard()
+        if isinstance(tab, self.RiskMapTab):
+            tab.stopLoading()
+            if tab.journal:
+                tab.journal.detach()
         self._tabWidget.removeTab(index)
         del self._riskMaps[index]
 
-        if len(self._riskMaps) == 0:
+        if len(self._riskMaps) == 0 and self._bulkOpener is not None:
+            # Остальные открываемые карты ещё появятся во вкладках
+            self._currentMapIndex = -1
+        elif len(self._riskMaps) == 0:
             from src.ui.mainMenu import MainMenuWindow
             RiskMap._new_map_counter = 1
             self.mainMenu = MainMenuWindow()
@@ -352,9 +480,6 @@ class RiskAnalysisMainWindow(QMainWindow):
         if index < 0 or index >= len(self._riskMaps):
             return
         self._currentMapIndex = index
-        currentTab = self._tabWidget.widget(index)
-        if currentTab and isinstance(currentTab, self.RiskMapTab):
-            currentTab.updateFormFromRisk()
         self._updateMenuActions()
 
     def currentRiskMap(self):
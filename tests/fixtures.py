@@ -0,0 +1,106 @@
+"""
+Построители карт для тестов и бенчмарков и прежняя формула расчёта строки как эталон.
+Бенчмарки импортируют их отсюда, чтобы изменение бенчмарка не меняло данные тестов
+"""
+import random
+from src.backend.database import database as db
+from src.backend.database import DAMAGE, SUSCEPTIBILITY, PROBABILITY
+from src.backend.riskMap import Record, RiskMap
+
+
+def syntheticMap(rows: int, seed: int = 1) -> RiskMap:
+    """
+    Карта из rows случайных строк справочника; пары опасность-событие могут повторяться
+    :param rows: число строк
+    :param seed: зерно генератора
+    :return: карта с выставленными без расчёта весами, рисками и рейтингами строк
+    """
+    rnd = random.Random(seed)
+    riskMap = RiskMap()
+    dangers = db.getDangers()
+    for _ in range(rows):
+        riskMap.tableAddRecord()
+        record = riskMap.table[-1]
+        record.danger = rnd.choice(dangers)
+        record.event = rnd.choice(db.getEvents(record.dangerKey))
+        record.damage = rnd.choice(list(DAMAGE))
+        record.susceptibility = rnd.choice(list(SUSCEPTIBILITY))
+        record.probability = rnd.choice(list(PROBABILITY))
+        # calculate() удалил бы повторяющиеся пары опасность-событие, поэтому результаты выставляются напрямую
+        record._weight, record._identifiedDangersRisks, record._rating = 0.01, 0.05, "Низкий"
+    return riskMap
+
+
+def makeMaps(count: int, seed: int = 1) -> list[RiskMap]:
+    """
+    Небольшие карты без повторов пар опасность-событие со случайным kFactor
+    :param count: число карт
+    :param seed: зерно генератора
+    :return: карты из 1..40 заполненных строк
+    """
+    rng = random.Random(seed)
+    pairs = [(danger, event) for danger in db.getDangers() for event in db.getEvents(danger)]
+    damage, susceptibility, probability = list(DAMAGE), list(SUSCEPTIBILITY), list(PROBABILITY)
+    maps = []
+    for _ in range(count):
+        riskMap = RiskMap()
+        riskMap.kFactor = rng.choice((-1.0, 0.0, 1.0))
+        for danger, event in rng.sample(pairs, rng.randint(1, 40)):
+            record = Record()
+            record.danger, record.event = danger, event
+            record.damage = rng.choice(damage)
+            record.susceptibility = rng.choice(susceptibility)
+            record.probability = rng.choice(probability)
+            riskMap.table.append(record)
+        maps.append(riskMap)
+    return maps
+
+
+def messyMaps(count: int, seed: int = 1) -> list[RiskMap]:
+    """
+    Карты makeMaps с тем, что calculate() исправляет или отвергает: повторами пар опасность-событие,
+    пустыми строками, незаполненными строками и пустыми картами
+    :param count: число карт
+    :param seed: зерно генератора
+    :return: карты в исходном порядке строк, без сортировки по опасности
+    """
+    rng = random.Random(seed)
+    damage, susceptibility, probability = list(DAMAGE), list(SUSCEPTIBILITY), list(PROBABILITY)
+    maps = makeMaps(count, seed)
+    for riskMap in maps:
+        kind = rng.randrange(5)
+        if kind == 1:
+            source = rng.choice(riskMap.table)
+            record = Record()
+            record.danger, record.event = source.danger, source.event
+            record.damage = rng.choice(damage)
+            record.susceptibility = rng.choice(susceptibility)
+            record.probability = rng.choice(probability)
+            riskMap.table.insert(rng.randint(0, len(riskMap.table)), record)
+        elif kind == 2:
+            riskMap.table.insert(rng.randint(0, len(riskMap.table)), Record())
+        elif kind == 3:
+            riskMap.table[rng.randrange(len(riskMap.table))]._probabilityPts = None
+        elif kind == 4 and rng.random() < 0.3:
+            riskMap.table = [Record() for _ in range(rng.randint(0, 2))]
+    return maps
+
+
+def snapshot(riskMap: RiskMap) -> tuple:
+    """
+    Результаты расчёта карты для сравнения двух способов расчёта
+    :return: строки (опасность, событие, вес, риск, рейтинг), weightSum, profRisk, result, resultStr и методики
+    """
+    rows = tuple((record.dangerId, record.eventId, record.weight, record.identifiedDangersRisks, record.rating)
+                 for record in riskMap.table)
+    return rows, riskMap.weightSum, riskMap.profRisk, riskMap.result, riskMap.resultStr, tuple(riskMap.methods)
+
+
+def legacyRow(d: int, s: int, p: int, weightSum: int) -> tuple[float, float, str]:
+    """
+    Вес, риск и рейтинг строки по формуле с плавающей точкой, которой calculate() считал до таблиц scoring
+    :return: (weight, identifiedDangersRisks, rating)
+    """
+    weight = round(float(p / weightSum), 2)
+    risk = round(d * s * p / weightSum, 2)
+    return weight, risk, "Низкий" if risk <= 0.9 else ("Умеренный" if risk <= 1.8 else "Высокий")
@@ -0,0 +1,36 @@
+import os, tempfile, unittest
+from src.backend.autosave import BackgroundSaver
+from src.backend.riskMap import RiskMap
+from tests.fixtures import syntheticMap
+
+
+class BackgroundSaverTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "map.rsk")
+        syntheticMap(30, seed=7).saveToRsk(self.path)
+        self.riskMap = RiskMap.loadFromRsk(self.path)
+        self.saver = BackgroundSaver()
+
+    def tearDown(self):
+        self.saver.shutdown()
+        self.tmp.cleanup()
+
+    def test_collectClearsModified(self):
+        self.riskMap.chairman = "Иванов И. И."
+        self.assertTrue(self.saver.submit(self.riskMap))
+        self.assertEqual(self.saver.wait(), [])
+        self.assertFalse(self.riskMap.isModified)
+        self.assertEqual(RiskMap.loadFromRsk(self.path).chairman, "Иванов И. И.")
+
+    def test_changeAfterSnapshotKeepsModified(self):
+        self.riskMap.chairman = "Иванов И. И."
+        self.assertTrue(self.saver.submit(self.riskMap))
+        self.riskMap.profession = "Слесарь"
+        self.assertEqual(self.saver.wait(), [])
+        self.assertTrue(self.riskMap.isModified)
+        self.assertIsNone(RiskMap.loadFromRsk(self.path).profession)
+
+
+if __name__ == '__main__':
+    unittest.main()
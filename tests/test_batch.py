@@ -0,0 +1,66 @@
+import os, tempfile, unittest
+from src.backend.batch import recalcFile
+from src.backend.database import DAMAGE, PROBABILITY, SUSCEPTIBILITY
+from src.backend.riskMap import RiskMap
+from src.backend.rskStream import encodeRsk, readRskDocument, writeFileAtomic
+from tests.fixtures import syntheticMap
+
+
+class RecalcFileTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "map.rsk")
+        riskMap = syntheticMap(8)
+        # Высокие баллы дают рейтинги с мерами, то есть непустой список методик
+        for record in riskMap.table:
+            record.damage = max(DAMAGE, key=DAMAGE.get)
+            record.susceptibility = max(SUSCEPTIBILITY, key=SUSCEPTIBILITY.get)
+            record.probability = max(PROBABILITY, key=PROBABILITY.get)
+        self.assertEqual(riskMap.calculate(), 1)
+        self.assertTrue(riskMap.methods)
+        riskMap.saveToRsk(self.path)
+        self.methods = list(riskMap.methods)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _rewrite(self, change) -> None:
+        data = readRskDocument(self.path)
+        change(data)
+        writeFileAtomic(self.path, encodeRsk(data))
+
+    def test_unchanged_map_is_not_rewritten(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        result = recalcFile(self.path)
+        self.assertEqual(result["status"], "unchanged")
+        self.assertEqual(os.stat(self.path).st_mtime_ns, mtime)
+
+    def test_stale_method_text_of_same_length_is_saved(self):
+        def staleMethod(data):
+            data["methods"][0] = "Устаревший текст меры"
+        self._rewrite(staleMethod)
+        result = recalcFile(self.path)
+        self.assertEqual(result["status"], "changed")
+        self.assertIn("methods", result["changes"])
+        self.assertEqual(RiskMap.loadFromRsk(self.path).methods, self.methods)
+
+    def test_stale_row_risk_is_saved(self):
+        def staleRisk(data):
+            data["table"][0][data["columns"].index("identifiedDangersRisks")] = 99.0
+        self._rewrite(staleRisk)
+        result = recalcFile(self.path)
+        self.assertEqual(result["status"], "changed")
+        self.assertEqual(result["changes"].get("values"), 1)
+        self.assertNotEqual(RiskMap.loadFromRsk(self.path).table[0].identifiedDangersRisks, 99.0)
+
+    def test_dry_run_keeps_file(self):
+        def staleMethod(data):
+            data["methods"][0] = "Устаревший текст меры"
+        self._rewrite(staleMethod)
+        result = recalcFile(self.path, dryRun=True)
+        self.assertEqual(result["status"], "changed")
+        self.assertEqual(RiskMap.loadFromRsk(self.path).methods[0], "Устаревший текст меры")
+
+
+if __name__ == '__main__':
+    unittest.main()
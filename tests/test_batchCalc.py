@@ -0,0 +1,31 @@
+import unittest
+from src.backend.batchCalc import calculateMany
+from src.backend.riskMap import CHANGED
+from tests.fixtures import makeMaps, messyMaps, snapshot
+
+
+class CalculateManyTest(unittest.TestCase):
+    def test_oneChangeEventPerMap(self):
+        maps = makeMaps(20, seed=2)
+        events = [[] for _ in maps]
+        for riskMap, received in zip(maps, events):
+            riskMap.subscribe(CHANGED, received.append)
+        self.assertEqual(calculateMany(maps), [1] * len(maps))
+        self.assertEqual([len(received) for received in events], [1] * len(maps))
+        for riskMap in maps:
+            self.assertEqual(riskMap._batchDepth, 0)
+
+    def test_matchesCalculate(self):
+        for updateMethods in (True, False):
+            single, batch = messyMaps(300, seed=3), messyMaps(300, seed=3)
+            statuses = [riskMap.calculate(updateMethods) for riskMap in single]
+            self.assertEqual(calculateMany(batch, updateMethods), statuses)
+            self.assertEqual(set(statuses), {-1, 0, 1})
+            self.assertEqual([snapshot(riskMap) for riskMap in batch], [snapshot(riskMap) for riskMap in single])
+
+    def test_emptyBatch(self):
+        self.assertEqual(calculateMany([]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
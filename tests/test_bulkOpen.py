@@ -0,0 +1,62 @@
+import os, tempfile, unittest
+from src.backend.bulkOpen import BulkOpener, openMany
+from src.backend.columnar import ColumnarRiskMap
+from src.backend.riskMap import RiskMap
+from src.backend.rskStream import readRskColumns
+from tests.fixtures import messyMaps, snapshot
+
+
+class BulkOpenerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i, riskMap in enumerate(messyMaps(12, seed=8)):
+            path = os.path.join(self.tmp.name, f"map{i}.rsk")
+            riskMap.saveToRsk(path, compressed=bool(i % 2))
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_columnsMatchLoad(self):
+        for mapClass in (RiskMap, ColumnarRiskMap):
+            for path in self.paths:
+                with self.subTest(cls=mapClass.__name__, path=os.path.basename(path)):
+                    loaded = mapClass.loadFromRsk(path)
+                    built = mapClass.fromRskDocument(path, readRskColumns(path))
+                    self.assertEqual(snapshot(built), snapshot(loaded))
+                    self.assertEqual(built.fingerprint, loaded.fingerprint)
+                    self.assertFalse(built.isModified)
+
+    def test_brokenFileReportsError(self):
+        broken = os.path.join(self.tmp.name, "broken.rsk")
+        with open(broken, 'wb') as f:
+            f.write(b"not a map")
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                opener = BulkOpener([*self.paths[:3], broken], workers)
+                opener.shutdown()
+                results = {path: (riskMap, error) for path, riskMap, error in opener.collect()}
+                self.assertTrue(opener.done)
+                self.assertIsNone(results[broken][0])
+                self.assertIsNotNone(results[broken][1])
+                self.assertTrue(all(results[path][0] is not None for path in self.paths[:3]))
+
+    def test_cancelReportsEveryFile(self):
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                opener = BulkOpener(self.paths, workers)
+                opener.cancel()
+                opener.shutdown()
+                results = opener.collect()
+                self.assertTrue(opener.done)
+                self.assertEqual(sorted(path for path, _, _ in results), sorted(self.paths))
+                self.assertEqual([error for _, _, error in results if error is not None], [])
+
+    def test_openManyKeepsOrder(self):
+        maps = openMany(self.paths, workers=2)
+        self.assertEqual([riskMap.savePath for riskMap in maps], self.paths)
+
+
+if __name__ == '__main__':
+    unittest.main()
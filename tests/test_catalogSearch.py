@@ -0,0 +1,67 @@
+import json, os, tempfile, unittest
+from src.backend.catalogSearch import CatalogSearchIndex, queryTokens
+from src.backend.catalogSqlite import SqliteCatalogBackend, convertJsonToSqlite
+from src.backend.database import DB_JSON_PATH
+
+# Запросы в порядке набора: выдача не должна пропадать и расширяться на промежуточных буквах
+TYPING = (("event", ("паде", "паден", "падени", "падение")),
+          ("danger", ("электричес", "электрическ", "электрически", "электрический")))
+
+
+class CatalogSearchTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(DB_JSON_PATH, encoding="utf-8") as f:
+            database = json.load(f)
+        cls.index = CatalogSearchIndex(
+            database.keys(),
+            (event for entry in database.values() for event in entry["events"]),
+            (measure for entry in database.values() for items in entry["events"].values() for measure in items))
+        cls._tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(cls._tmp.name, "catalog.sqlite")
+        convertJsonToSqlite(DB_JSON_PATH, path)
+        cls.sqlite = SqliteCatalogBackend(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite.close()
+        cls._tmp.cleanup()
+
+    def assertNarrows(self, search, kind: str, queries: tuple[str, ...]) -> None:
+        previous = None
+        for query in queries:
+            found = set(search(query, kind=kind, limit=None))
+            self.assertTrue(found, query)
+            if previous is not None:
+                self.assertLessEqual(found, previous, query)
+            previous = found
+
+    def test_queryTokens(self):
+        self.assertEqual(queryTokens("Падение с высоты"), [("пад", False), ("высоты", True)])
+        self.assertEqual(queryTokens("падение "), [("пад", False)])
+
+    def test_typingNarrows(self):
+        for kind, queries in TYPING:
+            self.assertNarrows(self.index.search, kind, queries)
+
+    def test_typingNarrowsSqlite(self):
+        for kind, queries in TYPING:
+            self.assertNarrows(self.sqlite.search, kind, queries)
+
+    def test_backendsAgree(self):
+        for kind, queries in TYPING:
+            for query in (*queries, queries[-1] + " "):
+                self.assertEqual(set(self.index.search(query, kind=kind, limit=None)),
+                                 set(self.sqlite.search(query, kind=kind, limit=None)), query)
+
+    def test_addRemove(self):
+        index = CatalogSearchIndex(["Падение предмета"])
+        index.add("danger", "Падающие конструкции")
+        self.assertEqual(index.search("пада"), ["Падающие конструкции"])
+        index.remove("danger", "Падающие конструкции")
+        self.assertEqual(index.search("пада"), [])
+        self.assertEqual(index.search("паден"), ["Падение предмета"])
+
+
+if __name__ == '__main__':
+    unittest.main()
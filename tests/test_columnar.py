@@ -0,0 +1,52 @@
+import os, tempfile, unittest
+from src.backend.columnar import ColumnarRiskMap
+from src.backend.database import PROBABILITY
+from src.backend.riskMap import RiskMap
+from tests.fixtures import syntheticMap
+
+
+class ColumnarIncrementalTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "map.rsk")
+        syntheticMap(300, seed=5).saveToRsk(self.path)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _liveEdit(self, cls: type) -> tuple:
+        riskMap = cls.loadFromRsk(self.path)
+        self.assertEqual(riskMap.calculate(), 1)
+        self.assertEqual(riskMap.enableIncremental(), 1)
+        highest = max(PROBABILITY, key=PROBABILITY.get)
+        for row in range(0, 30, 3):
+            riskMap.table[row].probability = highest
+        status = riskMap.updateRecords(riskMap.table[row] for row in range(0, 30, 3))
+        riskMap.tableRemoveRecord(7)
+        live = (status, riskMap.updateRecords(()), riskMap.weightSum, riskMap.profRisk, riskMap.result,
+                [record.rating for record in riskMap.table])
+        return riskMap, live
+
+    def test_matchesRecordTable(self):
+        _, expected = self._liveEdit(RiskMap)
+        _, live = self._liveEdit(ColumnarRiskMap)
+        self.assertEqual(live, expected)
+
+    def test_matchesCalculate(self):
+        riskMap, live = self._liveEdit(ColumnarRiskMap)
+        self.assertEqual(riskMap.calculate(), 1)
+        self.assertEqual(live, (1, 1, riskMap.weightSum, riskMap.profRisk, riskMap.result,
+                                [record.rating for record in riskMap.table]))
+
+    def test_unfilledRow(self):
+        riskMap = ColumnarRiskMap.loadFromRsk(self.path)
+        self.assertEqual(riskMap.enableIncremental(), 1)
+        riskMap.tableAddRecord()
+        riskMap.table[-1].danger = riskMap.table[0].dangerKey
+        self.assertEqual(riskMap.updateRecords([riskMap.table[-1]]), 0)
+        riskMap.tableRemoveRecord(len(riskMap.table) - 1)
+        self.assertEqual(riskMap.refreshTotals(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
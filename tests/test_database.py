@@ -0,0 +1,76 @@
+import subprocess, sys, threading, time, unittest
+from pathlib import Path
+from src.backend.database import CatalogIndex, DatabaseManager, LazyDatabaseManager
+
+ROOT = Path(__file__).parent.parent
+
+
+class LazyDatabaseManagerTest(unittest.TestCase):
+    def test_notLoadedOnImport(self):
+        out = subprocess.run([sys.executable, "-c", "import sys, src.backend.riskMap\n"
+                              "from src.backend.database import database\n"
+                              "print(database.isLoaded, 'pickle' in sys.modules, 'hashlib' in sys.modules)"],
+                             cwd=ROOT, capture_output=True, text=True, check=True).stdout.split()
+        self.assertEqual(out, ["False", "False", "False"])
+
+    def test_factoryRunsOnce(self):
+        calls = []
+
+        class Catalog:
+            hash = "digest"
+
+        def factory():
+            calls.append(threading.get_ident())
+            # Окно, в которое остальные потоки успевают обратиться к ещё не созданному справочнику
+            time.sleep(0.05)
+            return Catalog()
+
+        lazy = LazyDatabaseManager(factory)
+        start = threading.Barrier(8)
+        results = []
+
+        def worker(i: int):
+            start.wait()
+            results.append(lazy.preload() if i % 2 else lazy.hash)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(lazy.isLoaded)
+        instance = lazy.preload()
+        self.assertEqual(len(results), 8)
+        for result in results:
+            self.assertIn(result, (instance, "digest"))
+        self.assertEqual(sum(result is instance for result in results), 4)
+
+
+class SmallCatalog(DatabaseManager):
+#   Справочник из двух опасностей вместо db.json
+    @classmethod
+    def load_catalog(cls) -> tuple[dict, CatalogIndex]:
+        database = {
+            "1. Падение": {"No": "1", "desc": "Падение", "events": {"Падение с высоты": ["Ограждение"]}},
+            "2. Шум": {"No": "2", "desc": "Шум", "events": {"Потеря слуха": ["Беруши"]}},
+        }
+        return database, CatalogIndex(database)
+
+
+class CatalogLayersTest(unittest.TestCase):
+    def test_overrideExistingEntryText(self):
+        catalog = SmallCatalog()
+        dangerId = catalog.dangerId("1. Падение")
+        catalog.mountLayer("org", data={"1. Падение": {
+            "mode": "override", "No": "7", "desc": "Падение с высоты",
+            "events": {"Падение с высоты": ["Страховочная привязь"]}}})
+        self.assertEqual(catalog.dangerId("1. Падение"), dangerId)
+        self.assertEqual(catalog.dangerParts(dangerId), ("7", "Падение с высоты"))
+        self.assertEqual(catalog.dangerParts(catalog.dangerId("2. Шум")), ("2", "Шум"))
+        catalog.unmountLayer("org")
+        self.assertEqual(catalog.dangerParts(dangerId), ("1", "Падение"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import json, os, tempfile, unittest
+from src.backend.database import PROBABILITY, SUSCEPTIBILITY
+from src.backend.journal import EditJournal, journalPath, recoverJournal
+from src.backend.riskMap import RiskMap
+from tests.fixtures import snapshot, syntheticMap
+
+
+class EditJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "map.rsk")
+        syntheticMap(30, seed=6).saveToRsk(self.path)
+        self.riskMap = RiskMap.loadFromRsk(self.path)
+        self.journal = EditJournal(self.riskMap)
+
+    def tearDown(self):
+        self.journal.close()
+        self.tmp.cleanup()
+
+    def edit(self) -> None:
+        riskMap = self.riskMap
+        riskMap.table[2].susceptibility = max(SUSCEPTIBILITY, key=SUSCEPTIBILITY.get)
+        riskMap.tableRemoveRecord(5)
+        riskMap.tableAddRecord()
+        riskMap.calculate()
+        riskMap.table[0].probability = min(PROBABILITY, key=PROBABILITY.get)
+        riskMap.chairman = "Иванов И. И."
+
+    def recovered(self) -> tuple[RiskMap, int]:
+        self.journal.close()
+        riskMap = RiskMap.loadFromRsk(self.path)
+        return riskMap, recoverJournal(riskMap)
+
+    def test_replayMatches(self):
+        self.edit()
+        riskMap, applied = self.recovered()
+        self.assertGreater(applied, 0)
+        self.assertEqual(snapshot(riskMap), snapshot(self.riskMap))
+        self.assertEqual(riskMap.chairman, "Иванов И. И.")
+        self.assertTrue(riskMap.isModified)
+
+    def test_tornLastLineTruncated(self):
+        self.riskMap.chairman = "А"
+        self.riskMap.profession = "Б"
+        self.journal.close()
+        target = journalPath(self.path)
+        with open(target, 'rb') as f:
+            data = f.read()
+        with open(target, 'wb') as f:
+            f.write(data[:-5])
+        riskMap, applied = self.recovered()
+        self.assertEqual(applied, 1)
+        self.assertEqual((riskMap.chairman, riskMap.profession), ("А", None))
+        with open(target, 'rb') as f:
+            self.assertTrue(f.read().endswith(b"\n"))
+
+    def test_mismatchedHeaderIgnored(self):
+        self.riskMap.chairman = "А"
+        self.journal.close()
+        target = journalPath(self.path)
+        with open(target, 'rb') as f:
+            header, rest = f.readline(), f.read()
+        header = json.loads(header)
+        header["rsk"][0] += 1
+        with open(target, 'wb') as f:
+            f.write(json.dumps(header).encode() + b"\n" + rest)
+        riskMap, applied = self.recovered()
+        self.assertEqual(applied, 0)
+        self.assertIsNone(riskMap.chairman)
+
+    def test_saveDiscardsJournal(self):
+        self.edit()
+        self.assertTrue(os.path.exists(journalPath(self.path)))
+        self.riskMap.saveToRsk(self.path)
+        self.assertFalse(os.path.exists(journalPath(self.path)))
+
+
+if __name__ == '__main__':
+    unittest.main()
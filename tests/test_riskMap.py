@@ -0,0 +1,70 @@
+import unittest
+from src.backend.columnar import ColumnarRiskMap
+from src.backend.database import PROBABILITY, SUSCEPTIBILITY
+from src.backend.riskMap import FIELDS_CHANGED
+from tests.fixtures import syntheticMap
+
+
+class UpdateRecordsTest(unittest.TestCase):
+    def test_ratingsOfAllRowsFollowWeightSum(self):
+        riskMap = syntheticMap(200, seed=3)
+        self.assertEqual(riskMap.calculate(), 1)
+        self.assertEqual(riskMap.enableIncremental(), 1)
+        edited = riskMap.table[:5]
+        highest = max(PROBABILITY, key=PROBABILITY.get)
+        for record in edited:
+            record.probability = highest
+        events = []
+        riskMap.subscribe(FIELDS_CHANGED, events.append)
+        self.assertEqual(riskMap.updateRecords(edited), 1)
+        live = {id(record): record.rating for record in riskMap.table}
+        self.assertEqual(riskMap.calculate(), 1)
+        self.assertEqual(live, {id(record): record.rating for record in riskMap.table})
+        # Изменились рейтинги и неизменённых строк, и об этом пришло одно событие
+        self.assertEqual(len(events), 1)
+        self.assertTrue(set(events[0]["rows"]) - set(range(5)))
+
+
+class FingerprintTest(unittest.TestCase):
+    def maps(self):
+        riskMap = syntheticMap(50, seed=4)
+        columnar = ColumnarRiskMap()
+        columnar.table = syntheticMap(50, seed=4).table
+        return riskMap, columnar
+
+    def test_revertClearsModified(self):
+        for riskMap in self.maps():
+            with self.subTest(cls=type(riskMap).__name__):
+                riskMap.markUnmodified()
+                record = riskMap.table[7]
+                saved = record.susceptibility
+                record.susceptibility = next(value for value in SUSCEPTIBILITY if value != saved)
+                self.assertTrue(riskMap.isModified)
+                record.susceptibility = saved
+                self.assertFalse(riskMap.isModified)
+
+    def test_runningDigestMatchesRebuild(self):
+        for riskMap in self.maps():
+            with self.subTest(cls=type(riskMap).__name__):
+                riskMap.fingerprint
+                riskMap.table[3].probability = max(PROBABILITY, key=PROBABILITY.get)
+                riskMap.tableRemoveRecord(10)
+                riskMap.tableAddRecord()
+                riskMap.calculate()
+                riskMap.table[-1].susceptibility = min(SUSCEPTIBILITY, key=SUSCEPTIBILITY.get)
+                running = riskMap.fingerprint
+                riskMap._fingerprint = riskMap._rowDigests = None
+                self.assertEqual(running, riskMap.fingerprint)
+
+    def test_editedRowFollowsRemoval(self):
+        riskMap = syntheticMap(20, seed=5)
+        events = []
+        riskMap.subscribe(FIELDS_CHANGED, events.append)
+        with riskMap.batch():
+            riskMap.table[5].probability = max(PROBABILITY, key=PROBABILITY.get)
+            riskMap.tableRemoveRecord(0)
+        self.assertEqual(events[0]["rows"], [4])
+
+
+if __name__ == '__main__':
+    unittest.main()
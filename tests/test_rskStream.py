@@ -0,0 +1,32 @@
+import io, json, unittest
+from src.backend.rskStream import JsonStream
+
+DOCUMENT = '{"a": 12.5, "b": -3.25e-2, "c": 1E+3, "d": [0.125, 7], "e": 100, "f": "12.5", "g": 0.5}'
+
+
+def readObject(stream: JsonStream) -> dict:
+    result = {}
+    stream.expect("{")
+    while True:
+        key = stream.value()
+        stream.expect(":")
+        result[key] = stream.value()
+        if stream.expect(",}") == "}":
+            return result
+
+
+class JsonStreamTest(unittest.TestCase):
+    def test_numbersSplitAtBufferBoundary(self):
+        # Граница буфера проходит через каждую позицию документа, в том числе внутри дробных чисел и экспонент
+        expected = json.loads(DOCUMENT)
+        for readSize in range(1, len(DOCUMENT) + 1):
+            with self.subTest(readSize=readSize):
+                self.assertEqual(readObject(JsonStream(io.StringIO(DOCUMENT), readSize)), expected)
+
+    def test_numberAtEndOfFile(self):
+        for readSize in (1, 2, 3, 64):
+            self.assertEqual(JsonStream(io.StringIO(" 12.5"), readSize).value(), 12.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
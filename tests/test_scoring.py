@@ -0,0 +1,46 @@
+import unittest
+from src.backend.scoring import MAX_PRODUCT, PRODUCTS, RATINGS, hundredthsRow, ratingIndex
+from tests.fixtures import legacyRow, makeMaps, syntheticMap
+
+# Верхняя граница перебора weightSum: карта из 2 000 строк с наибольшей вероятностью
+MAX_WEIGHT_SUM = 10000
+
+
+class ScoringTest(unittest.TestCase):
+    def test_tablesMatchLegacyFormula(self):
+        for weightSum in range(1, MAX_WEIGHT_SUM + 1):
+            risks = hundredthsRow(weightSum)
+            for product in range(MAX_PRODUCT + 1):
+                risk = round(product / weightSum, 2)
+                expected = 0 if risk <= 0.9 else (1 if risk <= 1.8 else 2)
+                if risks[product] / 100 != risk or ratingIndex(product, weightSum) != expected:
+                    self.fail(f"product={product}, weightSum={weightSum}: {risks[product]}, "
+                              f"{ratingIndex(product, weightSum)} вместо {risk}, {expected}")
+
+    def test_everyScoreCombination(self):
+        for weightSum in (1, 7, 61, 200, 201, 999, 4321):
+            for d in range(1, 6):
+                for s in range(1, 6):
+                    for p in range(1, 6):
+                        risks = hundredthsRow(weightSum)
+                        product = PRODUCTS[d][s][p]
+                        self.assertEqual((risks[p] / 100, risks[product] / 100, RATINGS[ratingIndex(product, weightSum)]),
+                                         legacyRow(d, s, p, weightSum))
+
+    def test_calculateMatchesLegacyFormula(self):
+        # Небольшие карты с разным kFactor и несколько больших карт с weightSum в тысячах
+        maps = makeMaps(300, seed=5) + [syntheticMap(rows, seed=seed) for rows, seed in ((500, 1), (1500, 2), (2000, 3))]
+        for riskMap in maps:
+            self.assertEqual(riskMap.calculate(updateMethods=False), 1)
+            rows = [legacyRow(record.damagePts, record.susceptibilityPts, record.probabilityPts, riskMap.weightSum)
+                    for record in riskMap.table]
+            self.assertEqual([(record.weight, record.identifiedDangersRisks, record.rating) for record in riskMap.table],
+                             rows)
+            profRisk = round(sum(risk for _, risk, _ in rows), 2)
+            result = round(riskMap.kFactor + profRisk, 2)
+            self.assertEqual((riskMap.profRisk, riskMap.result, riskMap.resultStr),
+                             (profRisk, result, "Низкий" if result <= 10.0 else ("Средний" if result < 15 else "Высокий")))
+
+
+if __name__ == '__main__':
+    unittest.main()